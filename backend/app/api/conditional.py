@@ -0,0 +1,53 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Dict
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import Principal, get_current_principal, get_read_db
+from app.services.changes import get_data_version
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" name the same representation
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+@dataclass(frozen=True)
+class Validators:
+    """The data version an ETag was computed from, and the headers carrying it."""
+    version: int
+    headers: Dict[str, str]
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+) -> Validators:
+    """
+    ETag/If-None-Match support for per-user read endpoints.
+
+    The tag combines the user's data version with the request URL, so it can
+    be checked with a single primary-key read before any rows are loaded.
+    Returns the version and the ETag and Cache-Control headers; endpoints
+    that build their own Response (such as response_cache.respond) must pass
+    them on, since FastAPI only applies headers set here to responses it
+    creates itself.
+    """
+    version = await get_data_version(db, current_user.id)
+    resource = hashlib.blake2s(
+        f"{current_user.id}:{request.url.path}?{request.url.query}".encode(), digest_size=8
+    ).hexdigest()
+    etag = f'W/"{version}-{resource}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return Validators(version=version, headers=headers)
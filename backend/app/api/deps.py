@@ -1,33 +1,125 @@
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import verify_token
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import get_db, read_engine, recent_writers, ReadSessionLocal, SessionLocal
+from app.core.security import decode_token
 from app.models.user import User
 
 security = HTTPBearer()
 
 
-def get_current_user(
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, as much as most endpoints need to know."""
+    id: uuid.UUID
+    username: str
+    is_premium: bool
+
+
+# token -> (principal, generation). Entries never outlive the token itself.
+principal_cache = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+# user_id -> generation, bumped by invalidate_principal. An entry has to
+# outlive the principals cached before it (so the same TTL); once it expires
+# they have too, and the user is back to generation 0 (their open streams
+# see a change and reconnect).
+_principal_generations = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def principal_generation(user_id: uuid.UUID) -> int:
+    """Bumped by invalidate_principal; what was authenticated under another is stale."""
+    return _principal_generations.get(user_id) or 0
+
+
+def invalidate_principal(user_id: uuid.UUID) -> None:
+    """Drop every cached principal of a user, e.g. after is_premium changed."""
+    _principal_generations.set(user_id, principal_generation(user_id) + 1)
+
+
+def _credentials_exception(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def authenticate_token(
+    token: str, db: AsyncSession, scope: Optional[str] = None
+) -> Principal:
+    """
+    The principal a token belongs to; raises 401 if it is not valid.
+
+    Access tokens carry no scope. Tokens issued for one purpose (e.g. stream
+    tickets) carry a ``scope`` claim and are only accepted where it is asked
+    for; they are not cached.
+    """
+    if scope is None:
+        cached = principal_cache.get(token)
+        if cached is not None:
+            principal, generation = cached
+            if generation == principal_generation(principal.id):
+                return principal
+            principal_cache.delete(token)
+
+    payload = decode_token(token)
+    if payload is None or payload.get("sub") is None or payload.get("scope") != scope:
+        raise _credentials_exception("Could not validate credentials")
+
+    try:
+        user = await db.get(User, uuid.UUID(payload["sub"]))
+    except ValueError:
+        user = None
+    if user is None:
+        raise _credentials_exception("User not found")
+
+    principal = Principal(id=user.id, username=user.username, is_premium=bool(user.is_premium))
+    if scope is None:
+        ttl = payload["exp"] - time.time() if "exp" in payload else None
+        principal_cache.set(token, (principal, principal_generation(user.id)), ttl=ttl)
+    return principal
+
+
+async def get_current_principal(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    return await authenticate_token(credentials.credentials, db)
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ) -> User:
-    token = credentials.credentials
-    user_id = verify_token(token)
-    
-    if user_id is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    user = db.query(User).filter(User.id == user_id).first()
+    """Full user row, for endpoints that read profile fields or modify the user."""
+    # On a principal cache miss the row is already in the session's identity map
+    user = await db.get(User, principal.id)
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    return user
\ No newline at end of file
+        invalidate_principal(principal.id)
+        raise _credentials_exception("User not found")
+
+    return user
+
+
+async def get_read_db(principal: Principal = Depends(get_current_principal)):
+    """
+    Session for read-only endpoints: on the replica when READ_DATABASE_URL
+    is set, unless the caller wrote recently and must see their own change.
+    """
+    if read_engine is None or await recent_writers.contains(principal.id):
+        async with SessionLocal() as db:
+            yield db
+    else:
+        async with ReadSessionLocal() as db:
+            yield db
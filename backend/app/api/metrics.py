@@ -0,0 +1,75 @@
+from typing import Iterable, List
+from anyio.to_thread import current_default_thread_limiter
+from fastapi import APIRouter, Response
+from app.api.deps import principal_cache
+from app.core.config import settings
+from app.core.database import engine, read_engine
+from app.core.metrics import Gauge, Metric, Counter, registry
+from app.core.response_cache import response_cache
+from app.core.security import hash_jobs_in_flight
+
+router = APIRouter()
+
+
+@registry.collector
+def collect_threadpool() -> Iterable[Metric]:
+    """anyio worker threads serving sync endpoints and dependencies."""
+    limiter = current_default_thread_limiter()
+    capacity = Gauge("threadpool_capacity", "Worker threads available to sync code")
+    capacity.set(limiter.total_tokens)
+    busy = Gauge("threadpool_busy", "Worker threads currently in use")
+    busy.set(limiter.borrowed_tokens)
+    waiting = Gauge("threadpool_queue_depth", "Calls waiting for a worker thread")
+    waiting.set(limiter.statistics().tasks_waiting)
+    return [capacity, busy, waiting]
+
+
+@registry.collector
+def collect_db_pool() -> Iterable[Metric]:
+    size = Gauge("db_pool_size", "Persistent connections the pool keeps", ("engine",))
+    checked_out = Gauge("db_pool_checked_out", "Connections currently in use", ("engine",))
+    overflow = Gauge(
+        "db_pool_overflow", "Connections open beyond the pool size (negative while below it)", ("engine",)
+    )
+    engines = {"primary": engine, "replica": read_engine}
+    for name, db_engine in engines.items():
+        pool = db_engine.sync_engine.pool if db_engine is not None else None
+        # NullPool (SQLite, pgbouncer mode) keeps no connections to report on
+        if not hasattr(pool, "checkedout"):
+            continue
+        size.set(pool.size(), name)
+        checked_out.set(pool.checkedout(), name)
+        overflow.set(pool.overflow(), name)
+    return [size, checked_out, overflow]
+
+
+@registry.collector
+def collect_caches() -> Iterable[Metric]:
+    stats = {"principal": principal_cache.stats(), "response": response_cache.stats()}
+    hits = Counter("cache_hits", "Cache lookups answered from the cache", ("cache",))
+    misses = Counter("cache_misses", "Cache lookups that fell through", ("cache",))
+    ratio = Gauge("cache_hit_ratio", "Hits over lookups since start", ("cache",))
+    metrics: List[Metric] = [hits, misses, ratio]
+    for name, cache in stats.items():
+        hits.inc(name, amount=cache["hits"])
+        misses.inc(name, amount=cache["misses"])
+        lookups = cache["hits"] + cache["misses"]
+        ratio.set(cache["hits"] / lookups if lookups else 0, name)
+    entries = Gauge("cache_entries", "Entries held in process", ("cache",))
+    entries.set(len(principal_cache), "principal")
+    metrics.append(entries)
+    return metrics
+
+
+@registry.collector
+def collect_password_hashing() -> Iterable[Metric]:
+    jobs = Gauge("password_hash_jobs", "Password hashing jobs running or queued")
+    jobs.set(hash_jobs_in_flight())
+    capacity = Gauge("password_hash_capacity", "Jobs accepted before answering 503")
+    capacity.set(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE)
+    return [jobs, capacity]
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
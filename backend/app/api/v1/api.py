@@ -4,13 +4,16 @@ api_router = APIRouter()
 
 # Import routers
 try:
-    from app.api.v1.endpoints import auth, goals, steps, rewards, payments
+    from app.api.v1.endpoints import auth, goals, steps, rewards, payments, sync, leaderboard, stream
     
     api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
     api_router.include_router(goals.router, prefix="/goals", tags=["goals"])
     api_router.include_router(steps.router, prefix="/goals", tags=["steps"])
     api_router.include_router(rewards.router, prefix="/rewards", tags=["rewards"])
     api_router.include_router(payments.router, prefix="/payments", tags=["payments"])
+    api_router.include_router(sync.router, prefix="/sync", tags=["sync"])
+    api_router.include_router(leaderboard.router, prefix="/leaderboard", tags=["leaderboard"])
+    api_router.include_router(stream.router, prefix="/stream", tags=["stream"])
 except ImportError as e:
     print(f"Warning: Could not import API endpoints: {e}")
     pass
\ No newline at end of file
@@ -1,55 +1,115 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import math
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select, update, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.rate_limit import RateLimitExceeded, check_auth_rate_limit
+from app.core.response_cache import response_cache
+from app.core.serialization import dump_json, json_response
+from app.core.security import (
+    PasswordHasherBusy,
+    create_access_token,
+    hash_password_async,
+    verify_and_update_password_async,
+)
 from app.models.user import User
 from app.models.reward import UserReward
 from app.schemas.user import UserCreate, UserResponse, Token
-from app.api.deps import get_current_user
+from app.api.deps import Principal, get_current_principal, get_read_db
+from app.api.conditional import Validators, conditional_get
 
 router = APIRouter()
 
 
-@router.post("/register", response_model=Token)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    # Check if user exists
-    if db.query(User).filter(User.email == user_data.email).first():
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def _check_rate_limit(request: Request, email: str) -> None:
+    # Runs before any query or hashing, so a burst of attempts costs no CPU
+    client_ip = request.client.host if request.client else "unknown"
+    try:
+        await check_auth_rate_limit(client_ip, email)
+    except RateLimitExceeded as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many authentication attempts, please retry later",
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        )
+
+
+async def _check_not_registered(db: AsyncSession, user_data: UserCreate) -> None:
+    # Email and username in one query
+    taken = (await db.execute(
+        select(User.email, User.username).where(
+            or_(User.email == user_data.email, User.username == user_data.username)
+        )
+    )).all()
+    if any(email == user_data.email for email, _ in taken):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    if db.query(User).filter(User.username == user_data.username).first():
+    if taken:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
         )
+
+
+@router.post("/register", response_model=Token)
+async def register(request: Request, user_data: UserCreate, db: AsyncSession = Depends(get_db)):
+    await _check_rate_limit(request, user_data.email)
+    
+    await _check_not_registered(db, user_data)
+    
+    # Return the connection to the pool while the password is hashed
+    await db.close()
+    try:
+        hashed_password = await hash_password_async(user_data.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     
     # Create user
-    hashed_password = get_password_hash(user_data.password)
     user = User(
         email=user_data.email,
         username=user_data.username,
         hashed_password=hashed_password
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
-    
-    # Create user rewards
-    user_reward = UserReward(user_id=user.id)
-    db.add(user_reward)
-    db.commit()
+    try:
+        await db.flush()
+        
+        # Create user rewards
+        user_reward = UserReward(user_id=user.id)
+        db.add(user_reward)
+        await db.commit()
+    except IntegrityError:
+        # A concurrent registration took the email or username while the
+        # password was hashed
+        await db.rollback()
+        await _check_not_registered(db, user_data)
+        # The conflicting row is gone again, e.g. that registration failed
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Registration conflicted with another request, please try again"
+        )
     
     # Create access token
     access_token = create_access_token(data={"sub": str(user.id)})
     
-    return {
+    return json_response(Token, {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": UserResponse.model_validate(user)
-    }
+        "user": user
+    })
 
 
 class LoginRequest(BaseModel):
@@ -57,25 +117,56 @@ class LoginRequest(BaseModel):
     password: str
 
 @router.post("/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == login_data.email).first()
+async def login(request: Request, login_data: LoginRequest, db: AsyncSession = Depends(get_db)):
+    await _check_rate_limit(request, login_data.email)
+    
+    user = await db.scalar(select(User).where(User.email == login_data.email))
+    # Return the connection to the pool while the password is verified
+    await db.close()
     
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    verified, new_hash = False, None
+    if user:
+        try:
+            verified, new_hash = await verify_and_update_password_async(
+                login_data.password, user.hashed_password
+            )
+        except PasswordHasherBusy:
+            raise _hasher_busy()
+    
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    if new_hash:
+        # Stored hash used outdated cost parameters
+        await db.execute(
+            update(User).where(User.id == user.id).values(hashed_password=new_hash)
+        )
+        await db.commit()
+    
     access_token = create_access_token(data={"sub": str(user.id)})
     
-    return {
+    return json_response(Token, {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": UserResponse.model_validate(user)
-    }
+        "user": user
+    })
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
-    return UserResponse.model_validate(current_user)
\ No newline at end of file
+async def get_current_user_info(
+    request: Request,
+    current_user: Principal = Depends(get_current_principal),
+    validators: Validators = Depends(conditional_get),
+    db: AsyncSession = Depends(get_read_db)
+):
+    async def render() -> bytes:
+        user = await db.get(User, current_user.id)
+        return dump_json(UserResponse, user)
+    
+    return await response_cache.respond(
+        request, current_user.id, render, validators.version, headers=validators.headers
+    )
@@ -1,78 +1,141 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+import uuid
 from app.core.database import get_db
-from app.models.user import User
+from app.core.response_cache import response_cache
+from app.core.serialization import dump_json, json_response
 from app.models.goal import Goal
-from app.schemas.goal import GoalCreate, GoalUpdate, GoalResponse
-from app.api.deps import get_current_user
+from app.models.sync import SYNC_GOAL, SYNC_STEP
+from app.schemas.goal import GoalCreate, GoalUpdate, GoalResponse, GoalSummary
+from app.api.deps import Principal, get_current_principal, get_read_db
+from app.api.conditional import Validators, conditional_get
+from app.services.changes import commit_user_change, track_change
+from app.services.rewards import record_progress
+from app.services.goals import (
+    GoalSort,
+    GoalStatus,
+    InvalidCursor,
+    SortOrder,
+    load_goal,
+    load_goal_page,
+    load_goal_summary,
+)
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[GoalResponse])
-def get_goals(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_goals(
+    request: Request,
+    include: Literal["steps", "none"] = Query("steps"),
+    goal_status: Optional[GoalStatus] = Query(None, alias="status"),
+    title_prefix: Optional[str] = Query(None, min_length=1, max_length=200),
+    sort: GoalSort = Query("created_at"),
+    order: SortOrder = Query("desc"),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    current_user: Principal = Depends(get_current_principal),
+    validators: Validators = Depends(conditional_get),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    goals = db.query(Goal).filter(Goal.user_id == current_user.id).all()
-    return goals
+    """
+    A page of the user's goals. When more follow, the X-Next-Cursor header
+    holds an opaque cursor; pass it back as ``cursor`` with the same
+    filters and sort to get the next page.
+    """
+    async def render():
+        try:
+            page = await load_goal_page(
+                db, current_user.id, limit=limit, cursor=cursor, sort=sort, order=order,
+                status=goal_status, title_prefix=title_prefix, include_steps=include == "steps",
+            )
+        except InvalidCursor as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc)
+            )
+        body = dump_json(List[GoalResponse], page.goals)
+        if page.next_cursor is None:
+            return body
+        return body, {"X-Next-Cursor": page.next_cursor}
+    
+    return await response_cache.respond(request, current_user.id, render, validators.version, headers=validators.headers)
 
 
-@router.get("/{goal_id}", response_model=GoalResponse)
-def get_goal(
-    goal_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+@router.get("/summary", response_model=GoalSummary)
+async def get_goal_summary(
+    request: Request,
+    current_user: Principal = Depends(get_current_principal),
+    validators: Validators = Depends(conditional_get),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    goal = db.query(Goal).filter(
-        Goal.id == goal_id,
-        Goal.user_id == current_user.id
-    ).first()
+    """Goal and step totals and progress tiers for the dashboard."""
+    async def render() -> bytes:
+        return dump_json(GoalSummary, await load_goal_summary(db, current_user.id))
     
-    if not goal:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Goal not found"
-        )
+    return await response_cache.respond(request, current_user.id, render, validators.version, headers=validators.headers)
+
+
+@router.get("/{goal_id}", response_model=GoalResponse)
+async def get_goal(
+    request: Request,
+    goal_id: uuid.UUID,
+    include: Literal["steps", "none"] = Query("steps"),
+    current_user: Principal = Depends(get_current_principal),
+    validators: Validators = Depends(conditional_get),
+    db: AsyncSession = Depends(get_read_db)
+):
+    async def render() -> bytes:
+        goal = await load_goal(db, goal_id, current_user.id, include_steps=include == "steps")
+        
+        if not goal:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Goal not found"
+            )
+        
+        return dump_json(GoalResponse, goal)
     
-    return goal
+    return await response_cache.respond(request, current_user.id, render, validators.version, headers=validators.headers)
 
 
 @router.post("/", response_model=GoalResponse)
-def create_goal(
+async def create_goal(
     goal_data: GoalCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ):
     # Check free user limits
     if not current_user.is_premium:
-        goal_count = db.query(Goal).filter(Goal.user_id == current_user.id).count()
+        goal_count = await db.scalar(
+            select(func.count()).select_from(Goal).where(Goal.user_id == current_user.id)
+        )
         if goal_count >= 5:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Free users can only create 5 goals. Upgrade to Premium for unlimited goals."
             )
     
-    goal = Goal(**goal_data.model_dump(), user_id=current_user.id)
+    # A new goal has no steps; setting the collection avoids a lazy load
+    goal = Goal(**goal_data.model_dump(), user_id=current_user.id, steps=[])
     db.add(goal)
-    db.commit()
-    db.refresh(goal)
+    await db.flush()
+    track_change(db, current_user.id, SYNC_GOAL, goal.id)
+    await commit_user_change(db, current_user.id)
     
-    return goal
+    return json_response(GoalResponse, goal)
 
 
 @router.put("/{goal_id}", response_model=GoalResponse)
-def update_goal(
-    goal_id: str,
+async def update_goal(
+    goal_id: uuid.UUID,
     goal_data: GoalUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ):
-    goal = db.query(Goal).filter(
-        Goal.id == goal_id,
-        Goal.user_id == current_user.id
-    ).first()
+    goal = await load_goal(db, goal_id, current_user.id)
     
     if not goal:
         raise HTTPException(
@@ -80,26 +143,29 @@ def update_goal(
             detail="Goal not found"
         )
     
+    before = (goal.completed_steps or 0, goal.total_steps)
     update_data = goal_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(goal, field, value)
+    track_change(db, current_user.id, SYNC_GOAL, goal.id)
     
-    db.commit()
-    db.refresh(goal)
+    # Changing total_steps can finish (or reopen) a goal
+    await record_progress(
+        db, current_user.id, before=before, after=(goal.completed_steps or 0, goal.total_steps)
+    )
+    await commit_user_change(db, current_user.id)
     
-    return goal
+    return json_response(GoalResponse, goal)
 
 
 @router.delete("/{goal_id}")
-def delete_goal(
-    goal_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def delete_goal(
+    goal_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ):
-    goal = db.query(Goal).filter(
-        Goal.id == goal_id,
-        Goal.user_id == current_user.id
-    ).first()
+    # Steps are loaded up front so the delete-orphan cascade needs no lazy IO
+    goal = await load_goal(db, goal_id, current_user.id)
     
     if not goal:
         raise HTTPException(
@@ -107,7 +173,10 @@ def delete_goal(
             detail="Goal not found"
         )
     
-    db.delete(goal)
-    db.commit()
+    track_change(db, current_user.id, SYNC_GOAL, goal.id, deleted=True)
+    for step in goal.steps:
+        track_change(db, current_user.id, SYNC_STEP, step.id, deleted=True)
+    await db.delete(goal)
+    await commit_user_change(db, current_user.id)
     
-    return {"message": "Goal deleted successfully"}
\ No newline at end of file
+    return {"message": "Goal deleted successfully"}
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.serialization import json_response
+from app.models.user import User
+from app.schemas.leaderboard import LeaderboardRank, LeaderboardResponse
+from app.api.deps import Principal, get_current_principal, get_read_db
+from app.services.leaderboard import LeaderboardName, leaderboards
+
+router = APIRouter()
+
+
+@router.get("/{board}", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    board: LeaderboardName,
+    limit: int = Query(10, ge=1, le=100),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """The top users of a board: points, weekly_points (this UTC week) or streak (longest)."""
+    entries = await leaderboards.top(board, limit)
+    usernames = dict((await db.execute(
+        select(User.id, User.username).where(User.id.in_([user_id for _, user_id, _ in entries]))
+    )).all()) if entries else {}
+    
+    return json_response(LeaderboardResponse, {
+        "board": board,
+        "entries": [
+            {"rank": rank, "username": usernames[user_id], "score": score}
+            for rank, user_id, score in entries
+            # Skips accounts deleted since the board was last rebuilt
+            if user_id in usernames
+        ],
+    })
+
+
+@router.get("/{board}/me", response_model=LeaderboardRank)
+async def get_my_rank(
+    board: LeaderboardName,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """The current user's rank on a board; users with equal scores share a rank."""
+    found = await leaderboards.rank(board, current_user.id)
+    rank, score = found if found is not None else (None, 0)
+    
+    return json_response(LeaderboardRank, {
+        "board": board,
+        "rank": rank,
+        "score": score,
+        "total": await leaderboards.size(board),
+    })
@@ -1,18 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
+from app.core.metrics import paddle_webhooks
 from app.models.user import User
-from app.api.deps import get_current_user
+from app.api.deps import Principal, get_current_principal, get_current_user, invalidate_principal
 from app.core.config import settings
+from app.services.changes import record_user_change, user_data_changed
+from app.services.webhooks import (
+    SIGNATURE_HEADER,
+    store_webhook,
+    verify_signature,
+    webhook_event_id,
+    webhook_processor,
+)
 import httpx
+import json
 
 router = APIRouter()
 
 
 @router.post("/subscribe")
 async def create_subscription(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a Paddle subscription for the user"""
     if not settings.PADDLE_VENDOR_ID or not settings.PADDLE_API_KEY:
@@ -31,7 +41,7 @@ async def create_subscription(
 @router.post("/cancel")
 async def cancel_subscription(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Cancel user's subscription"""
     if not current_user.is_premium:
@@ -43,38 +53,56 @@ async def cancel_subscription(
     # In production, you would call Paddle's API to cancel the subscription
     current_user.is_premium = False
     current_user.paddle_subscription_id = None
-    db.commit()
+    await record_user_change(db, current_user.id)
+    await db.commit()
+    invalidate_principal(current_user.id)
+    await user_data_changed(current_user.id, {"type": "account"})
     
     return {"message": "Subscription cancelled successfully"}
 
 
 @router.post("/webhook")
-async def paddle_webhook(request: Request, db: Session = Depends(get_db)):
-    """Handle Paddle webhook events"""
-    # In production, you would verify the webhook signature
-    # and handle different event types (subscription_created, subscription_cancelled, etc.)
+async def paddle_webhook(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Verify and store a Paddle webhook, then acknowledge it straight away.
+
+    The webhook processor applies stored events in the background, so Paddle
+    is never kept waiting and its redeliveries are deduplicated by event id.
+    """
+    if not settings.PADDLE_WEBHOOK_SECRET:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Paddle webhook secret not configured"
+        )
     
-    body = await request.json()
-    event_type = body.get("alert_name")
+    body = await request.body()
+    if not verify_signature(
+        body,
+        request.headers.get(SIGNATURE_HEADER, ""),
+        settings.PADDLE_WEBHOOK_SECRET,
+        settings.PADDLE_WEBHOOK_TOLERANCE_SECONDS,
+    ):
+        paddle_webhooks.inc("rejected")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid webhook signature"
+        )
     
-    if event_type == "subscription_created":
-        user_id = body.get("passthrough")  # User ID passed during checkout
-        if user_id:
-            user = db.query(User).filter(User.id == user_id).first()
-            if user:
-                user.is_premium = True
-                user.paddle_subscription_id = body.get("subscription_id")
-                db.commit()
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict) or not webhook_event_id(payload):
+        paddle_webhooks.inc("rejected")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Webhook payload must be a JSON object with an event id"
+        )
     
-    elif event_type == "subscription_cancelled":
-        subscription_id = body.get("subscription_id")
-        if subscription_id:
-            user = db.query(User).filter(
-                User.paddle_subscription_id == subscription_id
-            ).first()
-            if user:
-                user.is_premium = False
-                user.paddle_subscription_id = None
-                db.commit()
+    if await store_webhook(db, payload):
+        paddle_webhooks.inc("stored")
+        webhook_processor.notify()
+    else:
+        paddle_webhooks.inc("duplicate")
     
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
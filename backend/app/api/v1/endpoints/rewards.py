@@ -1,28 +1,80 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.user import User
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.response_cache import response_cache
 from app.models.reward import UserReward
-from app.schemas.reward import UserRewardResponse
-from app.api.deps import get_current_user
+from app.core.serialization import dump_json
+from app.schemas.reward import UserRewardResponse, ActivityResponse
+from app.api.deps import Principal, get_current_principal, get_read_db
+from app.api.conditional import Validators, conditional_get
+from app.services.rewards import effective_current_streak
+from app.services.activity import load_activity_days
+from app.services.badges import load_user_badges
 
 router = APIRouter()
 
 
 @router.get("/", response_model=UserRewardResponse)
-def get_user_rewards(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_user_rewards(
+    request: Request,
+    current_user: Principal = Depends(get_current_principal),
+    validators: Validators = Depends(conditional_get),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    user_reward = db.query(UserReward).filter(
-        UserReward.user_id == current_user.id
-    ).first()
+    async def render() -> bytes:
+        user_reward = await db.scalar(
+            select(UserReward).where(UserReward.user_id == current_user.id)
+        )
+        
+        if not user_reward:
+            # This session may be on the replica; the reward processor creates
+            # the row with the user's first reward event
+            now = datetime.utcnow()
+            user_reward = UserReward(
+                user_id=current_user.id, total_points=0, current_streak=0, longest_streak=0,
+                created_at=now, updated_at=now,
+            )
+
+        # Badges come from the in-memory catalog; only their ids are read here
+        return dump_json(UserRewardResponse, {
+            "user_id": user_reward.user_id,
+            "total_points": user_reward.total_points,
+            "current_streak": effective_current_streak(user_reward),
+            "longest_streak": user_reward.longest_streak,
+            "created_at": user_reward.created_at,
+            "updated_at": user_reward.updated_at,
+            "badges": await load_user_badges(db, current_user.id),
+        })
     
-    if not user_reward:
-        # Create default rewards if not exists
-        user_reward = UserReward(user_id=current_user.id)
-        db.add(user_reward)
-        db.commit()
-        db.refresh(user_reward)
+    return await response_cache.respond(request, current_user.id, render, validators.version, headers=validators.headers)
+
+
+@router.get("/activity", response_model=ActivityResponse)
+async def get_activity(
+    request: Request,
+    days: int = Query(365, ge=1, le=3660),
+    current_user: Principal = Depends(get_current_principal),
+    validators: Validators = Depends(conditional_get),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Daily completion heatmap from the daily rollup, plus the user's streaks"""
+    async def render() -> bytes:
+        today = datetime.utcnow().date()
+        since = today - timedelta(days=days - 1)
+        activity = await load_activity_days(db, current_user.id, since=since)
+        # The same streaks as GET /rewards; the reward processor derives them
+        # from this rollup
+        user_reward = await db.scalar(
+            select(UserReward).where(UserReward.user_id == current_user.id)
+        )
+        return dump_json(ActivityResponse, {
+            "current_streak": effective_current_streak(user_reward, today) if user_reward else 0,
+            "longest_streak": (user_reward.longest_streak or 0) if user_reward else 0,
+            "days": [
+                {"date": day, "completions": completions}
+                for day, completions in activity.items()
+            ],
+        })
     
-    return user_reward
\ No newline at end of file
+    return await response_cache.respond(request, current_user.id, render, validators.version, headers=validators.headers)
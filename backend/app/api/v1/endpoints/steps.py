@@ -1,29 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+import uuid
+from datetime import datetime
 from app.core.database import get_db
-from app.models.user import User
-from app.models.goal import Goal
+from app.core.serialization import json_response
 from app.models.step import Step
-from app.schemas.step import StepCreate, StepUpdate, StepResponse
-from app.api.deps import get_current_user
+from app.models.sync import SYNC_STEP
+from app.schemas.step import (
+    StepCreate, StepUpdate, StepResponse, StepBatchRequest, StepBatchResponse,
+)
+from app.api.deps import Principal, get_current_principal
+from app.services import steps as step_service
+from app.services.changes import commit_user_change, track_change
 
 router = APIRouter()
 
 
+async def _not_found(db: AsyncSession, goal_id: uuid.UUID, user_id: uuid.UUID) -> HTTPException:
+    # Only called on the failure path to tell a missing goal from a missing step
+    if not await step_service.goal_is_owned(db, goal_id, user_id):
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Goal not found"
+        )
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Step not found"
+    )
+
+
 @router.post("/{goal_id}/steps", response_model=StepResponse)
-def create_step(
-    goal_id: str,
+async def create_step(
+    goal_id: uuid.UUID,
     step_data: StepCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ):
     # Verify goal ownership
-    goal = db.query(Goal).filter(
-        Goal.id == goal_id,
-        Goal.user_id == current_user.id
-    ).first()
-    
-    if not goal:
+    if not await step_service.goal_is_owned(db, goal_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Goal not found"
@@ -31,146 +45,97 @@ def create_step(
     
     step = Step(**step_data.model_dump(), goal_id=goal_id)
     db.add(step)
-    db.commit()
-    db.refresh(step)
+    await db.flush()
+    track_change(db, current_user.id, SYNC_STEP, step.id)
+    await commit_user_change(db, current_user.id)
     
-    return step
+    return json_response(StepResponse, step)
 
 
-@router.put("/{goal_id}/steps/{step_id}", response_model=StepResponse)
-def update_step(
-    goal_id: str,
-    step_id: str,
-    step_data: StepUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+@router.post("/{goal_id}/steps:batch", response_model=StepBatchResponse)
+async def batch_steps(
+    goal_id: uuid.UUID,
+    batch: StepBatchRequest,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ):
+    """Apply create/update/toggle/delete operations in a single transaction"""
     # Verify goal ownership
-    goal = db.query(Goal).filter(
-        Goal.id == goal_id,
-        Goal.user_id == current_user.id
-    ).first()
-    
-    if not goal:
+    if not await step_service.goal_is_owned(db, goal_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Goal not found"
         )
     
-    step = db.query(Step).filter(
-        Step.id == step_id,
-        Step.goal_id == goal_id
-    ).first()
+    results = await step_service.apply_step_batch(
+        db, current_user.id, goal_id, batch.operations
+    )
+    await commit_user_change(db, current_user.id)
+    
+    return json_response(StepBatchResponse, StepBatchResponse(results=results))
+
+
+@router.put("/{goal_id}/steps/{step_id}", response_model=StepResponse)
+async def update_step(
+    goal_id: uuid.UUID,
+    step_id: uuid.UUID,
+    step_data: StepUpdate,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    step = await step_service.get_owned_step(db, goal_id, step_id, current_user.id)
     
     if not step:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Step not found"
-        )
+        raise await _not_found(db, goal_id, current_user.id)
     
+    was_completed = step.is_completed
     update_data = step_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(step, field, value)
+    completion_changed = step.is_completed != was_completed
+    if completion_changed:
+        step.completed_at = datetime.utcnow() if step.is_completed else None
+    await db.flush()
+    track_change(db, current_user.id, SYNC_STEP, step.id)
     
     # Update goal progress if step completion changed
-    if 'is_completed' in update_data:
-        completed_steps = db.query(Step).filter(
-            Step.goal_id == goal_id,
-            Step.is_completed == True
-        ).count()
-        goal.completed_steps = completed_steps
+    if completion_changed:
+        await step_service.apply_completion_change(
+            db, current_user.id, goal_id, changed=[(step.id, step.is_completed)]
+        )
     
-    db.commit()
-    db.refresh(step)
+    await commit_user_change(db, current_user.id)
     
-    return step
+    return json_response(StepResponse, step)
 
 
 @router.patch("/{goal_id}/steps/{step_id}/toggle", response_model=StepResponse)
-def toggle_step_completion(
-    goal_id: str,
-    step_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def toggle_step_completion(
+    goal_id: uuid.UUID,
+    step_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ):
-    # Verify goal ownership
-    goal = db.query(Goal).filter(
-        Goal.id == goal_id,
-        Goal.user_id == current_user.id
-    ).first()
-    
-    if not goal:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Goal not found"
-        )
-    
-    step = db.query(Step).filter(
-        Step.id == step_id,
-        Step.goal_id == goal_id
-    ).first()
+    step = await step_service.toggle_step(db, goal_id, step_id, current_user.id)
     
     if not step:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Step not found"
-        )
+        raise await _not_found(db, goal_id, current_user.id)
     
-    # Toggle completion
-    step.is_completed = not step.is_completed
+    await commit_user_change(db, current_user.id)
     
-    # Update goal progress
-    completed_steps = db.query(Step).filter(
-        Step.goal_id == goal_id,
-        Step.is_completed == True
-    ).count()
-    goal.completed_steps = completed_steps
-    
-    db.commit()
-    db.refresh(step)
-    
-    return step
+    return json_response(StepResponse, step)
 
 
 @router.delete("/{goal_id}/steps/{step_id}")
-def delete_step(
-    goal_id: str,
-    step_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def delete_step(
+    goal_id: uuid.UUID,
+    step_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
 ):
-    # Verify goal ownership
-    goal = db.query(Goal).filter(
-        Goal.id == goal_id,
-        Goal.user_id == current_user.id
-    ).first()
-    
-    if not goal:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Goal not found"
-        )
-    
-    step = db.query(Step).filter(
-        Step.id == step_id,
-        Step.goal_id == goal_id
-    ).first()
-    
-    if not step:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Step not found"
-        )
-    
-    db.delete(step)
-    
-    # Update goal progress
-    completed_steps = db.query(Step).filter(
-        Step.goal_id == goal_id,
-        Step.is_completed == True
-    ).count()
-    goal.completed_steps = completed_steps
+    if not await step_service.delete_step(db, goal_id, step_id, current_user.id):
+        raise await _not_found(db, goal_id, current_user.id)
     
-    db.commit()
+    await commit_user_change(db, current_user.id)
     
-    return {"message": "Step deleted successfully"}
\ No newline at end of file
+    return {"message": "Step deleted successfully"}
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from datetime import timedelta
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.pubsub import pubsub
+from app.core.security import create_access_token, decode_token
+from app.schemas.user import StreamTicket
+from app.api.deps import Principal, authenticate_token, get_current_principal, principal_generation, security
+
+router = APIRouter()
+
+optional_security = HTTPBearer(auto_error=False)
+
+# The scope claim of stream tickets; access tokens have none
+STREAM_SCOPE = "stream"
+
+READY = b'data: {"type":"ready"}\n\n'
+EXPIRED = b'data: {"type":"expired"}\n\n'
+KEEPALIVE = b": keepalive\n\n"
+
+
+async def _events(principal: Principal, expires_at: Optional[float] = None) -> AsyncIterator[bytes]:
+    generation = principal_generation(principal.id)
+    async with pubsub.subscribe(principal.id) as queue:
+        yield READY
+        while True:
+            timeout = settings.STREAM_HEARTBEAT_SECONDS
+            if expires_at is not None:
+                timeout = min(timeout, expires_at - time.time())
+            # The credentials the stream was opened with ran out, or were
+            # revoked (invalidate_principal); the client reconnects with new ones
+            if timeout <= 0 or principal_generation(principal.id) != generation:
+                yield EXPIRED
+                return
+            try:
+                data = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle stream
+                yield KEEPALIVE
+                continue
+            yield b"data: " + data + b"\n\n"
+
+
+@router.post("/ticket", response_model=StreamTicket)
+async def create_stream_ticket(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """
+    A short-lived ticket for opening GET /stream with ``?ticket=``, for
+    clients that cannot set headers (EventSource), so the access token
+    itself never appears in a URL. Streams opened with it still close when
+    the access token expires.
+    """
+    claims = {"sub": str(current_user.id), "scope": STREAM_SCOPE}
+    # Validated by get_current_principal
+    access_exp = decode_token(credentials.credentials).get("exp")
+    if access_exp is not None:
+        claims["session_exp"] = access_exp
+    ticket = create_access_token(claims, timedelta(seconds=settings.STREAM_TICKET_SECONDS))
+    return StreamTicket(ticket=ticket, expires_in=settings.STREAM_TICKET_SECONDS)
+
+
+@router.get("/")
+async def stream_changes(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    ticket: Optional[str] = Query(None, description="From POST /stream/ticket, for clients that cannot set headers (EventSource)"),
+):
+    """
+    Server-sent events announcing changes to the user's data, so clients
+    refetch only when something changed instead of polling:
+
+        {"type": "data", "version": 42, "goals": [...], "steps": [...],
+         "deleted_goals": [...], "deleted_steps": [...]}
+        {"type": "rewards"}    points, streaks or badges changed
+        {"type": "account"}    premium status changed
+        {"type": "resync"}     events were dropped; refetch everything
+        {"type": "expired"}    the access token expired or the account
+                               changed; reconnect with a new token or ticket
+
+    Id lists are only present when non-empty. The stream starts with
+    {"type": "ready"}; refetch after it to cover changes made while
+    disconnected.
+    """
+    if credentials is not None:
+        token, scope = credentials.credentials, None
+    elif ticket:
+        token, scope = ticket, STREAM_SCOPE
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # A session of its own, closed before streaming starts: open streams
+    # must not hold database connections
+    async with SessionLocal() as db:
+        principal = await authenticate_token(token, db, scope=scope)
+    claims = decode_token(token)
+    expires_at = claims.get("session_exp", claims.get("exp"))
+
+    return StreamingResponse(
+        _events(principal, expires_at),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.core.database import get_db
+from app.core.response_cache import response_cache
+from app.core.serialization import dump_json, json_response
+from app.schemas.sync import SyncPullResponse, SyncPushRequest, SyncPushResponse
+from app.api.deps import Principal, get_current_principal, get_read_db
+from app.api.conditional import Validators, conditional_get
+from app.services.changes import commit_user_change
+from app.services.sync import apply_mutations, load_changes
+
+router = APIRouter()
+
+
+@router.get("/", response_model=SyncPullResponse)
+async def pull_changes(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0),
+    current_user: Principal = Depends(get_current_principal),
+    validators: Validators = Depends(conditional_get),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Goals and steps changed since the ``since`` cursor, with the ids of
+    deleted ones. Without ``since`` the response is a full snapshot
+    (``full`` is true). Pass the returned ``cursor`` on the next pull.
+    """
+    async def render() -> bytes:
+        return dump_json(SyncPullResponse, await load_changes(db, current_user.id, since))
+    
+    return await response_cache.respond(request, current_user.id, render, validators.version, headers=validators.headers)
+
+
+@router.post("/", response_model=SyncPushResponse)
+async def push_changes(
+    batch: SyncPushRequest,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Apply queued offline mutations in order, in a single transaction.
+
+    Each mutation gets a result with an HTTP-like status; 409 means the
+    entity changed on the server after the mutation's ``base_cursor`` and
+    carries the server's copy. Pull afterwards to pick up the new cursor.
+    """
+    results = await apply_mutations(
+        db, current_user.id, current_user.is_premium, batch.mutations
+    )
+    if any(result.status < 300 for result in results):
+        await commit_user_change(db, current_user.id)
+    
+    return json_response(SyncPushResponse, SyncPushResponse(results=results))
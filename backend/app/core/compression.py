@@ -0,0 +1,112 @@
+import gzip
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+_COMPRESSIBLE = (b"application/json", b"text/")
+# Fast settings: responses are compressed on every request, not cached
+_GZIP_LEVEL = 5
+_BROTLI_QUALITY = 4
+
+
+def _choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _add_vary(headers: list, value: bytes) -> list:
+    """``headers`` with ``value`` added to their Vary header, merged into one."""
+    tokens = [
+        token.strip() for name, header in headers if name == b"vary"
+        for token in header.split(b",") if token.strip()
+    ]
+    if b"*" not in tokens and value.lower() not in {token.lower() for token in tokens}:
+        tokens.append(value)
+    return [(k, v) for k, v in headers if k != b"vary"] + [(b"vary", b", ".join(tokens))]
+
+
+class CompressionMiddleware:
+    """
+    Brotli (when installed) or gzip compression of complete responses of at
+    least ``minimum_size`` bytes.
+
+    Only single-message bodies are compressed; streamed responses pass
+    through untouched so event streams are never buffered.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = _choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            pending, start = start, None
+            body = message.get("body", b"")
+            headers = list(pending.get("headers", []))
+            content_type = next((v for k, v in headers if k == b"content-type"), b"")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or not content_type.startswith(_COMPRESSIBLE)
+                or any(k == b"content-encoding" for k, _ in headers)
+            ):
+                await send(pending)
+                await send(message)
+                return
+
+            if encoding == "br":
+                body = brotli.compress(body, quality=_BROTLI_QUALITY)
+            else:
+                body = gzip.compress(body, compresslevel=_GZIP_LEVEL)
+            headers = [(k, v) for k, v in headers if k != b"content-length"]
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(body)).encode()),
+            ]
+            # e.g. CORS already varies on Origin
+            headers = _add_vary(headers, b"Accept-Encoding")
+            await send({**pending, "headers": headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,17 +1,124 @@
-from sqlalchemy import create_engine
+import logging
+import uuid
+from uuid import uuid4
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.instrumentation import instrument_engine
+from app.core.redis import get_redis
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+logger = logging.getLogger(__name__)
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Map a plain DATABASE_URL onto its asyncio driver (asyncpg/aiosqlite)."""
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme:
+        scheme = scheme.split("+", 1)[0]
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def _engine_options(url: str) -> dict:
+    if url.startswith("sqlite"):
+        return {}
+    if settings.DB_PGBOUNCER:
+        # pgbouncer pools the connections, and in transaction mode consecutive
+        # statements may run on different server connections, so asyncpg must
+        # neither cache prepared statements nor reuse their names
+        return {
+            "poolclass": NullPool,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            },
+        }
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def create_engine_for(url: str) -> AsyncEngine:
+    async_url = get_async_database_url(url)
+    engine = create_async_engine(async_url, **_engine_options(async_url))
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+engine = create_engine_for(settings.DATABASE_URL)
+read_engine = create_engine_for(settings.READ_DATABASE_URL) if settings.READ_DATABASE_URL else None
+
+# Objects stay usable after commit so handlers can return them without
+# triggering a refresh (lazy IO is not allowed on an AsyncSession).
+SessionLocal = async_sessionmaker(
+    engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+ReadSessionLocal = async_sessionmaker(
+    read_engine or engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+def dialect_insert(db: AsyncSession, table):
+    """INSERT supporting on_conflict_do_* for the session's dialect."""
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+
+class RecentWriters:
+    """
+    Users who wrote within the last READ_YOUR_WRITES_SECONDS.
+
+    Their reads go to the primary so they never see the replica lag behind
+    their own changes. Kept in Redis when configured, so the window holds
+    across workers, and in process otherwise.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._local = TTLCache(max_size=100000, ttl=window)
+
+    async def mark(self, user_id: uuid.UUID) -> None:
+        self._local.set(user_id, True)
+        client = get_redis()
+        if client is not None:
+            try:
+                await client.set(f"wrote:{user_id}", 1, px=int(self.window * 1000))
+            except Exception:
+                logger.warning("Could not record recent write for %s", user_id, exc_info=True)
+
+    async def contains(self, user_id: uuid.UUID) -> bool:
+        if self._local.get(user_id) is not None:
+            return True
+        client = get_redis()
+        if client is None:
+            return False
+        try:
+            return bool(await client.exists(f"wrote:{user_id}"))
+        except Exception:
+            # Without the marker, the primary is the safe choice
+            return True
+
+
+recent_writers = RecentWriters(settings.READ_YOUR_WRITES_SECONDS)
+
@@ -0,0 +1,155 @@
+import json
+import logging
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.metrics import http_request_duration, http_requests_in_flight
+
+logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("app.access")
+slow_query_logger = logging.getLogger("app.slow_query")
+
+_EXPLAIN_PREFIXES = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+
+
+@dataclass
+class RequestStats:
+    """Database work done on behalf of one request."""
+    queries: int = 0
+    db_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    """Plan of a statement, from a raw cursor so it is not counted or re-timed."""
+    if not statement.lstrip().upper().startswith(_EXPLAIN_PREFIXES):
+        return None
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+    except Exception:
+        logger.debug("Could not EXPLAIN slow query", exc_info=True)
+        return None
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    if elapsed * 1000 < settings.SLOW_QUERY_THRESHOLD_MS:
+        return
+    plan = None
+    if not executemany and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+        plan = _explain(conn, statement, parameters)
+    slow_query_logger.warning(json.dumps({
+        "duration_ms": round(elapsed * 1000, 2),
+        "statement": statement,
+        "executemany": executemany,
+        "plan": plan,
+    }))
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement of the engine (pass AsyncEngine.sync_engine)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _server_timing(stats: RequestStats, total_seconds: float) -> bytes:
+    return (
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries", '
+        f"db-slowest;dur={stats.slowest_seconds * 1000:.1f}, "
+        f"app;dur={total_seconds * 1000:.1f}"
+    ).encode("latin-1")
+
+
+class InstrumentationMiddleware:
+    """
+    Collect per-request database stats, add a Server-Timing header, record
+    request metrics and write one JSON access log line per request.
+
+    A plain ASGI middleware, so the stats object is shared with the
+    endpoint's task through the context and the header can be added while
+    the response starts.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(stats, time.perf_counter() - started)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners cannot blow up cardinality
+            http_request_duration.observe(
+                elapsed, scope["method"], getattr(route, "path", "<unmatched>"), str(status_code)
+            )
+            if access_logger.isEnabledFor(logging.INFO):
+                self._log(scope, status_code, elapsed, stats)
+
+    @staticmethod
+    def _log(scope, status_code: int, seconds: float, stats: RequestStats) -> None:
+        route = scope.get("route")
+        access_logger.info(json.dumps({
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": getattr(route, "path", None),
+            "status": status_code,
+            "duration_ms": round(seconds * 1000, 2),
+            "db_queries": stats.queries,
+            "db_ms": round(stats.db_seconds * 1000, 2),
+            "db_slowest_ms": round(stats.slowest_seconds * 1000, 2),
+            "db_slowest_statement": stats.slowest_statement,
+        }))
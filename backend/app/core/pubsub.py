@@ -0,0 +1,147 @@
+"""
+Per-user pub/sub for the change stream (GET /stream).
+
+Each open stream holds a bounded queue registered under its user in this
+process. With REDIS_URL set, events are published to a Redis channel per
+user and every worker subscribes to the channels of the users it has
+streams for, so an event reaches all of a user's devices whichever worker
+wrote it. Without Redis (or while it is unreachable) events only reach
+streams in the writing process.
+"""
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+import anyio
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import stream_connections, stream_events
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "stream:"
+# Sent instead of the events a slow stream could not take; clients refetch
+RESYNC = orjson.dumps({"type": "resync"})
+
+
+def _channel(user_id: uuid.UUID) -> str:
+    return f"{CHANNEL_PREFIX}{user_id}"
+
+
+class PubSub:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._queues: Dict[uuid.UUID, Set[asyncio.Queue]] = defaultdict(set)
+        self._redis_pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+
+    def connections(self) -> int:
+        return sum(len(queues) for queues in self._queues.values())
+
+    def _deliver(self, user_id: uuid.UUID, data: bytes) -> None:
+        for queue in self._queues.get(user_id, ()):
+            try:
+                queue.put_nowait(data)
+                stream_events.inc("delivered")
+            except asyncio.QueueFull:
+                # The stream is not keeping up: replace its backlog with one
+                # resync event rather than block the publisher
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+                stream_events.inc("resync")
+
+    async def publish(self, user_id: uuid.UUID, event: dict) -> None:
+        """Send a change event to every open stream of the user."""
+        data = orjson.dumps(event)
+        client = get_redis()
+        if client is not None:
+            try:
+                await client.publish(_channel(user_id), data)
+                return
+            except Exception:
+                logger.warning("Could not publish to Redis; delivering locally", exc_info=True)
+        self._deliver(user_id, data)
+
+    async def _read(self) -> None:
+        try:
+            async for message in self._redis_pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                channel = message["channel"]
+                channel = channel.decode() if isinstance(channel, bytes) else channel
+                try:
+                    user_id = uuid.UUID(channel[len(CHANNEL_PREFIX):])
+                except ValueError:
+                    continue
+                self._deliver(user_id, message["data"])
+        except Exception:
+            logger.error("Redis subscription failed; streams only get local events", exc_info=True)
+            self._redis_pubsub = None
+
+    async def _redis_subscribe(self, user_id: uuid.UUID) -> None:
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            if self._redis_pubsub is None:
+                self._redis_pubsub = client.pubsub(ignore_subscribe_messages=True)
+            await self._redis_pubsub.subscribe(_channel(user_id))
+            # listen() returns once nothing is subscribed, so restart it as needed
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+        except Exception:
+            logger.warning("Could not subscribe to %s; only local events reach it", user_id, exc_info=True)
+
+    async def _redis_unsubscribe(self, user_id: uuid.UUID) -> None:
+        if self._redis_pubsub is None or user_id in self._queues:
+            return
+        try:
+            await self._redis_pubsub.unsubscribe(_channel(user_id))
+        except Exception:
+            logger.warning("Could not unsubscribe from %s", user_id, exc_info=True)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: uuid.UUID) -> AsyncIterator[asyncio.Queue]:
+        """A queue receiving the user's events (JSON bytes) while the block runs."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        first = not self._queues.get(user_id)
+        self._queues[user_id].add(queue)
+        stream_connections.inc()
+        try:
+            if first:
+                await self._redis_subscribe(user_id)
+            yield queue
+        finally:
+            stream_connections.dec()
+            queues = self._queues.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._queues[user_id]
+                    # Streams end by cancellation when the client goes away
+                    with anyio.CancelScope(shield=True):
+                        await self._redis_unsubscribe(user_id)
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader = None
+        if self._redis_pubsub is not None:
+            try:
+                await self._redis_pubsub.aclose()
+            except Exception:
+                pass
+            self._redis_pubsub = None
+
+
+pubsub = PubSub(queue_size=settings.STREAM_QUEUE_SIZE)
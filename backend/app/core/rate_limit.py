@@ -0,0 +1,119 @@
+"""
+Token-bucket rate limits, kept in Redis when REDIS_URL is configured (shared
+by all workers) and in process otherwise.
+"""
+import logging
+import time
+from typing import Optional, Tuple
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import rate_limit_decisions
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] bucket; ARGV capacity, tokens per second, now (s), expiry (ms).
+# Returns the seconds until a token is available, "0" if one was taken.
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return tostring(retry_after)
+"""
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, limit: str, retry_after: float):
+        super().__init__(f"Rate limit {limit} exceeded")
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+def _take(
+    state: Optional[Tuple[float, float]], now: float, capacity: int, rate: float
+) -> Tuple[Tuple[float, float], float]:
+    """Refill a (tokens, updated_at) bucket and try to take one token."""
+    tokens, updated_at = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class TokenBucket:
+    """
+    One bucket per key holding up to ``burst`` tokens, refilled at
+    ``per_minute`` tokens a minute; each request takes a token.
+
+    Buckets idle long enough to be full again are dropped. If Redis fails the
+    in-process buckets are used, so the limit still holds per worker.
+    """
+
+    def __init__(self, name: str, burst: int, per_minute: float):
+        self.name = name
+        self.burst = burst
+        self.rate = per_minute / 60
+        self._refill_seconds = burst / self.rate
+        self._local = TTLCache(max_size=settings.RATE_LIMIT_MAX_KEYS, ttl=self._refill_seconds)
+
+    def _take_local(self, key: str) -> float:
+        state, retry_after = _take(self._local.get(key), time.monotonic(), self.burst, self.rate)
+        self._local.set(key, state)
+        return retry_after
+
+    async def _take_redis(self, client, key: str) -> float:
+        script = client.register_script(_TOKEN_BUCKET_LUA)
+        retry_after = await script(
+            keys=[f"ratelimit:{self.name}:{key}"],
+            args=[self.burst, self.rate, time.time(), int(self._refill_seconds * 1000) + 1000],
+        )
+        return float(retry_after)
+
+    async def hit(self, key: str) -> None:
+        """Take a token for ``key`` or raise RateLimitExceeded."""
+        client = get_redis()
+        retry_after = None
+        if client is not None:
+            try:
+                retry_after = await self._take_redis(client, key)
+            except Exception:
+                logger.warning("Rate limit %s fell back to the local bucket", self.name, exc_info=True)
+        if retry_after is None:
+            retry_after = self._take_local(key)
+        if retry_after > 0:
+            rate_limit_decisions.inc(self.name, "rejected")
+            raise RateLimitExceeded(self.name, retry_after)
+        rate_limit_decisions.inc(self.name, "allowed")
+
+
+auth_ip_limit = TokenBucket(
+    "auth_ip", settings.AUTH_RATE_LIMIT_IP_BURST, settings.AUTH_RATE_LIMIT_IP_PER_MINUTE
+)
+auth_email_limit = TokenBucket(
+    "auth_email", settings.AUTH_RATE_LIMIT_EMAIL_BURST, settings.AUTH_RATE_LIMIT_EMAIL_PER_MINUTE
+)
+
+
+async def check_auth_rate_limit(client_ip: str, email: str) -> None:
+    """
+    Limit login/registration attempts per client IP and per account email.
+
+    Called before any database or password hashing work. The IP is checked
+    first, so a blocked client does not use up the email's tokens.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    await auth_ip_limit.hit(client_ip)
+    await auth_email_limit.hit(email.strip().lower())
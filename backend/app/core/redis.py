@@ -0,0 +1,24 @@
+from typing import Optional
+from app.core.config import settings
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is optional
+    aioredis = None
+
+_client = None
+
+
+def get_redis() -> Optional["aioredis.Redis"]:
+    """Shared Redis client, or None when REDIS_URL is not configured."""
+    global _client
+    if _client is None and settings.REDIS_URL and aioredis is not None:
+        _client = aioredis.from_url(settings.REDIS_URL)
+    return _client
+
+
+async def close_redis() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
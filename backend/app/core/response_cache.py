@@ -0,0 +1,128 @@
+import json
+import logging
+import uuid
+from typing import Awaitable, Callable, Dict, Mapping, Optional, Tuple, Union
+from fastapi import Request, Response
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# A rendered body, optionally with headers that belong to it (and are cached with it)
+Rendered = Union[bytes, Tuple[bytes, Dict[str, str]]]
+
+
+def _pack(body: bytes, headers: Dict[str, str]) -> bytes:
+    if not headers:
+        return b"B" + body
+    return b"H" + json.dumps(headers).encode() + b"\n" + body
+
+
+def _unpack(entry: bytes) -> Tuple[bytes, Dict[str, str]]:
+    if entry[:1] == b"H":
+        header_line, _, body = entry[1:].partition(b"\n")
+        return body, json.loads(header_line)
+    if entry[:1] == b"B":
+        return entry[1:], {}
+    return entry, {}
+
+
+class LocalCacheBackend:
+    """In-process fallback used when Redis is not configured."""
+
+    def __init__(self, max_size: int, ttl: int):
+        self._entries = TTLCache(max_size=max_size, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._entries.set(key, value, ttl=ttl)
+
+
+class RedisCacheBackend:
+    def __init__(self, client):
+        self._client = client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self._client.set(key, value, ex=ttl)
+
+
+class ResponseCache:
+    """
+    Pre-serialized JSON responses of per-user read endpoints.
+
+    Keys embed the user's data version, as read by conditional_get for the
+    request's ETag. Every write bumps the version in its transaction, so once
+    it commits no request looks up the older entries again, in any worker;
+    they expire after the TTL. The version is read before the body is
+    rendered, so an entry is never older than the version it is stored
+    under, and a body always goes out with an ETag that describes it.
+    """
+
+    def __init__(self, ttl: int, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._local = LocalCacheBackend(max_size=max_size, ttl=ttl)
+
+    @property
+    def backend(self):
+        client = get_redis()
+        return RedisCacheBackend(client) if client is not None else self._local
+
+    async def respond(
+        self,
+        request: Request,
+        user_id: uuid.UUID,
+        render: Callable[[], Awaitable[Rendered]],
+        version: int,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> Response:
+        """
+        Serve the request from cache, or render, store and serve it.
+
+        ``version`` is the user's data version read before rendering (see
+        conditional_get). ``render`` returns the JSON body, or the body and
+        headers describing it (such as a next-page cursor), which are cached
+        along with it. ``headers`` are added to the response either way.
+        """
+        backend = self.backend
+        cache_key = f"resp:{user_id}:{version}:{request.url.path}?{request.url.query}"
+        try:
+            entry = await backend.get(cache_key)
+        except Exception:
+            logger.warning("Response cache unavailable", exc_info=True)
+            entry = None
+
+        if entry is not None:
+            self.hits += 1
+            body, body_headers = _unpack(entry)
+            return Response(
+                content=body, headers={**body_headers, **(headers or {})}, media_type="application/json"
+            )
+
+        self.misses += 1
+        rendered = await render()
+        body, body_headers = rendered if isinstance(rendered, tuple) else (rendered, {})
+        try:
+            await backend.set(cache_key, _pack(body, body_headers), self.ttl)
+        except Exception:
+            logger.warning("Could not store cached response", exc_info=True)
+        return Response(
+            content=body, headers={**body_headers, **(headers or {})}, media_type="application/json"
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache(
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_size=settings.RESPONSE_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,111 @@
+import uuid
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Literal, Optional, Union, get_args, get_origin
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, EmailStr, TypeAdapter
+
+# Values orjson encodes exactly as pydantic's JSON mode does
+_SCALARS = (str, EmailStr, int, float, bool, uuid.UUID, datetime, date, type(None))
+
+Builder = Callable[[Any], Any]
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _compile(type_: Any) -> Builder:
+    """
+    Turn a schema type into a function building plain Python data from ORM
+    objects, schema instances or dicts, by attribute and without validation.
+    """
+    origin = get_origin(type_)
+    if type_ in _SCALARS or origin is Literal:
+        return _identity
+    if origin in (list, List):
+        item = _compile(get_args(type_)[0])
+        if item is _identity:
+            return list
+        return lambda values: [item(value) for value in values]
+    if origin is Union:
+        options = [arg for arg in get_args(type_) if arg is not type(None)]
+        if len(options) != 1:
+            raise _Unsupported(type_)
+        inner = _compile(options[0])
+        if inner is _identity:
+            return _identity
+        return lambda value: None if value is None else inner(value)
+    if isinstance(type_, type) and issubclass(type_, BaseModel):
+        return _compile_model(type_)
+    raise _Unsupported(type_)
+
+
+def _compile_model(model: type) -> Builder:
+    decorators = model.__pydantic_decorators__
+    if decorators.field_serializers or decorators.model_serializers or decorators.computed_fields:
+        raise _Unsupported(model)
+    fields = []
+    for name, field in model.model_fields.items():
+        if field.alias and field.alias != name:
+            raise _Unsupported(model)
+        default = None if field.is_required() else field.get_default(call_default_factory=True)
+        fields.append((name, _compile(field.annotation), default))
+
+    def build(obj: Any) -> Dict[str, Any]:
+        if isinstance(obj, dict):
+            return {name: convert(obj.get(name, default)) for name, convert, default in fields}
+        return {name: convert(getattr(obj, name)) for name, convert, default in fields}
+    return build
+
+
+@lru_cache(maxsize=None)
+def _builder(type_: Any) -> Optional[Builder]:
+    try:
+        return _compile(type_)
+    except _Unsupported:
+        return None
+
+
+@lru_cache(maxsize=None)
+def _adapter(type_: Any) -> TypeAdapter:
+    return TypeAdapter(type_)
+
+
+def dump_json(type_: Any, obj: Any) -> bytes:
+    """
+    Encode ORM objects (read by attribute) as JSON shaped by a schema.
+
+    Rows loaded from the database already have the schema's types, so they
+    are not validated again: a per-schema builder copies the fields into
+    plain data and orjson encodes it, UUIDs and datetimes included. Schemas
+    with aliases or custom serializers go through pydantic instead.
+    """
+    build = _builder(type_)
+    if build is not None:
+        return orjson.dumps(build(obj))
+    adapter = _adapter(type_)
+    return adapter.dump_json(adapter.validate_python(obj, from_attributes=True))
+
+
+def json_response(
+    type_: Any, obj: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serialize ``obj`` as ``type_`` with dump_json.
+
+    Returning a Response skips FastAPI's response_model handling (validate,
+    dump to Python, encode with the json module); keep ``response_model`` on
+    the route for the OpenAPI schema.
+    """
+    return Response(
+        content=dump_json(type_, obj),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
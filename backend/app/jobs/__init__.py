@@ -0,0 +1 @@
+# Empty file to make jobs a Python package
\ No newline at end of file
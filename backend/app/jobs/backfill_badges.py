@@ -0,0 +1,121 @@
+"""
+Evaluate every badge rule for all existing users, in batches.
+
+Counters (steps_completed, goals_completed) are recomputed from the current
+goals and steps first, so this also seeds users created before the rule
+engine existed; users without a reward row get one:
+
+    python -m app.jobs.backfill_badges --batch-size 500
+
+The recount already includes completions whose reward events are still in
+the outbox, and applying those events would count them twice. The outbox is
+drained first, and users that still have pending events are skipped; run the
+job again for them.
+"""
+import argparse
+import asyncio
+from typing import Tuple
+
+from sqlalchemy import select, func, exists
+from app.core.database import SessionLocal, dialect_insert, engine
+from app.models.goal import Goal
+from app.models.reward import UserReward, RewardEvent
+from app.models.step import Step
+from app.models.user import User
+from app.services.badge_rules import award_badges, ensure_badges
+from app.services.changes import record_user_change, user_data_changed
+from app.services.rewards import reward_processor
+
+
+def _recount_query(user_ids):
+    """
+    Counters of the users without pending reward events. The check and the
+    counts are one statement, so they see the same committed data.
+    """
+    steps_completed = (
+        select(func.count(Step.id))
+        .join(Goal, Step.goal_id == Goal.id)
+        .where(Goal.user_id == UserReward.user_id, Step.is_completed == True)
+        .scalar_subquery()
+    )
+    goals_completed = (
+        select(func.count(Goal.id))
+        .where(
+            Goal.user_id == UserReward.user_id,
+            Goal.total_steps > 0,
+            Goal.completed_steps >= Goal.total_steps,
+        )
+        .scalar_subquery()
+    )
+    pending = exists().where(
+        RewardEvent.user_id == UserReward.user_id, RewardEvent.processed_at.is_(None)
+    )
+    return (
+        select(UserReward.user_id, steps_completed, goals_completed)
+        .where(UserReward.user_id.in_(user_ids), ~pending)
+    )
+
+
+async def backfill_badges(batch_size: int = 500) -> Tuple[int, int]:
+    """Returns the number of badges awarded and of users skipped."""
+    async with SessionLocal() as db:
+        await ensure_badges(db)
+    await reward_processor.drain()
+
+    awarded_total = skipped_total = 0
+    last_user_id = None
+    while True:
+        async with SessionLocal() as db:
+            query = select(User.id).order_by(User.id).limit(batch_size)
+            if last_user_id is not None:
+                query = query.where(User.id > last_user_id)
+            user_ids = list((await db.scalars(query)).all())
+            if not user_ids:
+                return awarded_total, skipped_total
+
+            await db.execute(
+                dialect_insert(db, UserReward)
+                .values([{"user_id": user_id} for user_id in user_ids])
+                .on_conflict_do_nothing(index_elements=[UserReward.user_id])
+            )
+            # The reward processor takes the same locks before applying events
+            rewards = {
+                reward.user_id: reward
+                for reward in (await db.scalars(
+                    select(UserReward)
+                    .where(UserReward.user_id.in_(user_ids))
+                    .with_for_update()
+                )).all()
+            }
+            counts = (await db.execute(_recount_query(user_ids))).all()
+            for user_id, steps_completed, goals_completed in counts:
+                rewards[user_id].steps_completed = steps_completed
+                rewards[user_id].goals_completed = goals_completed
+            skipped_total += len(user_ids) - len(counts)
+
+            awarded = await award_badges(db, {user_id: (rewards[user_id], None) for user_id, _, _ in counts})
+            for user_id in awarded:
+                await record_user_change(db, user_id)
+            await db.commit()
+
+        for user_id in awarded:
+            await user_data_changed(user_id)
+        awarded_total += sum(len(badge_ids) for badge_ids in awarded.values())
+        last_user_id = user_ids[-1]
+
+
+async def _main(batch_size: int) -> None:
+    try:
+        awarded, skipped = await backfill_badges(batch_size)
+        print(f"Awarded {awarded} badge(s)")
+        if skipped:
+            print(f"Skipped {skipped} user(s) with pending reward events; run again once they are applied")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill badges for existing users")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(_main(args.batch_size))
@@ -0,0 +1,22 @@
+"""
+Drain the reward event outbox once, e.g. when the in-process processor is
+disabled (REWARD_PROCESSOR_ENABLED=false) or to replay a backlog:
+
+    python -m app.jobs.process_rewards
+"""
+import asyncio
+
+from app.core.database import engine
+from app.services.rewards import reward_processor
+
+
+async def _main() -> None:
+    try:
+        batches = await reward_processor.drain()
+        print(f"Processed {batches} batch(es) of reward events")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,32 @@
+"""
+Drain the Paddle webhook inbox once, e.g. when the in-process processor is
+disabled (WEBHOOK_PROCESSOR_ENABLED=false):
+
+    python -m app.jobs.process_webhooks
+
+--requeue-dead first moves dead-lettered events back to pending with a fresh
+set of attempts, after the cause of their failures has been fixed.
+"""
+import argparse
+import asyncio
+
+from app.core.database import SessionLocal, engine
+from app.services.webhooks import requeue_dead_webhooks, webhook_processor
+
+
+async def _main(requeue_dead: bool) -> None:
+    try:
+        if requeue_dead:
+            async with SessionLocal() as db:
+                requeued = await requeue_dead_webhooks(db)
+            print(f"Requeued {requeued} dead-lettered webhook(s)")
+        batches = await webhook_processor.drain()
+        print(f"Processed {batches} batch(es) of webhooks")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requeue-dead", action="store_true", help="retry dead-lettered events")
+    asyncio.run(_main(parser.parse_args().requeue_dead))
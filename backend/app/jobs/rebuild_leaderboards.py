@@ -0,0 +1,32 @@
+"""
+Rebuild the leaderboards from user_rewards and this week's points:
+
+    python -m app.jobs.rebuild_leaderboards
+
+With REDIS_URL set this replaces the shared boards, e.g. after Redis lost
+its data or scores drifted. Without Redis each API process rebuilds its own
+boards every LEADERBOARD_REBUILD_INTERVAL_SECONDS and this job has nothing
+to update.
+"""
+import asyncio
+
+from app.core.database import SessionLocal, engine
+from app.core.redis import close_redis, get_redis
+from app.services.leaderboard import leaderboards
+
+
+async def _main() -> None:
+    if get_redis() is None:
+        print("REDIS_URL is not set; the API processes keep their own leaderboards")
+        return
+    try:
+        async with SessionLocal() as db:
+            await leaderboards.rebuild(db)
+        print("Rebuilt the leaderboards")
+    finally:
+        await close_redis()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
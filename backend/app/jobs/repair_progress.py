@@ -0,0 +1,42 @@
+"""
+Recompute Goal.completed_steps from the steps table.
+
+Step toggles maintain the counter incrementally; this job repairs any drift
+(e.g. after manual data fixes) in batches, committing after each batch:
+
+    python -m app.jobs.repair_progress --batch-size 500
+"""
+import argparse
+import asyncio
+
+from app.core.database import SessionLocal, engine
+from app.services.steps import recompute_completed_steps
+
+
+async def repair_progress(batch_size: int = 500) -> int:
+    repaired = 0
+    last_goal_id = None
+    while True:
+        async with SessionLocal() as db:
+            last_goal_id, fixed = await recompute_completed_steps(
+                db, after_goal_id=last_goal_id, batch_size=batch_size
+            )
+            await db.commit()
+        repaired += fixed
+        if last_goal_id is None:
+            return repaired
+
+
+async def _main(batch_size: int) -> None:
+    try:
+        repaired = await repair_progress(batch_size)
+        print(f"Repaired completed_steps on {repaired} goal(s)")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute Goal.completed_steps")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(_main(args.batch_size))
@@ -2,6 +2,13 @@ from app.core.database import Base
 from .user import User
 from .goal import Goal
 from .step import Step
-from .reward import UserReward, Badge
+from .reward import UserReward, Badge, RewardEvent, UserWeeklyPoints
+from .activity import StepCompletion, UserActivityDay
+from .sync import UserDataVersion, SyncChange
+from .webhook import WebhookEvent
 
-__all__ = ["Base", "User", "Goal", "Step", "UserReward", "Badge"]
\ No newline at end of file
+__all__ = [
+    "Base", "User", "Goal", "Step", "UserReward", "Badge", "RewardEvent",
+    "UserWeeklyPoints", "StepCompletion", "UserActivityDay", "UserDataVersion",
+    "SyncChange", "WebhookEvent",
+]
\ No newline at end of file
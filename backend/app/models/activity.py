@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, BigInteger, Boolean, Date, DateTime, ForeignKey, Index, Uuid
+from datetime import datetime
+from app.core.database import Base
+
+
+class StepCompletion(Base):
+    """Append-only log of step completion changes (completed or un-completed)."""
+    __tablename__ = "step_completions"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    goal_id = Column(Uuid(as_uuid=True), nullable=False)
+    step_id = Column(Uuid(as_uuid=True), nullable=False)
+    completed = Column(Boolean, nullable=False)
+    completed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_step_completions_user_completed_at", "user_id", "completed_at"),
+    )
+
+
+class UserActivityDay(Base):
+    """Daily rollup of step completions per user (UTC days)."""
+    __tablename__ = "user_activity_days"
+
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    completions = Column(Integer, nullable=False, default=0)
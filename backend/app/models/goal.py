@@ -1,22 +1,30 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index, Text, Uuid, literal_column, text
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 from app.core.database import Base
 
 
+# The progress percentage in SQL. ix_goals_user_id_progress indexes exactly
+# this expression, which is how queries must spell it to use the index.
+PROGRESS_SQL = (
+    "(CASE WHEN total_steps = 0 THEN 0 "
+    "ELSE COALESCE(completed_steps, 0) * 100 / total_steps END)"
+)
+
+
 class Goal(Base):
     __tablename__ = "goals"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False)
     description = Column(Text)
     total_steps = Column(Integer, nullable=False, default=1)
     completed_steps = Column(Integer, default=0)
     emoji = Column(String, nullable=True)
     image_url = Column(String, nullable=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -24,8 +32,21 @@ class Goal(Base):
     user = relationship("User", back_populates="goals")
     steps = relationship("Step", back_populates="goal", cascade="all, delete-orphan")
 
-    @property
+    __table_args__ = (
+        # Goal lists are per user, paged by (sort key, id)
+        Index("ix_goals_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_goals_user_id_updated_at", "user_id", "updated_at", "id"),
+        Index("ix_goals_user_id_progress", "user_id", text(PROGRESS_SQL), "id"),
+    )
+
+    @hybrid_property
     def progress(self) -> int:
         if self.total_steps == 0:
             return 0
-        return int((self.completed_steps / self.total_steps) * 100)
\ No newline at end of file
+        # Integer arithmetic, as PROGRESS_SQL: 29/100 steps is 29, not 28.99...
+        return (self.completed_steps or 0) * 100 // self.total_steps
+
+    @progress.inplace.expression
+    @classmethod
+    def _progress_expression(cls):
+        return literal_column(PROGRESS_SQL, Integer)
\ No newline at end of file
@@ -1,5 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Table
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, Date, DateTime, ForeignKey, Index, Table, Uuid
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -9,18 +8,22 @@ from app.core.database import Base
 user_badges = Table(
     'user_badges',
     Base.metadata,
-    Column('user_id', UUID(as_uuid=True), ForeignKey('user_rewards.user_id')),
-    Column('badge_id', UUID(as_uuid=True), ForeignKey('badges.id'))
+    Column('user_id', Uuid(as_uuid=True), ForeignKey('user_rewards.user_id'), primary_key=True),
+    Column('badge_id', Uuid(as_uuid=True), ForeignKey('badges.id'), primary_key=True),
+    Column('earned_at', DateTime, nullable=False, default=datetime.utcnow)
 )
 
 
 class UserReward(Base):
     __tablename__ = "user_rewards"
 
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id"), primary_key=True)
     total_points = Column(Integer, default=0)
     current_streak = Column(Integer, default=0)
     longest_streak = Column(Integer, default=0)
+    last_activity_date = Column(Date, nullable=True)  # UTC day of the last completion
+    steps_completed = Column(Integer, nullable=False, default=0)
+    goals_completed = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -32,7 +35,7 @@ class UserReward(Base):
 class Badge(Base):
     __tablename__ = "badges"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
     description = Column(String, nullable=False)
     icon = Column(String, nullable=False)
@@ -40,4 +43,48 @@ class Badge(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    users = relationship("UserReward", secondary=user_badges, back_populates="badges")
\ No newline at end of file
+    users = relationship("UserReward", secondary=user_badges, back_populates="badges")
+
+    __table_args__ = (
+        # The catalog is keyed by name; every worker seeds it at startup
+        Index("ux_badges_name", "name", unique=True),
+    )
+
+
+class RewardEvent(Base):
+    """
+    Outbox of reward-relevant activity, written in the same transaction as the
+    step/goal change and applied to UserReward by the reward processor.
+    """
+    __tablename__ = "reward_events"
+
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    type = Column(String, nullable=False)  # step_completed, step_uncompleted, goal_completed, goal_uncompleted
+    quantity = Column(Integer, nullable=False, default=1)
+    points = Column(Integer, nullable=False, default=0)
+    occurred_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_reward_events_pending",
+            "occurred_at",
+            postgresql_where=processed_at.is_(None),
+            sqlite_where=processed_at.is_(None),
+        ),
+    )
+
+
+class UserWeeklyPoints(Base):
+    """Points a user earned in one week (starting Monday, UTC), kept by the reward processor."""
+    __tablename__ = "user_weekly_points"
+
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    week_start = Column(Date, primary_key=True)
+    points = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # The weekly leaderboard is rebuilt from one week's rows
+        Index("ix_user_weekly_points_week_start", "week_start"),
+    )
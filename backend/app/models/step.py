@@ -1,5 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Index, Text, Uuid, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -9,13 +8,25 @@ from app.core.database import Base
 class Step(Base):
     __tablename__ = "steps"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     is_completed = Column(Boolean, default=False)
-    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id"), nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+    goal_id = Column(Uuid(as_uuid=True), ForeignKey("goals.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    goal = relationship("Goal", back_populates="steps")
\ No newline at end of file
+    goal = relationship("Goal", back_populates="steps")
+
+    __table_args__ = (
+        Index("ix_steps_goal_id", "goal_id"),
+        # completed_steps recounts only touch completed rows
+        Index(
+            "ix_steps_goal_id_completed",
+            "goal_id",
+            postgresql_where=text("is_completed"),
+            sqlite_where=text("is_completed"),
+        ),
+    )
\ No newline at end of file
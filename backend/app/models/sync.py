@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Boolean, Integer, ForeignKey, Index, String, Uuid
+from app.core.database import Base
+
+SYNC_GOAL = "goal"
+SYNC_STEP = "step"
+
+
+class UserDataVersion(Base):
+    """Per-user counter bumped by every write to the user's goals, steps or rewards."""
+    __tablename__ = "user_data_versions"
+
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class SyncChange(Base):
+    """
+    The last change to one of a user's goals or steps, stamped with the data
+    version it was committed at. Deleted entities stay behind as tombstones.
+    """
+    __tablename__ = "sync_changes"
+
+    user_id = Column(Uuid(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    entity_type = Column(String, primary_key=True)
+    entity_id = Column(Uuid(as_uuid=True), primary_key=True)
+    seq = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        # GET /sync reads everything after a cursor
+        Index("ix_sync_changes_user_id_seq", "user_id", "seq"),
+    )
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, JSON
+from datetime import datetime
+from app.core.database import Base
+
+WEBHOOK_PENDING = "pending"
+WEBHOOK_PROCESSED = "processed"
+WEBHOOK_DEAD = "dead"
+
+
+class WebhookEvent(Base):
+    """
+    Inbox of verified Paddle webhooks, keyed by Paddle's event/alert id so
+    redeliveries are stored once. The webhook processor applies pending rows.
+    """
+    __tablename__ = "webhook_inbox"
+
+    event_id = Column(String, primary_key=True)
+    event_type = Column(String, nullable=True)
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default=WEBHOOK_PENDING)  # pending, processed, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    received_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_webhook_inbox_pending",
+            "next_attempt_at",
+            postgresql_where=status == WEBHOOK_PENDING,
+            sqlite_where=status == WEBHOOK_PENDING,
+        ),
+    )
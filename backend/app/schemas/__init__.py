@@ -1,11 +1,18 @@
-from .user import User, UserCreate, UserResponse, Token
+from .user import User, UserCreate, UserResponse, Token, StreamTicket
 from .goal import Goal, GoalCreate, GoalUpdate, GoalResponse
-from .step import Step, StepCreate, StepUpdate, StepResponse
-from .reward import UserReward, Badge, BadgeResponse, UserRewardResponse
+from .step import (
+    Step, StepCreate, StepUpdate, StepResponse,
+    StepBatchOperation, StepBatchRequest, StepBatchResult, StepBatchResponse,
+)
+from .reward import (
+    UserReward, Badge, BadgeResponse, UserRewardResponse, ActivityDay, ActivityResponse,
+)
 
 __all__ = [
-    "User", "UserCreate", "UserResponse", "Token",
+    "User", "UserCreate", "UserResponse", "Token", "StreamTicket",
     "Goal", "GoalCreate", "GoalUpdate", "GoalResponse",
     "Step", "StepCreate", "StepUpdate", "StepResponse",
-    "UserReward", "Badge", "BadgeResponse", "UserRewardResponse"
+    "StepBatchOperation", "StepBatchRequest", "StepBatchResult", "StepBatchResponse",
+    "UserReward", "Badge", "BadgeResponse", "UserRewardResponse",
+    "ActivityDay", "ActivityResponse",
 ]
\ No newline at end of file
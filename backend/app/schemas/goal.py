@@ -36,6 +36,24 @@ class Goal(GoalBase):
         from_attributes = True
 
 
+class GoalProgressBuckets(BaseModel):
+    # Goals per badge tier of the goal cards: under 25%, 25%+, 50%+ and 100%
+    none: int = 0
+    bronze: int = 0
+    silver: int = 0
+    gold: int = 0
+
+
+class GoalSummary(BaseModel):
+    total_goals: int
+    completed_goals: int
+    active_goals: int
+    total_steps: int
+    completed_steps: int
+    average_progress: int
+    progress_buckets: GoalProgressBuckets
+
+
 class GoalResponse(Goal):
     steps: List['StepResponse'] = []
 
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    username: str
+    score: int
+
+
+class LeaderboardResponse(BaseModel):
+    board: str
+    entries: List[LeaderboardEntry] = []
+
+
+class LeaderboardRank(BaseModel):
+    board: str
+    # None while the user has no score on the board
+    rank: Optional[int] = None
+    score: int = 0
+    total: int = 0
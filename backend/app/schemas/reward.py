@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 import uuid
 
 
@@ -39,4 +39,15 @@ class UserReward(UserRewardBase):
 
 
 class UserRewardResponse(UserReward):
-    badges: List[BadgeResponse] = []
\ No newline at end of file
+    badges: List[BadgeResponse] = []
+
+
+class ActivityDay(BaseModel):
+    date: date
+    completions: int
+
+
+class ActivityResponse(BaseModel):
+    current_streak: int
+    longest_streak: int
+    days: List[ActivityDay] = []
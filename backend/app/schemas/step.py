@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Literal
 from datetime import datetime
 import uuid
 
@@ -22,6 +22,7 @@ class StepUpdate(BaseModel):
 class Step(StepBase):
     id: uuid.UUID
     is_completed: bool
+    completed_at: Optional[datetime] = None
     goal_id: uuid.UUID
     created_at: datetime
     updated_at: datetime
@@ -33,6 +34,40 @@ class Step(StepBase):
 class StepResponse(Step):
     pass
 
+
+class StepBatchOperation(BaseModel):
+    op: Literal["create", "update", "toggle", "delete"]
+    # Optional on create: chosen by the client, so later operations in the
+    # same batch can refer to the new step
+    step_id: Optional[uuid.UUID] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    is_completed: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def check_required_fields(self):
+        if self.op == "create" and not self.title:
+            raise ValueError("create operations require a title")
+        if self.op != "create" and self.step_id is None:
+            raise ValueError(f"{self.op} operations require a step_id")
+        return self
+
+
+class StepBatchRequest(BaseModel):
+    operations: List[StepBatchOperation] = Field(..., min_length=1, max_length=500)
+
+
+class StepBatchResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    step: Optional[StepResponse] = None
+    detail: Optional[str] = None
+
+
+class StepBatchResponse(BaseModel):
+    results: List[StepBatchResult]
+
 # Update GoalResponse after StepResponse is defined
 try:
     from .goal import update_goal_response
@@ -0,0 +1,50 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, List, Literal, Optional
+import uuid
+from .goal import Goal
+from .step import StepResponse
+
+
+class SyncPullResponse(BaseModel):
+    # Pass back as ``since`` on the next pull
+    cursor: int
+    # True when the client should replace its copy instead of merging
+    full: bool = False
+    goals: List[Goal] = []
+    steps: List[StepResponse] = []
+    deleted_goals: List[uuid.UUID] = []
+    deleted_steps: List[uuid.UUID] = []
+
+
+class SyncMutation(BaseModel):
+    entity: Literal["goal", "step"]
+    op: Literal["create", "update", "delete"]
+    # Chosen by the client on create, so later mutations can refer to it
+    id: uuid.UUID
+    goal_id: Optional[uuid.UUID] = None
+    # The sync cursor the client's copy of the entity was based on
+    base_cursor: int = Field(0, ge=0)
+    # GoalCreate/GoalUpdate or StepCreate/StepUpdate fields
+    data: Dict[str, Any] = {}
+
+    @model_validator(mode="after")
+    def check_goal_id(self):
+        if self.entity == "step" and self.goal_id is None:
+            raise ValueError("step mutations require a goal_id")
+        return self
+
+
+class SyncPushRequest(BaseModel):
+    mutations: List[SyncMutation] = Field(..., min_length=1, max_length=500)
+
+
+class SyncMutationResult(BaseModel):
+    index: int
+    status: int
+    goal: Optional[Goal] = None
+    step: Optional[StepResponse] = None
+    detail: Optional[str] = None
+
+
+class SyncPushResponse(BaseModel):
+    results: List[SyncMutationResult]
@@ -30,4 +30,10 @@ class UserResponse(User):
 class Token(BaseModel):
     access_token: str
     token_type: str
-    user: UserResponse
\ No newline at end of file
+    user: UserResponse
+
+
+class StreamTicket(BaseModel):
+    # Opens GET /stream?ticket= within expires_in seconds
+    ticket: str
+    expires_in: int
@@ -0,0 +1,98 @@
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import dialect_insert
+from app.models.activity import StepCompletion, UserActivityDay
+
+
+async def record_step_completions(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    goal_id: uuid.UUID,
+    changes: List[Tuple[uuid.UUID, bool]],
+    at: Optional[datetime] = None,
+) -> None:
+    """
+    Log (step_id, completed) changes and add completions to today's rollup.
+
+    The rollup counts completions as they happen and is never decremented, so
+    un-completing a step later does not erase that day's activity.
+    """
+    if not changes:
+        return
+    at = at or datetime.utcnow()
+    await db.execute(insert(StepCompletion), [
+        {
+            "user_id": user_id,
+            "goal_id": goal_id,
+            "step_id": step_id,
+            "completed": completed,
+            "completed_at": at,
+        }
+        for step_id, completed in changes
+    ])
+
+    completions = sum(1 for _, completed in changes if completed)
+    if completions:
+        stmt = dialect_insert(db, UserActivityDay).values(
+            user_id=user_id, day=at.date(), completions=completions
+        )
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserActivityDay.user_id, UserActivityDay.day],
+            set_={"completions": UserActivityDay.completions + completions},
+        ))
+
+
+async def load_activity_days(
+    db: AsyncSession, user_id: uuid.UUID, since: Optional[date] = None
+) -> Dict[date, int]:
+    """Completion counts per active day, oldest first."""
+    query = (
+        select(UserActivityDay.day, UserActivityDay.completions)
+        .where(UserActivityDay.user_id == user_id)
+        .order_by(UserActivityDay.day)
+    )
+    if since is not None:
+        query = query.where(UserActivityDay.day >= since)
+    return {day: completions for day, completions in (await db.execute(query)).all()}
+
+
+async def load_active_days(db: AsyncSession, user_ids: List[uuid.UUID]) -> Dict[uuid.UUID, List[date]]:
+    """Each user's active days, oldest first, in one query."""
+    days: Dict[uuid.UUID, List[date]] = {user_id: [] for user_id in user_ids}
+    if user_ids:
+        for user_id, day in (await db.execute(
+            select(UserActivityDay.user_id, UserActivityDay.day)
+            .where(UserActivityDay.user_id.in_(user_ids))
+            .order_by(UserActivityDay.user_id, UserActivityDay.day)
+        )).all():
+            days[user_id].append(day)
+    return days
+
+
+def streak_runs(active_days: Iterable[date]) -> Tuple[Optional[date], int, int]:
+    """
+    (last active day, run of days ending on it, longest run) from ascending
+    active days, in O(days).
+    """
+    longest = run = 0
+    previous = None
+    for day in active_days:
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+    return previous, run, longest
+
+
+def compute_streaks(active_days: Iterable[date], today: Optional[date] = None) -> Tuple[int, int]:
+    """
+    Current and longest streak from ascending active days, in O(days).
+
+    The current streak survives until a full day passes without activity.
+    """
+    today = today or datetime.utcnow().date()
+    previous, run, longest = streak_runs(active_days)
+    current = run if previous is not None and today - previous <= timedelta(days=1) else 0
+    return current, longest
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class BatchProcessor:
+    """
+    Background task in the API process that drains a table in batches,
+    every ``interval`` seconds or as soon as ``notify`` is called.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def process_batch(self, db: AsyncSession) -> int:
+        """Process and commit one batch; returns the number of rows handled."""
+        raise NotImplementedError
+
+    def notify(self) -> None:
+        """Ask the processor to drain now instead of at the next interval."""
+        self._wakeup.set()
+
+    async def drain(self) -> int:
+        """Process batches until nothing is left; returns the batch count."""
+        batches = 0
+        while True:
+            async with SessionLocal() as db:
+                handled = await self.process_batch(db)
+            if not handled:
+                return batches
+            batches += 1
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.drain()
+            except Exception:
+                logger.exception("%s failed; will retry", type(self).__name__)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
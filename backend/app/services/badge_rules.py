@@ -0,0 +1,136 @@
+"""
+Badge criteria declared as data and evaluated against running counters.
+
+Each rule names the UserReward counter it reads and the event types that can
+move that counter. The reward processor only evaluates the rules indexed
+under the event types it just applied, so awarding is O(relevant rules) per
+event and never looks at step or goal history.
+"""
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import dialect_insert
+from app.models.reward import Badge, UserReward, user_badges
+from app.services.badges import badge_catalog
+from app.services.events import STEP_COMPLETED, GOAL_COMPLETED
+
+
+@dataclass(frozen=True)
+class BadgeRule:
+    name: str
+    description: str
+    icon: str
+    type: str  # bronze, silver, gold
+    metric: str  # UserReward counter
+    threshold: int
+    triggers: Tuple[str, ...]
+
+    def is_met(self, reward: UserReward) -> bool:
+        return (getattr(reward, self.metric) or 0) >= self.threshold
+
+
+BADGE_RULES: Tuple[BadgeRule, ...] = (
+    BadgeRule("First Step", "Complete your first step", "👣", "bronze",
+              "steps_completed", 1, (STEP_COMPLETED,)),
+    BadgeRule("Getting Going", "Complete 10 steps", "🚶", "bronze",
+              "steps_completed", 10, (STEP_COMPLETED,)),
+    BadgeRule("Centurion", "Complete 100 steps", "💯", "gold",
+              "steps_completed", 100, (STEP_COMPLETED,)),
+    BadgeRule("Goal Getter", "Finish your first goal", "🎯", "bronze",
+              "goals_completed", 1, (GOAL_COMPLETED,)),
+    BadgeRule("High Achiever", "Finish 5 goals", "🏆", "silver",
+              "goals_completed", 5, (GOAL_COMPLETED,)),
+    BadgeRule("On a Roll", "Reach a 7-day streak", "🔥", "silver",
+              "longest_streak", 7, (STEP_COMPLETED, GOAL_COMPLETED)),
+    BadgeRule("Unstoppable", "Reach a 30-day streak", "⚡", "gold",
+              "longest_streak", 30, (STEP_COMPLETED, GOAL_COMPLETED)),
+)
+
+
+def _index_rules(rules: Iterable[BadgeRule]) -> Mapping[str, Tuple[BadgeRule, ...]]:
+    index: Dict[str, List[BadgeRule]] = defaultdict(list)
+    for rule in rules:
+        for trigger in rule.triggers:
+            index[trigger].append(rule)
+    return MappingProxyType({event: tuple(found) for event, found in index.items()})
+
+
+RULES_BY_EVENT = _index_rules(BADGE_RULES)
+
+
+async def ensure_badges(db: AsyncSession) -> None:
+    """
+    Create catalog rows for rules whose badge does not exist yet, then reload
+    the catalog. Workers starting together may race here; the unique name
+    makes the later inserts no-ops.
+    """
+    existing = set((await db.scalars(select(Badge.name))).all())
+    missing = [
+        {
+            "id": uuid.uuid4(),
+            "name": rule.name,
+            "description": rule.description,
+            "icon": rule.icon,
+            "type": rule.type,
+            "created_at": datetime.utcnow(),
+        }
+        for rule in BADGE_RULES
+        if rule.name not in existing
+    ]
+    if missing:
+        await db.execute(
+            dialect_insert(db, Badge).values(missing)
+            .on_conflict_do_nothing(index_elements=[Badge.name])
+        )
+        await db.commit()
+    await badge_catalog.refresh(db)
+
+
+async def award_badges(
+    db: AsyncSession,
+    candidates: Dict[uuid.UUID, Tuple[UserReward, Optional[Set[str]]]],
+) -> Dict[uuid.UUID, List[uuid.UUID]]:
+    """
+    Award every badge whose rule is now met.
+
+    ``candidates`` maps user ids to their (already updated) reward row and
+    the event types just applied; None means "evaluate every rule", which
+    the backfill uses. Returns the newly awarded badge ids per user.
+    """
+    if not candidates:
+        return {}
+
+    earned: Dict[uuid.UUID, Set[uuid.UUID]] = defaultdict(set)
+    for user_id, badge_id in (await db.execute(
+        select(user_badges.c.user_id, user_badges.c.badge_id)
+        .where(user_badges.c.user_id.in_(candidates))
+    )).all():
+        earned[user_id].add(badge_id)
+
+    awarded: Dict[uuid.UUID, List[uuid.UUID]] = defaultdict(list)
+    for user_id, (reward, event_types) in candidates.items():
+        if event_types is None:
+            rules: Iterable[BadgeRule] = BADGE_RULES
+        else:
+            rules = {rule for event in event_types for rule in RULES_BY_EVENT.get(event, ())}
+        for rule in rules:
+            badge = badge_catalog.by_name.get(rule.name)
+            if badge is None or badge.id in earned[user_id] or not rule.is_met(reward):
+                continue
+            awarded[user_id].append(badge.id)
+
+    rows = [
+        {"user_id": user_id, "badge_id": badge_id, "earned_at": datetime.utcnow()}
+        for user_id, badge_ids in awarded.items()
+        for badge_id in badge_ids
+    ]
+    if rows:
+        await db.execute(
+            dialect_insert(db, user_badges).values(rows).on_conflict_do_nothing()
+        )
+    return dict(awarded)
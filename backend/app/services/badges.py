@@ -0,0 +1,61 @@
+import uuid
+from datetime import datetime
+from types import MappingProxyType
+from typing import List, Mapping, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.reward import Badge, user_badges
+from app.schemas.reward import Badge as BadgeSchema, BadgeResponse
+
+
+class BadgeCatalog:
+    """
+    Immutable in-memory snapshot of the static badges table.
+
+    Loaded at startup; a refresh swaps in a new mapping atomically, so
+    readers never see a partially loaded catalog.
+    """
+
+    def __init__(self):
+        self._badges: Mapping[uuid.UUID, BadgeSchema] = MappingProxyType({})
+        self._by_name: Mapping[str, BadgeSchema] = MappingProxyType({})
+        self.loaded_at: Optional[datetime] = None
+
+    @property
+    def badges(self) -> Mapping[uuid.UUID, BadgeSchema]:
+        return self._badges
+
+    @property
+    def by_name(self) -> Mapping[str, BadgeSchema]:
+        return self._by_name
+
+    async def refresh(self, db: AsyncSession) -> None:
+        rows = (await db.scalars(select(Badge))).all()
+        badges = {badge.id: BadgeSchema.model_validate(badge) for badge in rows}
+        self._badges = MappingProxyType(badges)
+        self._by_name = MappingProxyType({badge.name: badge for badge in badges.values()})
+        self.loaded_at = datetime.utcnow()
+
+    async def get_many(self, db: AsyncSession, badge_ids) -> List[BadgeSchema]:
+        # A badge we have never seen means the table changed since the last load
+        if any(badge_id not in self._badges for badge_id in badge_ids):
+            await self.refresh(db)
+        return [self._badges[badge_id] for badge_id in badge_ids if badge_id in self._badges]
+
+
+badge_catalog = BadgeCatalog()
+
+
+async def load_user_badges(db: AsyncSession, user_id: uuid.UUID) -> List[BadgeResponse]:
+    """The user's earned badges: one indexed read of ids, joined in memory."""
+    earned = (await db.execute(
+        select(user_badges.c.badge_id, user_badges.c.earned_at)
+        .where(user_badges.c.user_id == user_id)
+        .order_by(user_badges.c.earned_at)
+    )).all()
+    earned_at = {badge_id: at for badge_id, at in earned}
+    badges = await badge_catalog.get_many(db, list(earned_at))
+    return [
+        BadgeResponse(**badge.model_dump(), earned_at=earned_at[badge.id])
+        for badge in badges
+    ]
@@ -0,0 +1,126 @@
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import dialect_insert, recent_writers
+from app.core.pubsub import pubsub
+from app.models.sync import SyncChange, UserDataVersion, SYNC_GOAL
+
+# Session.info key holding the goals/steps touched by the open transaction
+_TRACKED = "sync_changes"
+# Session.info key holding the stream events to publish once it commits
+_EVENTS = "stream_events"
+
+
+async def get_data_version(db: AsyncSession, user_id: uuid.UUID) -> int:
+    version = await db.scalar(
+        select(UserDataVersion.version).where(UserDataVersion.user_id == user_id)
+    )
+    return version or 0
+
+
+def track_change(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    entity_type: str,
+    entity_id: uuid.UUID,
+    deleted: bool = False,
+) -> None:
+    """
+    Note that a goal or step of the user was written (or deleted) in the
+    current transaction. record_user_change stamps it with the new version,
+    which is what GET /sync reads.
+    """
+    db.info.setdefault(_TRACKED, {})[(user_id, entity_type, entity_id)] = deleted
+
+
+@asynccontextmanager
+async def change_savepoint(db: AsyncSession) -> AsyncIterator[None]:
+    """
+    A savepoint around writes that may fail on their own. If it rolls back,
+    the goals and steps tracked inside it are forgotten as well.
+    """
+    tracked = dict(db.info.get(_TRACKED, {}))
+    try:
+        async with db.begin_nested():
+            yield
+    except BaseException:
+        db.info[_TRACKED] = tracked
+        raise
+
+
+async def _record_tracked_changes(
+    db: AsyncSession, user_id: uuid.UUID, version: int
+) -> Dict[str, List[str]]:
+    """Stamp the user's tracked goals/steps with ``version``; returns their ids by kind."""
+    tracked = db.info.get(_TRACKED)
+    if not tracked:
+        return {}
+    rows = []
+    changed: Dict[str, List[str]] = {}
+    for key in [key for key in tracked if key[0] == user_id]:
+        _, entity_type, entity_id = key
+        deleted = tracked.pop(key)
+        rows.append({
+            "user_id": user_id,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "seq": version,
+            "deleted": deleted,
+        })
+        kind = "goals" if entity_type == SYNC_GOAL else "steps"
+        changed.setdefault(f"deleted_{kind}" if deleted else kind, []).append(str(entity_id))
+    if not rows:
+        return {}
+    stmt = dialect_insert(db, SyncChange).values(rows)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[SyncChange.user_id, SyncChange.entity_type, SyncChange.entity_id],
+        set_={"seq": stmt.excluded.seq, "deleted": stmt.excluded.deleted},
+    ))
+    return changed
+
+
+async def record_user_change(db: AsyncSession, user_id: uuid.UUID) -> int:
+    """
+    Bump the user's data version inside the current write transaction.
+
+    Every write to goals, steps, rewards or the user's profile must call this
+    so conditional GETs stop answering 304 for the old state and cached
+    responses of it are no longer looked up. Goals and steps passed to
+    track_change are recorded at the new version, and a stream event naming
+    them is held for commit_user_change to publish.
+    """
+    stmt = dialect_insert(db, UserDataVersion).values(user_id=user_id, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserDataVersion.user_id],
+        set_={"version": UserDataVersion.version + 1},
+    ).returning(UserDataVersion.version)
+    version = await db.scalar(stmt)
+    changed = await _record_tracked_changes(db, user_id, version)
+    db.info.setdefault(_EVENTS, {})[user_id] = {"type": "data", "version": version, **changed}
+    return version
+
+
+async def user_data_changed(user_id: uuid.UUID, event: Optional[dict] = None) -> None:
+    """
+    Call after committing a change to the user's data: keeps their reads on
+    the primary until replicas catch up (cached responses are keyed by the
+    data version, so they need no invalidation).
+    ``event`` is pushed to the user's open change streams (GET /stream).
+    """
+    await recent_writers.mark(user_id)
+    if event is not None:
+        await pubsub.publish(user_id, event)
+
+
+async def commit_user_change(db: AsyncSession, user_id: uuid.UUID) -> int:
+    """Record a change to the user's data, commit it and announce it."""
+    from app.services.rewards import reward_processor
+
+    version = await record_user_change(db, user_id)
+    await db.commit()
+    await user_data_changed(user_id, db.info.get(_EVENTS, {}).pop(user_id, None))
+    # Any reward events written by this transaction can be applied right away
+    reward_processor.notify()
+    return version
@@ -0,0 +1,5 @@
+# Reward event types, shared by the reward processor and the badge rules
+STEP_COMPLETED = "step_completed"
+STEP_UNCOMPLETED = "step_uncompleted"
+GOAL_COMPLETED = "goal_completed"
+GOAL_UNCOMPLETED = "goal_uncompleted"
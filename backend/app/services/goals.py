@@ -0,0 +1,186 @@
+import base64
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Literal, Optional
+from sqlalchemy import and_, case, func, not_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, noload
+from app.models.goal import Goal
+
+GoalSort = Literal["created_at", "updated_at", "progress"]
+SortOrder = Literal["desc", "asc"]
+GoalStatus = Literal["active", "completed"]
+
+# Each sort key is indexed together with (user_id, ..., id)
+_SORT_KEYS = {
+    "created_at": Goal.created_at,
+    "updated_at": Goal.updated_at,
+    "progress": Goal.progress,
+}
+
+_COMPLETED = and_(Goal.total_steps > 0, func.coalesce(Goal.completed_steps, 0) >= Goal.total_steps)
+
+# Lowest progress of each badge tier, as getBadgeForProgress in the frontend
+PROGRESS_TIERS = (("bronze", 25), ("silver", 50), ("gold", 100))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class GoalPage:
+    goals: List[Goal]
+    next_cursor: Optional[str]
+
+
+def _goal_query(include_steps: bool):
+    # Steps for every goal are fetched with a single extra "IN" query instead
+    # of one lazy SELECT per goal when the response is serialized.
+    loader = selectinload(Goal.steps) if include_steps else noload(Goal.steps)
+    return select(Goal).options(loader)
+
+
+async def load_goals(
+    db: AsyncSession, user_id: uuid.UUID, include_steps: bool = True
+) -> List[Goal]:
+    """Load all goals of a user, newest first, in at most two queries."""
+    result = await db.execute(
+        _goal_query(include_steps)
+        .where(Goal.user_id == user_id)
+        .order_by(Goal.created_at.desc())
+    )
+    return list(result.scalars().all())
+
+
+async def load_goal_summary(db: AsyncSession, user_id: uuid.UUID) -> dict:
+    """
+    Dashboard totals for a user's goals, as a GoalSummary.
+
+    A single aggregate query over the user's goals; step totals come from
+    the goals' total_steps/completed_steps counters, so no steps are read.
+    """
+    progress = Goal.progress
+    at_least = [
+        func.count(case((progress >= low, 1))).label(name) for name, low in PROGRESS_TIERS
+    ]
+    row = (await db.execute(
+        select(
+            func.count().label("total_goals"),
+            func.count(case((_COMPLETED, 1))).label("completed_goals"),
+            func.coalesce(func.sum(Goal.total_steps), 0).label("total_steps"),
+            func.coalesce(func.sum(func.coalesce(Goal.completed_steps, 0)), 0).label("completed_steps"),
+            func.avg(progress).label("average_progress"),
+            *at_least,
+        ).where(Goal.user_id == user_id)
+    )).one()
+
+    # Counts of goals at or above each tier, turned into counts per tier
+    buckets, above = {}, 0
+    for name, _ in reversed(PROGRESS_TIERS):
+        reached = getattr(row, name)
+        buckets[name] = reached - above
+        above = reached
+    buckets["none"] = row.total_goals - above
+    return {
+        "total_goals": row.total_goals,
+        "completed_goals": row.completed_goals,
+        "active_goals": row.total_goals - row.completed_goals,
+        "total_steps": row.total_steps,
+        "completed_steps": row.completed_steps,
+        "average_progress": round(row.average_progress or 0),
+        "progress_buckets": buckets,
+    }
+
+
+def encode_cursor(sort: GoalSort, order: SortOrder, goal: Goal) -> str:
+    """Opaque position after ``goal`` in a list sorted by ``sort``/``order``."""
+    value: Any = getattr(goal, sort)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, order, value, str(goal.id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: GoalSort, order: SortOrder) -> tuple:
+    """The (sort value, id) a cursor points after; it must match the sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, cursor_order, value, goal_id = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise InvalidCursor("Cursor belongs to a different sort order")
+    try:
+        goal_id = uuid.UUID(goal_id)
+        if sort == "progress":
+            if not isinstance(value, int):
+                raise ValueError(value)
+        else:
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    return value, goal_id
+
+
+async def load_goal_page(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    limit: int,
+    cursor: Optional[str] = None,
+    sort: GoalSort = "created_at",
+    order: SortOrder = "desc",
+    status: Optional[GoalStatus] = None,
+    title_prefix: Optional[str] = None,
+    include_steps: bool = True,
+) -> GoalPage:
+    """
+    One page of a user's goals, keyset-paginated on (sort key, id).
+
+    The cursor is a position in the (user_id, sort key, id) index, so every
+    page reads about ``limit`` rows however many goals come before it.
+    Status and title filters are applied along the same index.
+    """
+    key = _SORT_KEYS[sort]
+    query = _goal_query(include_steps).where(Goal.user_id == user_id)
+    if status == "completed":
+        query = query.where(_COMPLETED)
+    elif status == "active":
+        query = query.where(not_(_COMPLETED))
+    if title_prefix:
+        query = query.where(func.lower(Goal.title).startswith(title_prefix.lower(), autoescape=True))
+    if cursor:
+        value, goal_id = decode_cursor(cursor, sort, order)
+        # (key, id) past the cursor, spelled so the key bound seeks into the
+        # index on every backend (row values do not, on expression indexes)
+        if order == "desc":
+            query = query.where(key <= value, or_(key < value, Goal.id < goal_id))
+        else:
+            query = query.where(key >= value, or_(key > value, Goal.id > goal_id))
+    if order == "desc":
+        query = query.order_by(key.desc(), Goal.id.desc())
+    else:
+        query = query.order_by(key.asc(), Goal.id.asc())
+
+    # One extra row tells whether there is a next page
+    goals = list((await db.execute(query.limit(limit + 1))).scalars().all())
+    next_cursor = None
+    if len(goals) > limit:
+        goals = goals[:limit]
+        next_cursor = encode_cursor(sort, order, goals[-1])
+    return GoalPage(goals=goals, next_cursor=next_cursor)
+
+
+async def load_goal(
+    db: AsyncSession, goal_id: uuid.UUID, user_id: uuid.UUID, include_steps: bool = True
+) -> Optional[Goal]:
+    """Load a single goal owned by the user, with its steps if requested."""
+    result = await db.execute(
+        _goal_query(include_steps).where(
+            Goal.id == goal_id,
+            Goal.user_id == user_id
+        )
+    )
+    return result.scalars().first()
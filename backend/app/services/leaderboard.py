@@ -0,0 +1,247 @@
+"""
+Leaderboards of users by total points, points this week and longest streak.
+
+Rankings are kept in Redis sorted sets when REDIS_URL is configured (shared
+by all workers) and in per-process sorted lists otherwise; both answer "top
+N" and "my rank" in O(log n) without touching user_rewards. The reward
+processor sets a user's scores after committing their rewards, and the
+boards are rebuilt from the database at startup. In-process boards only see
+their own worker's updates, so they are also rebuilt periodically.
+"""
+import logging
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Literal, Optional, Tuple
+from sortedcontainers import SortedList
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.reward import UserReward, UserWeeklyPoints
+from app.services.background import BatchProcessor
+
+logger = logging.getLogger(__name__)
+
+LeaderboardName = Literal["points", "weekly_points", "streak"]
+
+WEEKLY_PREFIX = "weekly_points:"
+# A weekly board is only read during its week
+WEEKLY_TTL_SECONDS = 8 * 24 * 3600
+
+# (member, score) pairs, best first
+Ranking = List[Tuple[str, int]]
+
+
+def week_start(day: date) -> date:
+    """Monday of the (UTC) week ``day`` belongs to."""
+    return day - timedelta(days=day.weekday())
+
+
+def _board_key(board: str, today: Optional[date] = None) -> str:
+    if board == "weekly_points":
+        return WEEKLY_PREFIX + week_start(today or datetime.utcnow().date()).isoformat()
+    return board
+
+
+class LocalLeaderboardBackend:
+    """In-process boards: (-score, member) in a sorted list, plus each member's score."""
+
+    def __init__(self):
+        self._boards: Dict[str, Tuple[SortedList, Dict[str, int]]] = {}
+
+    def _board(self, key: str) -> Tuple[SortedList, Dict[str, int]]:
+        board = self._boards.get(key)
+        if board is None:
+            if key.startswith(WEEKLY_PREFIX):
+                # A new week started; the previous weeks' boards are done
+                for old in [k for k in self._boards if k.startswith(WEEKLY_PREFIX)]:
+                    del self._boards[old]
+            board = self._boards[key] = (SortedList(), {})
+        return board
+
+    async def exists(self, key: str) -> bool:
+        return key in self._boards
+
+    async def set_scores(self, key: str, scores: Dict[str, int]) -> None:
+        ranking, current = self._board(key)
+        for member, score in scores.items():
+            old = current.pop(member, None)
+            if old is not None:
+                ranking.remove((-old, member))
+            if score > 0:
+                ranking.add((-score, member))
+                current[member] = score
+
+    async def replace(self, key: str, scores: Dict[str, int]) -> None:
+        current = {member: score for member, score in scores.items() if score > 0}
+        self._board(key)  # drops past weekly boards
+        self._boards[key] = (SortedList((-score, member) for member, score in current.items()), current)
+
+    async def top(self, key: str, limit: int) -> Ranking:
+        ranking, _ = self._boards.get(key, ((), {}))
+        return [(member, -score) for score, member in ranking[:limit]]
+
+    async def rank(self, key: str, member: str) -> Optional[Tuple[int, int]]:
+        ranking, current = self._boards.get(key, ((), {}))
+        score = current.get(member)
+        if score is None:
+            return None
+        # One more than the number of members with a higher score
+        return ranking.bisect_left((-score,)) + 1, score
+
+    async def size(self, key: str) -> int:
+        return len(self._boards.get(key, ((), {}))[1])
+
+
+class RedisLeaderboardBackend:
+    """Boards as sorted sets, shared by every worker."""
+
+    def __init__(self, client):
+        self._client = client
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return f"leaderboard:{key}"
+
+    async def exists(self, key: str) -> bool:
+        return bool(await self._client.exists(self._key(key)))
+
+    async def set_scores(self, key: str, scores: Dict[str, int]) -> None:
+        redis_key = self._key(key)
+        ranked = {member: score for member, score in scores.items() if score > 0}
+        removed = [member for member, score in scores.items() if score <= 0]
+        pipe = self._client.pipeline(transaction=False)
+        if ranked:
+            pipe.zadd(redis_key, ranked)
+        if removed:
+            pipe.zrem(redis_key, *removed)
+        if key.startswith(WEEKLY_PREFIX):
+            pipe.expire(redis_key, WEEKLY_TTL_SECONDS)
+        await pipe.execute()
+
+    async def replace(self, key: str, scores: Dict[str, int]) -> None:
+        # Built under a temporary key and renamed over the old board, so
+        # readers never see a half-built one
+        redis_key = self._key(key)
+        building = f"{redis_key}:rebuild:{uuid.uuid4().hex}"
+        ranked = [(member, score) for member, score in scores.items() if score > 0]
+        if not ranked:
+            await self._client.delete(redis_key)
+            return
+        for i in range(0, len(ranked), 1000):
+            await self._client.zadd(building, dict(ranked[i:i + 1000]))
+        pipe = self._client.pipeline(transaction=True)
+        pipe.rename(building, redis_key)
+        if key.startswith(WEEKLY_PREFIX):
+            pipe.expire(redis_key, WEEKLY_TTL_SECONDS)
+        await pipe.execute()
+
+    async def top(self, key: str, limit: int) -> Ranking:
+        rows = await self._client.zrevrange(self._key(key), 0, limit - 1, withscores=True)
+        return [(member.decode(), int(score)) for member, score in rows]
+
+    async def rank(self, key: str, member: str) -> Optional[Tuple[int, int]]:
+        redis_key = self._key(key)
+        score = await self._client.zscore(redis_key, member)
+        if score is None:
+            return None
+        higher = await self._client.zcount(redis_key, f"({score}", "+inf")
+        return higher + 1, int(score)
+
+    async def size(self, key: str) -> int:
+        return await self._client.zcard(self._key(key))
+
+
+class Leaderboards:
+    def __init__(self):
+        self._local = LocalLeaderboardBackend()
+
+    @property
+    def backend(self):
+        client = get_redis()
+        return RedisLeaderboardBackend(client) if client is not None else self._local
+
+    async def record(self, scores: Dict[uuid.UUID, Dict[str, int]]) -> None:
+        """
+        Set users' current scores, as {user_id: {board: score}}. A score of
+        zero takes the user off that board.
+        """
+        by_board: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for user_id, user_scores in scores.items():
+            for board, score in user_scores.items():
+                by_board[_board_key(board)][str(user_id)] = score
+        try:
+            backend = self.backend
+            for key, board_scores in by_board.items():
+                await backend.set_scores(key, board_scores)
+        except Exception:
+            logger.warning("Could not update leaderboards; the next rebuild catches up", exc_info=True)
+
+    async def top(self, board: LeaderboardName, limit: int) -> List[Tuple[int, uuid.UUID, int]]:
+        """The best ``limit`` users as (rank, user_id, score); equal scores share a rank."""
+        entries = []
+        for position, (member, score) in enumerate(await self.backend.top(_board_key(board), limit)):
+            rank = entries[-1][0] if entries and entries[-1][2] == score else position + 1
+            entries.append((rank, uuid.UUID(member), score))
+        return entries
+
+    async def rank(self, board: LeaderboardName, user_id: uuid.UUID) -> Optional[Tuple[int, int]]:
+        """The user's (rank, score), or None when they are not on the board."""
+        return await self.backend.rank(_board_key(board), str(user_id))
+
+    async def size(self, board: LeaderboardName) -> int:
+        return await self.backend.size(_board_key(board))
+
+    async def rebuild(self, db: AsyncSession, force: bool = True) -> None:
+        """
+        Reload every board from user_rewards and this week's points.
+
+        Without ``force`` boards that already exist are kept, which is how a
+        worker starting next to a populated Redis leaves it alone.
+        """
+        backend = self.backend
+        keys = {board: _board_key(board) for board in ("points", "weekly_points", "streak")}
+        if not force and all([await backend.exists(key) for key in keys.values()]):
+            return
+
+        points: Dict[str, int] = {}
+        streaks: Dict[str, int] = {}
+        result = await db.execute(
+            select(UserReward.user_id, UserReward.total_points, UserReward.longest_streak)
+            .where(or_(UserReward.total_points > 0, UserReward.longest_streak > 0))
+        )
+        for user_id, total_points, longest_streak in result:
+            points[str(user_id)] = total_points or 0
+            streaks[str(user_id)] = longest_streak or 0
+        result = await db.execute(
+            select(UserWeeklyPoints.user_id, UserWeeklyPoints.points).where(
+                UserWeeklyPoints.week_start == week_start(datetime.utcnow().date()),
+                UserWeeklyPoints.points > 0,
+            )
+        )
+        weekly = {str(user_id): weekly_points for user_id, weekly_points in result}
+
+        await backend.replace(keys["points"], points)
+        await backend.replace(keys["weekly_points"], weekly)
+        await backend.replace(keys["streak"], streaks)
+
+
+leaderboards = Leaderboards()
+
+
+class LeaderboardRebuilder(BatchProcessor):
+    """
+    Rebuilds the leaderboards at startup (call notify) and every interval.
+    With Redis the shared boards are only built when missing.
+    """
+
+    async def process_batch(self, db: AsyncSession) -> int:
+        await leaderboards.rebuild(db, force=get_redis() is None)
+        return 0
+
+
+leaderboard_rebuilder = LeaderboardRebuilder(
+    interval=settings.LEADERBOARD_REBUILD_INTERVAL_SECONDS,
+    batch_size=0,
+)
@@ -0,0 +1,232 @@
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.models.reward import RewardEvent, UserReward, UserWeeklyPoints
+from app.services.background import BatchProcessor
+from app.services.activity import load_active_days, streak_runs
+from app.services.badge_rules import award_badges
+from app.services.changes import record_user_change, user_data_changed
+from app.services.leaderboard import leaderboards, week_start
+from app.services.events import (
+    STEP_COMPLETED, STEP_UNCOMPLETED, GOAL_COMPLETED, GOAL_UNCOMPLETED,
+)
+
+STEP_POINTS = 10
+GOAL_POINTS = 50
+
+_POINTS = {
+    STEP_COMPLETED: STEP_POINTS,
+    STEP_UNCOMPLETED: -STEP_POINTS,
+    GOAL_COMPLETED: GOAL_POINTS,
+    GOAL_UNCOMPLETED: -GOAL_POINTS,
+}
+# Running counters the badge rules are evaluated against
+_COUNTERS = {
+    STEP_COMPLETED: ("steps_completed", 1),
+    STEP_UNCOMPLETED: ("steps_completed", -1),
+    GOAL_COMPLETED: ("goals_completed", 1),
+    GOAL_UNCOMPLETED: ("goals_completed", -1),
+}
+# Only real progress counts towards a streak
+_ACTIVITY_EVENTS = {STEP_COMPLETED, GOAL_COMPLETED}
+
+
+def _is_complete(completed_steps: int, total_steps: int) -> bool:
+    return total_steps > 0 and completed_steps >= total_steps
+
+
+async def record_progress(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    steps_completed: int = 0,
+    steps_uncompleted: int = 0,
+    before: Optional[tuple] = None,
+    after: Optional[tuple] = None,
+) -> None:
+    """
+    Enqueue reward events for a change in the current transaction.
+
+    ``before``/``after`` are the goal's (completed_steps, total_steps) around
+    the change; crossing the finish line either way emits a goal event.
+    """
+    now = datetime.utcnow()
+    counts = {STEP_COMPLETED: steps_completed, STEP_UNCOMPLETED: steps_uncompleted}
+    if before is not None and after is not None:
+        was_complete, is_complete = _is_complete(*before), _is_complete(*after)
+        if is_complete and not was_complete:
+            counts[GOAL_COMPLETED] = 1
+        elif was_complete and not is_complete:
+            counts[GOAL_UNCOMPLETED] = 1
+
+    events = [
+        {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "type": event_type,
+            "quantity": quantity,
+            "points": _POINTS[event_type] * quantity,
+            "occurred_at": now,
+        }
+        for event_type, quantity in counts.items()
+        if quantity > 0
+    ]
+    if events:
+        await db.execute(insert(RewardEvent), events)
+
+
+def apply_event(
+    reward: UserReward, event_type: str, quantity: int, points: int
+) -> None:
+    """Fold one event's points and counter into a user's running totals in O(1)."""
+    reward.total_points = max(0, (reward.total_points or 0) + points)
+    counter, sign = _COUNTERS[event_type]
+    setattr(reward, counter, max(0, (getattr(reward, counter) or 0) + sign * quantity))
+
+
+def apply_streaks(reward: UserReward, active_days: List[date]) -> None:
+    """
+    Set a user's streak from their activity rollup (ascending days).
+
+    The rollup is written with the step change itself, so the streak does not
+    depend on the order processors apply events in, and GET /rewards and
+    GET /rewards/activity report the same numbers. The longest streak never
+    shrinks, which keeps streaks earned before the rollup existed.
+    """
+    last_day, run, longest = streak_runs(active_days)
+    if last_day is None:
+        return
+    reward.last_activity_date = last_day
+    reward.current_streak = run
+    reward.longest_streak = max(reward.longest_streak or 0, longest)
+
+
+def effective_current_streak(reward: UserReward, today: Optional[date] = None) -> int:
+    """A streak is broken once a full UTC day passes without activity."""
+    today = today or datetime.utcnow().date()
+    if reward.last_activity_date is None or today - reward.last_activity_date > timedelta(days=1):
+        return 0
+    return reward.current_streak or 0
+
+
+async def add_weekly_points(db: AsyncSession, events: List[RewardEvent]) -> Dict[uuid.UUID, int]:
+    """
+    Add the events' points to each user's weekly totals; returns the new
+    totals for the current week.
+    """
+    points: Dict[Tuple[uuid.UUID, date], int] = defaultdict(int)
+    for event in events:
+        points[(event.user_id, week_start(event.occurred_at.date()))] += event.points
+    rows = [
+        {"user_id": user_id, "week_start": week, "points": total}
+        for (user_id, week), total in points.items()
+        if total
+    ]
+    if not rows:
+        return {}
+    stmt = dialect_insert(db, UserWeeklyPoints).values(rows)
+    result = await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserWeeklyPoints.user_id, UserWeeklyPoints.week_start],
+            set_={"points": UserWeeklyPoints.points + stmt.excluded.points},
+        ).returning(UserWeeklyPoints.user_id, UserWeeklyPoints.week_start, UserWeeklyPoints.points)
+    )
+    this_week = week_start(datetime.utcnow().date())
+    return {user_id: total for user_id, week, total in result if week == this_week}
+
+
+async def process_pending_events(db: AsyncSession, batch_size: int = 500) -> List[uuid.UUID]:
+    """
+    Apply one batch of unprocessed events and mark them processed.
+
+    Rewards and the processed markers are committed together, so replaying
+    the outbox (or running several processors) never applies an event twice.
+    The users' leaderboard scores are updated after the commit. Returns the
+    ids of users whose rewards changed.
+    """
+    events = list((await db.scalars(
+        select(RewardEvent)
+        .where(RewardEvent.processed_at.is_(None))
+        .order_by(RewardEvent.occurred_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )).all())
+    if not events:
+        return []
+
+    by_user: Dict[uuid.UUID, List[RewardEvent]] = defaultdict(list)
+    for event in events:
+        by_user[event.user_id].append(event)
+
+    rewards = {
+        reward.user_id: reward
+        for reward in (await db.scalars(
+            select(UserReward)
+            .where(UserReward.user_id.in_(by_user))
+            .with_for_update()
+        )).all()
+    }
+    for user_id, user_events in by_user.items():
+        reward = rewards.get(user_id)
+        if reward is None:
+            reward = UserReward(
+                user_id=user_id, total_points=0, current_streak=0, longest_streak=0,
+                steps_completed=0, goals_completed=0,
+            )
+            db.add(reward)
+            rewards[user_id] = reward
+        for event in user_events:
+            apply_event(reward, event.type, event.quantity, event.points)
+        await record_user_change(db, user_id)
+    active_days = await load_active_days(db, [
+        user_id for user_id, user_events in by_user.items()
+        if any(event.type in _ACTIVITY_EVENTS for event in user_events)
+    ])
+    for user_id, days in active_days.items():
+        apply_streaks(rewards[user_id], days)
+
+    await db.flush()
+    await award_badges(db, {
+        user_id: (rewards[user_id], {event.type for event in user_events})
+        for user_id, user_events in by_user.items()
+    })
+
+    weekly = await add_weekly_points(db, events)
+    scores = {
+        user_id: {
+            "points": rewards[user_id].total_points,
+            "streak": rewards[user_id].longest_streak,
+            **({"weekly_points": weekly[user_id]} if user_id in weekly else {}),
+        }
+        for user_id in by_user
+    }
+
+    await db.execute(
+        update(RewardEvent)
+        .where(RewardEvent.id.in_([event.id for event in events]))
+        .values(processed_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+    await leaderboards.record(scores)
+    for user_id in by_user:
+        await user_data_changed(user_id, {"type": "rewards"})
+    return list(by_user)
+
+
+class RewardProcessor(BatchProcessor):
+    """Background task draining the reward outbox in the API process."""
+
+    async def process_batch(self, db: AsyncSession) -> int:
+        return len(await process_pending_events(db, self.batch_size))
+
+
+reward_processor = RewardProcessor(
+    interval=settings.REWARD_PROCESSOR_INTERVAL_SECONDS,
+    batch_size=settings.REWARD_PROCESSOR_BATCH_SIZE,
+)
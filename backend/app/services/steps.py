@@ -0,0 +1,299 @@
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import select, insert, update, delete, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.goal import Goal
+from app.models.step import Step
+from app.models.sync import SYNC_GOAL, SYNC_STEP
+from app.schemas.step import StepBatchOperation, StepBatchResult, StepResponse
+from app.services.activity import record_step_completions
+from app.services.changes import track_change
+from app.services.rewards import record_progress
+
+_STEP_COLUMNS = (
+    Step.id, Step.title, Step.description, Step.is_completed, Step.completed_at,
+    Step.goal_id, Step.created_at, Step.updated_at,
+)
+
+
+def _owned_goal(goal_id: uuid.UUID, user_id: uuid.UUID):
+    return select(Goal.id).where(Goal.id == goal_id, Goal.user_id == user_id)
+
+
+async def goal_is_owned(db: AsyncSession, goal_id: uuid.UUID, user_id: uuid.UUID) -> bool:
+    return await db.scalar(_owned_goal(goal_id, user_id)) is not None
+
+
+async def adjust_completed_steps(
+    db: AsyncSession, goal_id: uuid.UUID, delta: int
+) -> Optional[Tuple[int, int]]:
+    """
+    Move Goal.completed_steps by delta without recounting the goal's steps.
+
+    Returns the goal's (completed_steps, total_steps) after the change.
+    """
+    result = await db.execute(
+        update(Goal)
+        .where(Goal.id == goal_id)
+        .values(completed_steps=Goal.completed_steps + delta)
+        .returning(Goal.completed_steps, Goal.total_steps)
+    )
+    row = result.first()
+    return tuple(row) if row else None
+
+
+async def apply_completion_change(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    goal_id: uuid.UUID,
+    changed: Sequence[Tuple[uuid.UUID, bool]] = (),
+    removed: int = 0,
+) -> None:
+    """
+    Account for steps whose completion flipped (``changed`` holds
+    (step_id, is_completed) pairs) or that were deleted while completed:
+    adjust the goal counter, log the completions and enqueue rewards.
+    """
+    completed = sum(1 for _, is_completed in changed if is_completed)
+    uncompleted = len(changed) - completed
+    delta = completed - uncompleted - removed
+    after = await adjust_completed_steps(db, goal_id, delta) if delta else None
+    before = (after[0] - delta, after[1]) if after else None
+    if after:
+        track_change(db, user_id, SYNC_GOAL, goal_id)
+    await record_step_completions(db, user_id, goal_id, list(changed))
+    await record_progress(db, user_id, completed, uncompleted, before, after)
+
+
+async def toggle_step(
+    db: AsyncSession, goal_id: uuid.UUID, step_id: uuid.UUID, user_id: uuid.UUID
+) -> Optional[Step]:
+    """
+    Flip a step's completion and move the goal counter by one.
+
+    Ownership is checked inside the UPDATE itself, so the step and the goal
+    counter change in two statements without reading either first. The
+    bookkeeping written in the same transaction adds one insert or upsert
+    each: the completion log, the daily rollup, the reward outbox and, in
+    record_user_change, the data version and sync change records. That is
+    seven statements per toggle, whatever the size of the goal. Returns None
+    when the step does not exist for this user.
+    """
+    step = await db.scalar(
+        update(Step)
+        .where(Step.id == step_id, Step.goal_id.in_(_owned_goal(goal_id, user_id)))
+        .values(
+            is_completed=~Step.is_completed,
+            # Right-hand sides see the pre-update row
+            completed_at=case((Step.is_completed == True, None), else_=datetime.utcnow()),
+        )
+        .returning(Step)
+        .execution_options(synchronize_session=False)
+    )
+    if step is None:
+        return None
+
+    track_change(db, user_id, SYNC_STEP, step.id)
+    await apply_completion_change(db, user_id, goal_id, changed=[(step.id, step.is_completed)])
+    return step
+
+
+async def get_owned_step(
+    db: AsyncSession, goal_id: uuid.UUID, step_id: uuid.UUID, user_id: uuid.UUID
+) -> Optional[Step]:
+    """
+    The step, locked until the transaction ends: callers derive the counter
+    change from its is_completed, which a concurrent toggle must not move.
+    """
+    return await db.scalar(
+        select(Step).where(
+            Step.id == step_id,
+            Step.goal_id.in_(_owned_goal(goal_id, user_id))
+        ).with_for_update()
+    )
+
+
+async def delete_step(
+    db: AsyncSession, goal_id: uuid.UUID, step_id: uuid.UUID, user_id: uuid.UUID
+) -> bool:
+    """Delete a step, decrementing the goal counter if it was completed."""
+    was_completed = await db.scalar(
+        delete(Step)
+        .where(Step.id == step_id, Step.goal_id.in_(_owned_goal(goal_id, user_id)))
+        .returning(Step.is_completed)
+        .execution_options(synchronize_session=False)
+    )
+    if was_completed is None:
+        return False
+
+    track_change(db, user_id, SYNC_STEP, step_id, deleted=True)
+    if was_completed:
+        await apply_completion_change(db, user_id, goal_id, removed=1)
+    return True
+
+
+async def apply_step_batch(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    goal_id: uuid.UUID,
+    operations: List[StepBatchOperation],
+) -> List[StepBatchResult]:
+    """
+    Apply a list of step operations to one (already ownership-checked) goal.
+
+    Existing steps are read (and locked) in one query and the operations are
+    replayed in memory, so the database sees at most one INSERT, two UPDATE
+    batches, one DELETE and one counter update however long the list is.
+    Operations on unknown steps yield a 404 result, and creates with a step_id
+    that is already taken a 409; the rest of the batch still applies.
+    """
+    referenced = {op.step_id for op in operations if op.step_id is not None and op.op != "create"}
+    requested = [op.step_id for op in operations if op.step_id is not None and op.op == "create"]
+    taken = set()
+    if requested:
+        taken = set((await db.scalars(select(Step.id).where(Step.id.in_(requested)))).all())
+    rows = {}
+    if referenced:
+        result = await db.execute(
+            select(*_STEP_COLUMNS)
+            .where(Step.goal_id == goal_id, Step.id.in_(referenced))
+            # The counter delta is derived from these values; a concurrent
+            # toggle must wait rather than be overwritten
+            .with_for_update()
+        )
+        rows = {row.id: dict(row._mapping) for row in result}
+    initially_completed = {step_id: row["is_completed"] for step_id, row in rows.items()}
+
+    now = datetime.utcnow()
+    created: Dict[uuid.UUID, dict] = {}
+    changed: Dict[uuid.UUID, dict] = {}
+    deleted: List[uuid.UUID] = []
+    results: List[StepBatchResult] = []
+
+    for index, op in enumerate(operations):
+        if op.op == "create":
+            if op.step_id is not None and (op.step_id in taken or op.step_id in rows):
+                results.append(StepBatchResult(
+                    index=index, op=op.op, status=409, detail="Step id already exists"
+                ))
+                continue
+            row = {
+                "id": op.step_id or uuid.uuid4(),
+                "title": op.title,
+                "description": op.description,
+                "is_completed": bool(op.is_completed),
+                "completed_at": now if op.is_completed else None,
+                "goal_id": goal_id,
+                "created_at": now,
+                "updated_at": now,
+            }
+            rows[row["id"]] = created[row["id"]] = row
+            results.append(StepBatchResult(
+                index=index, op=op.op, status=201, step=StepResponse.model_validate(row)
+            ))
+            continue
+
+        row = rows.get(op.step_id)
+        if row is None:
+            results.append(StepBatchResult(
+                index=index, op=op.op, status=404, detail="Step not found"
+            ))
+            continue
+
+        if op.op == "delete":
+            del rows[op.step_id]
+            created.pop(op.step_id, None)
+            changed.pop(op.step_id, None)
+            if op.step_id in initially_completed:
+                deleted.append(op.step_id)
+            results.append(StepBatchResult(index=index, op=op.op, status=204))
+            continue
+
+        if op.op == "toggle":
+            row["is_completed"] = not row["is_completed"]
+        else:
+            for field in ("title", "description", "is_completed"):
+                value = getattr(op, field)
+                # Only description may be cleared; the other columns are NOT NULL
+                if field in op.model_fields_set and (value is not None or field == "description"):
+                    row[field] = value
+        if row["is_completed"] != (row["completed_at"] is not None):
+            row["completed_at"] = now if row["is_completed"] else None
+        row["updated_at"] = now
+        if op.step_id not in created:
+            changed[op.step_id] = row
+        results.append(StepBatchResult(
+            index=index, op=op.op, status=200, step=StepResponse.model_validate(row)
+        ))
+
+    if created:
+        await db.execute(insert(Step), list(created.values()))
+    if changed:
+        # Completion columns only for rows whose completion flipped; rows are
+        # batched per set of columns
+        await db.execute(update(Step), [
+            {
+                "id": row["id"],
+                "title": row["title"],
+                "description": row["description"],
+                "updated_at": row["updated_at"],
+                **({
+                    "is_completed": row["is_completed"],
+                    "completed_at": row["completed_at"],
+                } if row["is_completed"] != initially_completed[step_id] else {}),
+            }
+            for step_id, row in changed.items()
+        ])
+    if deleted:
+        await db.execute(
+            delete(Step)
+            .where(Step.id.in_(deleted))
+            .execution_options(synchronize_session=False)
+        )
+
+    for step_id in [*created, *changed]:
+        track_change(db, user_id, SYNC_STEP, step_id)
+    for step_id in deleted:
+        track_change(db, user_id, SYNC_STEP, step_id, deleted=True)
+
+    flipped = [(step_id, True) for step_id, row in created.items() if row["is_completed"]]
+    flipped += [
+        (step_id, row["is_completed"])
+        for step_id, row in changed.items()
+        if row["is_completed"] != initially_completed[step_id]
+    ]
+    removed = sum(initially_completed[step_id] for step_id in deleted)
+    await apply_completion_change(db, user_id, goal_id, changed=flipped, removed=removed)
+    return results
+
+
+async def recompute_completed_steps(
+    db: AsyncSession, after_goal_id: Optional[uuid.UUID] = None, batch_size: int = 500
+) -> Tuple[Optional[uuid.UUID], int]:
+    """
+    Repair Goal.completed_steps for one batch of goals, ordered by id.
+
+    Returns the last goal id of the batch (None when done) and the number of
+    goals whose counter was wrong.
+    """
+    ids_query = select(Goal.id).order_by(Goal.id).limit(batch_size)
+    if after_goal_id is not None:
+        ids_query = ids_query.where(Goal.id > after_goal_id)
+    goal_ids = list((await db.scalars(ids_query)).all())
+    if not goal_ids:
+        return None, 0
+
+    actual = (
+        select(func.count())
+        .select_from(Step)
+        .where(Step.goal_id == Goal.id, Step.is_completed == True)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(Goal)
+        .where(Goal.id.in_(goal_ids), func.coalesce(Goal.completed_steps, -1) != actual)
+        .values(completed_steps=actual)
+        .execution_options(synchronize_session=False)
+    )
+    return goal_ids[-1], result.rowcount
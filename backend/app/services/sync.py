@@ -0,0 +1,297 @@
+import uuid
+from typing import Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import and_, func, select
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
+from app.models.goal import Goal
+from app.models.step import Step
+from app.models.sync import SyncChange, SYNC_GOAL, SYNC_STEP
+from app.schemas.goal import Goal as GoalSchema, GoalCreate, GoalUpdate
+from app.schemas.step import StepBatchOperation, StepCreate, StepResponse, StepUpdate
+from app.schemas.sync import SyncMutation, SyncMutationResult
+from app.services.changes import change_savepoint, get_data_version, track_change
+from app.services.goals import load_goal, load_goals
+from app.services.rewards import record_progress
+from app.services import steps as step_service
+
+FREE_GOAL_LIMIT = 5
+
+
+def _changed_since(user_id: uuid.UUID, entity_type: str, entity_id, since: int, cursor: int):
+    return and_(
+        SyncChange.user_id == user_id,
+        SyncChange.entity_type == entity_type,
+        SyncChange.entity_id == entity_id,
+        SyncChange.seq > since,
+        SyncChange.seq <= cursor,
+        SyncChange.deleted == False,
+    )
+
+
+async def load_changes(db: AsyncSession, user_id: uuid.UUID, since: Optional[int]) -> dict:
+    """
+    The user's goals and steps changed after cursor ``since``, and the ids of
+    those deleted since, as a SyncPullResponse.
+
+    Reads go through sync_changes by (user_id, seq), so the cost follows the
+    number of changes, not the amount of data. Without a cursor (or with one
+    from another database) the client gets a full snapshot instead.
+    """
+    # Read the version first: rows committed after it are picked up next time
+    cursor = await get_data_version(db, user_id)
+    if not since or since > cursor:
+        goals = await load_goals(db, user_id)
+        return {
+            "cursor": cursor,
+            "full": True,
+            "goals": goals,
+            "steps": [step for goal in goals for step in goal.steps],
+        }
+
+    goals = await db.scalars(
+        select(Goal)
+        .options(noload(Goal.steps))
+        .join(SyncChange, _changed_since(user_id, SYNC_GOAL, Goal.id, since, cursor))
+        .where(Goal.user_id == user_id)
+    )
+    steps = await db.scalars(
+        select(Step)
+        .join(SyncChange, _changed_since(user_id, SYNC_STEP, Step.id, since, cursor))
+        .join(Goal, Goal.id == Step.goal_id)
+        .where(Goal.user_id == user_id)
+    )
+    tombstones = await db.execute(
+        select(SyncChange.entity_type, SyncChange.entity_id).where(
+            SyncChange.user_id == user_id,
+            SyncChange.seq > since,
+            SyncChange.seq <= cursor,
+            SyncChange.deleted == True,
+        )
+    )
+    deleted = {SYNC_GOAL: [], SYNC_STEP: []}
+    for entity_type, entity_id in tombstones:
+        deleted[entity_type].append(entity_id)
+    return {
+        "cursor": cursor,
+        "goals": list(goals),
+        "steps": list(steps),
+        "deleted_goals": deleted[SYNC_GOAL],
+        "deleted_steps": deleted[SYNC_STEP],
+    }
+
+
+class _Rejected(Exception):
+    def __init__(self, status: int, detail: str):
+        self.status = status
+        self.detail = detail
+
+
+def _validate(schema, data: dict):
+    try:
+        return schema.model_validate(data)
+    except ValidationError as exc:
+        error = exc.errors()[0]
+        field = ".".join(str(part) for part in error["loc"])
+        raise _Rejected(422, f"{field}: {error['msg']}" if field else error["msg"])
+
+
+async def _load_step(db: AsyncSession, user_id: uuid.UUID, step_id: uuid.UUID) -> Optional[Step]:
+    return await db.scalar(
+        select(Step).join(Goal, Goal.id == Step.goal_id).where(
+            Step.id == step_id, Goal.user_id == user_id
+        )
+    )
+
+
+async def _server_copy(
+    db: AsyncSession, user_id: uuid.UUID, mutation: SyncMutation
+) -> Dict[str, object]:
+    if mutation.entity == SYNC_GOAL:
+        goal = await load_goal(db, mutation.id, user_id, include_steps=False)
+        return {"goal": GoalSchema.model_validate(goal)} if goal else {}
+    step = await _load_step(db, user_id, mutation.id)
+    return {"step": StepResponse.model_validate(step)} if step else {}
+
+
+async def _create_goal(
+    db: AsyncSession, user_id: uuid.UUID, is_premium: bool, mutation: SyncMutation
+) -> dict:
+    data = _validate(GoalCreate, mutation.data)
+    if not is_premium:
+        goal_count = await db.scalar(
+            select(func.count()).select_from(Goal).where(Goal.user_id == user_id)
+        )
+        if goal_count >= FREE_GOAL_LIMIT:
+            raise _Rejected(
+                403,
+                "Free users can only create 5 goals. Upgrade to Premium for unlimited goals."
+            )
+    goal = Goal(id=mutation.id, **data.model_dump(), user_id=user_id, steps=[])
+    db.add(goal)
+    await db.flush()
+    track_change(db, user_id, SYNC_GOAL, goal.id)
+    return {"status": 201, "goal": GoalSchema.model_validate(goal)}
+
+
+async def _update_goal(
+    db: AsyncSession, user_id: uuid.UUID, mutation: SyncMutation
+) -> dict:
+    data = _validate(GoalUpdate, mutation.data)
+    goal = await load_goal(db, mutation.id, user_id, include_steps=False)
+    if goal is None:
+        raise _Rejected(404, "Goal not found")
+    before = (goal.completed_steps or 0, goal.total_steps)
+    for field, value in data.model_dump(exclude_unset=True).items():
+        setattr(goal, field, value)
+    await record_progress(
+        db, user_id, before=before, after=(goal.completed_steps or 0, goal.total_steps)
+    )
+    await db.flush()
+    track_change(db, user_id, SYNC_GOAL, goal.id)
+    return {"status": 200, "goal": GoalSchema.model_validate(goal)}
+
+
+async def _delete_goal(
+    db: AsyncSession, user_id: uuid.UUID, mutation: SyncMutation
+) -> dict:
+    goal = await load_goal(db, mutation.id, user_id)
+    if goal is None:
+        raise _Rejected(404, "Goal not found")
+    track_change(db, user_id, SYNC_GOAL, goal.id, deleted=True)
+    for step in goal.steps:
+        track_change(db, user_id, SYNC_STEP, step.id, deleted=True)
+    await db.delete(goal)
+    await db.flush()
+    return {"status": 204}
+
+
+async def _create_step(
+    db: AsyncSession, user_id: uuid.UUID, mutation: SyncMutation
+) -> dict:
+    data = _validate(StepCreate, mutation.data)
+    step = Step(id=mutation.id, **data.model_dump(), goal_id=mutation.goal_id)
+    db.add(step)
+    await db.flush()
+    track_change(db, user_id, SYNC_STEP, step.id)
+    return {"status": 201, "step": StepResponse.model_validate(step)}
+
+
+async def _update_step(
+    db: AsyncSession, user_id: uuid.UUID, mutation: SyncMutation
+) -> dict:
+    data = _validate(StepUpdate, mutation.data)
+    # apply_step_batch keeps the goal counter, completion log and rewards right
+    [result] = await step_service.apply_step_batch(db, user_id, mutation.goal_id, [
+        StepBatchOperation(op="update", step_id=mutation.id, **data.model_dump(exclude_unset=True))
+    ])
+    if result.status == 404:
+        raise _Rejected(404, "Step not found")
+    return {"status": 200, "step": result.step}
+
+
+async def _delete_step(
+    db: AsyncSession, user_id: uuid.UUID, mutation: SyncMutation
+) -> dict:
+    if not await step_service.delete_step(db, mutation.goal_id, mutation.id, user_id):
+        raise _Rejected(404, "Step not found")
+    return {"status": 204}
+
+
+async def _apply(
+    db: AsyncSession, user_id: uuid.UUID, is_premium: bool, mutation: SyncMutation
+) -> dict:
+    if mutation.entity == SYNC_GOAL:
+        if mutation.op == "create":
+            return await _create_goal(db, user_id, is_premium, mutation)
+        if mutation.op == "update":
+            return await _update_goal(db, user_id, mutation)
+        return await _delete_goal(db, user_id, mutation)
+    if mutation.op == "create":
+        return await _create_step(db, user_id, mutation)
+    if mutation.op == "update":
+        return await _update_step(db, user_id, mutation)
+    return await _delete_step(db, user_id, mutation)
+
+
+async def _existing_ids(db: AsyncSession, model, ids: List[uuid.UUID]) -> set:
+    if not ids:
+        return set()
+    return set((await db.scalars(select(model.id).where(model.id.in_(ids)))).all())
+
+
+async def apply_mutations(
+    db: AsyncSession, user_id: uuid.UUID, is_premium: bool, mutations: List[SyncMutation]
+) -> List[SyncMutationResult]:
+    """
+    Apply a client's queued offline mutations in order, in the caller's
+    transaction; each gets its own result and the rest still apply.
+
+    An update or delete conflicts (409, with the server's copy when the
+    entity still exists) if the entity was changed after the mutation's
+    base_cursor. Changes made earlier in the same push do not count. A create
+    conflicts if its id is already taken. Each mutation writes in a savepoint,
+    so one the database refuses (409 for a constraint, 422 for a value) is
+    rolled back without taking the rest of the push with it.
+    """
+    result = await db.execute(
+        select(SyncChange.entity_type, SyncChange.entity_id, SyncChange.seq).where(
+            SyncChange.user_id == user_id,
+            SyncChange.entity_id.in_({m.id for m in mutations}),
+        )
+    )
+    seqs: Dict[Tuple[str, uuid.UUID], int] = {
+        (entity_type, entity_id): seq for entity_type, entity_id, seq in result
+    }
+    taken = {
+        (SYNC_GOAL, goal_id) for goal_id in await _existing_ids(
+            db, Goal, [m.id for m in mutations if m.entity == SYNC_GOAL and m.op == "create"]
+        )
+    } | {
+        (SYNC_STEP, step_id) for step_id in await _existing_ids(
+            db, Step, [m.id for m in mutations if m.entity == SYNC_STEP and m.op == "create"]
+        )
+    }
+    owned_goals: Dict[uuid.UUID, bool] = {}
+
+    results: List[SyncMutationResult] = []
+    for index, mutation in enumerate(mutations):
+        key = (mutation.entity, mutation.id)
+        try:
+            if mutation.op == "create" and key in taken:
+                raise _Rejected(409, f"{mutation.entity.capitalize()} already exists")
+            if mutation.op != "create" and seqs.get(key, 0) > mutation.base_cursor:
+                raise _Rejected(409, f"{mutation.entity.capitalize()} changed on the server")
+            if mutation.entity == SYNC_STEP and mutation.goal_id not in owned_goals:
+                owned_goals[mutation.goal_id] = await step_service.goal_is_owned(
+                    db, mutation.goal_id, user_id
+                )
+            if mutation.entity == SYNC_STEP and not owned_goals[mutation.goal_id]:
+                raise _Rejected(404, "Goal not found")
+
+            # A mutation the database refuses rolls back alone
+            try:
+                async with change_savepoint(db):
+                    outcome = await _apply(db, user_id, is_premium, mutation)
+            except IntegrityError:
+                raise _Rejected(409, f"{mutation.entity.capitalize()} conflicts with the server's data")
+            except DataError:
+                raise _Rejected(422, f"{mutation.entity.capitalize()} has a value the server cannot store")
+        except _Rejected as exc:
+            outcome = {"status": exc.status, "detail": exc.detail}
+            if exc.status == 409:
+                outcome.update(await _server_copy(db, user_id, mutation))
+        else:
+            if mutation.op == "delete":
+                taken.discard(key)
+            else:
+                taken.add(key)
+            if mutation.entity == SYNC_GOAL:
+                owned_goals[mutation.id] = mutation.op != "delete"
+        results.append(SyncMutationResult(index=index, **outcome))
+        # Step writes move Goal.completed_steps with Core UPDATEs; drop the
+        # loaded objects so the next mutation reads the current rows
+        await db.flush()
+        db.expire_all()
+    return results
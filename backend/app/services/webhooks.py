@@ -0,0 +1,218 @@
+import hashlib
+import hmac
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import invalidate_principal
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.core.metrics import paddle_webhooks
+from app.models.user import User
+from app.models.webhook import WebhookEvent, WEBHOOK_PENDING, WEBHOOK_PROCESSED, WEBHOOK_DEAD
+from app.services.background import BatchProcessor
+from app.services.changes import record_user_change, user_data_changed
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "Paddle-Signature"
+
+Payload = Dict[str, Any]
+Handler = Callable[[AsyncSession, Payload], Awaitable[Optional[uuid.UUID]]]
+
+
+def sign_payload(body: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """Paddle-Signature header value for ``body`` ("ts=<unix>;h1=<hmac-sha256>")."""
+    ts = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(secret.encode(), f"{ts}:".encode() + body, hashlib.sha256).hexdigest()
+    return f"ts={ts};h1={digest}"
+
+
+def verify_signature(body: bytes, header: str, secret: str, tolerance: int) -> bool:
+    """
+    Check a Paddle-Signature header against the raw request body.
+
+    The HMAC covers the timestamp, so an old delivery cannot be replayed once
+    it is ``tolerance`` seconds old. Several h1 values are accepted while a
+    secret is being rotated.
+    """
+    timestamp, signatures = None, []
+    for part in header.split(";"):
+        key, _, value = part.strip().partition("=")
+        if key == "ts":
+            timestamp = value
+        elif key == "h1":
+            signatures.append(value)
+    if not timestamp or not timestamp.isdigit() or not signatures:
+        return False
+    if abs(time.time() - int(timestamp)) > tolerance:
+        return False
+    expected = sign_payload(body, secret, int(timestamp)).rpartition("h1=")[2]
+    return any(hmac.compare_digest(expected, signature) for signature in signatures)
+
+
+def webhook_event_id(payload: Payload) -> Optional[str]:
+    event_id = payload.get("event_id") or payload.get("alert_id")
+    return str(event_id) if event_id else None
+
+
+def webhook_event_type(payload: Payload) -> Optional[str]:
+    return payload.get("event_type") or payload.get("alert_name")
+
+
+async def store_webhook(db: AsyncSession, payload: Payload) -> bool:
+    """
+    Insert a webhook into the inbox; returns False for a redelivery of an
+    event that is already stored.
+    """
+    now = datetime.utcnow()
+    stmt = dialect_insert(db, WebhookEvent).values(
+        event_id=webhook_event_id(payload),
+        event_type=webhook_event_type(payload),
+        payload=payload,
+        status=WEBHOOK_PENDING,
+        attempts=0,
+        received_at=now,
+        next_attempt_at=now,
+    ).on_conflict_do_nothing(index_elements=[WebhookEvent.event_id])
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount == 1
+
+
+def _parse_uuid(value: Any) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+async def _subscription_created(db: AsyncSession, payload: Payload) -> Optional[uuid.UUID]:
+    user_id = _parse_uuid(payload.get("passthrough"))  # User ID passed during checkout
+    user = await db.get(User, user_id) if user_id else None
+    if user is None:
+        return None
+    user.is_premium = True
+    user.paddle_subscription_id = payload.get("subscription_id")
+    return user.id
+
+
+async def _subscription_cancelled(db: AsyncSession, payload: Payload) -> Optional[uuid.UUID]:
+    subscription_id = payload.get("subscription_id")
+    if not subscription_id:
+        return None
+    user = await db.scalar(
+        select(User).where(User.paddle_subscription_id == subscription_id)
+    )
+    if user is None:
+        return None
+    user.is_premium = False
+    user.paddle_subscription_id = None
+    return user.id
+
+
+# Event types without a handler are marked processed and otherwise ignored
+_HANDLERS: Dict[str, Handler] = {
+    "subscription_created": _subscription_created,
+    "subscription_cancelled": _subscription_cancelled,
+}
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff after the n-th failed attempt, jittered so a burst
+    of failures is not retried in lockstep."""
+    delay = min(
+        settings.WEBHOOK_RETRY_MAX_SECONDS,
+        settings.WEBHOOK_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+    )
+    return timedelta(seconds=random.uniform(delay / 2, delay))
+
+
+async def process_pending_webhooks(db: AsyncSession, batch_size: int = 100) -> int:
+    """
+    Apply one batch of due inbox rows and commit; returns the number handled.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED, so several processors can
+    drain the inbox concurrently. Each event runs in a savepoint: a failing
+    event is rescheduled (or dead-lettered after WEBHOOK_MAX_ATTEMPTS)
+    without undoing the rest of the batch.
+    """
+    now = datetime.utcnow()
+    events = list((await db.scalars(
+        select(WebhookEvent)
+        .where(WebhookEvent.status == WEBHOOK_PENDING, WebhookEvent.next_attempt_at <= now)
+        .order_by(WebhookEvent.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )).all())
+    if not events:
+        return 0
+
+    changed: List[uuid.UUID] = []
+    for event in events:
+        handler = _HANDLERS.get(event.event_type)
+        try:
+            async with db.begin_nested():
+                user_id = await handler(db, event.payload) if handler else None
+        except Exception as exc:
+            event.attempts += 1
+            event.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+            if event.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+                event.status = WEBHOOK_DEAD
+                paddle_webhooks.inc("dead")
+                logger.error(
+                    "Webhook %s (%s) dead-lettered after %d attempts: %s",
+                    event.event_id, event.event_type, event.attempts, event.last_error,
+                )
+            else:
+                event.next_attempt_at = now + retry_delay(event.attempts)
+                paddle_webhooks.inc("retried")
+                logger.warning(
+                    "Webhook %s (%s) failed, retrying at %s: %s",
+                    event.event_id, event.event_type, event.next_attempt_at, event.last_error,
+                )
+            continue
+        event.attempts += 1
+        event.status = WEBHOOK_PROCESSED
+        event.processed_at = now
+        event.last_error = None
+        paddle_webhooks.inc("processed")
+        if user_id is not None and user_id not in changed:
+            changed.append(user_id)
+    # The user's profile (GET /auth/me) changed
+    for user_id in changed:
+        await record_user_change(db, user_id)
+    await db.commit()
+
+    for user_id in changed:
+        invalidate_principal(user_id)
+        await user_data_changed(user_id, {"type": "account"})
+    return len(events)
+
+
+async def requeue_dead_webhooks(db: AsyncSession) -> int:
+    """Give dead-lettered events a fresh set of attempts; returns how many."""
+    result = await db.execute(
+        update(WebhookEvent)
+        .where(WebhookEvent.status == WEBHOOK_DEAD)
+        .values(status=WEBHOOK_PENDING, attempts=0, next_attempt_at=datetime.utcnow())
+    )
+    await db.commit()
+    return result.rowcount
+
+
+class WebhookProcessor(BatchProcessor):
+    """Background task applying the webhook inbox in the API process."""
+
+    async def process_batch(self, db: AsyncSession) -> int:
+        return await process_pending_webhooks(db, self.batch_size)
+
+
+webhook_processor = WebhookProcessor(
+    interval=settings.WEBHOOK_PROCESSOR_INTERVAL_SECONDS,
+    batch_size=settings.WEBHOOK_PROCESSOR_BATCH_SIZE,
+)
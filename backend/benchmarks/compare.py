@@ -0,0 +1,97 @@
+"""
+Diff two benchmarks.scenarios result files and gate regressions.
+
+    python -m benchmarks.compare results/baseline.json results/current.json \\
+        --max-latency-increase 10 --max-rps-drop 10
+
+Prints p50/p95/p99 and RPS per route with the relative change. Exits 1 when
+a route's p95 or p99 grew, or its RPS fell, by more than the allowed
+percentage, or when its error rate went up. Routes with fewer than
+--min-requests requests in either run are shown but never gate; their
+percentiles are too noisy.
+"""
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+
+def _change(before: float, after: float) -> Optional[float]:
+    if not before:
+        return None
+    return (after - before) / before * 100
+
+
+def _format(before: float, after: float) -> str:
+    change = _change(before, after)
+    suffix = f" ({change:+.0f}%)" if change is not None else ""
+    return f"{before}->{after}{suffix}"
+
+
+def _error_rate(stats: dict) -> float:
+    return stats["errors"] / stats["requests"] if stats["requests"] else 0.0
+
+
+def compare(baseline: dict, current: dict, max_latency_increase: float,
+            max_rps_drop: float, min_requests: int) -> List[str]:
+    """Print the comparison and return the regressions found."""
+    regressions = []
+    routes = sorted(set(baseline["routes"]) | set(current["routes"]))
+    print(f"{'route':50} {'p50 ms':>18} {'p95 ms':>18} {'p99 ms':>18} {'rps':>18}")
+    for route in routes + ["total"]:
+        before = baseline["total"] if route == "total" else baseline["routes"].get(route)
+        after = current["total"] if route == "total" else current["routes"].get(route)
+        if before is None or after is None:
+            print(f"{route:50} only in {'current' if before is None else 'baseline'} run")
+            continue
+        print(
+            f"{route:50} {_format(before['p50_ms'], after['p50_ms']):>18} "
+            f"{_format(before['p95_ms'], after['p95_ms']):>18} "
+            f"{_format(before['p99_ms'], after['p99_ms']):>18} "
+            f"{_format(before['rps'], after['rps']):>18}"
+        )
+        if min(before["requests"], after["requests"]) < min_requests:
+            continue
+
+        for metric in ("p95_ms", "p99_ms"):
+            change = _change(before[metric], after[metric])
+            if change is not None and change > max_latency_increase:
+                regressions.append(f"{route}: {metric} {_format(before[metric], after[metric])}")
+        change = _change(before["rps"], after["rps"])
+        if change is not None and -change > max_rps_drop:
+            regressions.append(f"{route}: rps {_format(before['rps'], after['rps'])}")
+        if _error_rate(after) > _error_rate(before):
+            regressions.append(
+                f"{route}: error rate {_error_rate(before):.2%} -> {_error_rate(after):.2%}"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--max-latency-increase", type=float, default=10.0,
+                        help="allowed p95/p99 growth, in percent")
+    parser.add_argument("--max-rps-drop", type=float, default=10.0, help="allowed RPS drop, in percent")
+    parser.add_argument("--min-requests", type=int, default=100)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    regressions = compare(
+        baseline, current, args.max_latency_increase, args.max_rps_drop, args.min_requests
+    )
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
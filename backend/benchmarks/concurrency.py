@@ -0,0 +1,100 @@
+"""
+Throughput under concurrency for a running Momentum API.
+
+Run it against a server started from each revision you want to compare:
+
+    RATE_LIMIT_ENABLED=false uvicorn main:app --workers 1 --port 8000
+    python -m benchmarks.concurrency --url http://localhost:8000 --concurrency 64
+
+Every worker registers its own user, creates a few goals with steps and then
+loops over the dashboard read (GET /goals) and a step toggle until the
+duration elapses. The script prints requests/second and latency percentiles.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+from benchmarks.stats import summarize
+
+
+async def _prepare_user(client: httpx.AsyncClient, goals: int, steps: int):
+    name = uuid.uuid4().hex[:12]
+    response = await client.post("/api/v1/auth/register", json={
+        "email": f"bench-{name}@example.com",
+        "username": f"bench-{name}",
+        "password": "benchmark-password",
+    })
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    toggles = []
+    for i in range(goals):
+        goal = await client.post("/api/v1/goals/", headers=headers, json={
+            "title": f"Goal {i}", "total_steps": steps,
+        })
+        goal.raise_for_status()
+        goal_id = goal.json()["id"]
+        for j in range(steps):
+            step = await client.post(
+                f"/api/v1/goals/{goal_id}/steps", headers=headers, json={"title": f"Step {j}"}
+            )
+            step.raise_for_status()
+            toggles.append(f"/api/v1/goals/{goal_id}/steps/{step.json()['id']}/toggle")
+    return headers, toggles
+
+
+async def _worker(client, headers, toggles, deadline, latencies, errors):
+    i = 0
+    while time.perf_counter() < deadline:
+        if i % 4 == 3:
+            request = client.patch(toggles[i % len(toggles)], headers=headers)
+        else:
+            request = client.get("/api/v1/goals/", headers=headers)
+        started = time.perf_counter()
+        try:
+            response = await request
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.HTTPError as exc:
+            errors.append(type(exc).__name__)
+        latencies.append(time.perf_counter() - started)
+        i += 1
+
+
+async def run(url: str, concurrency: int, duration: float, goals: int, steps: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        users = await asyncio.gather(
+            *(_prepare_user(client, goals, steps) for _ in range(concurrency))
+        )
+        latencies, errors = [], []
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            *(_worker(client, headers, toggles, deadline, latencies, errors)
+              for headers, toggles in users)
+        )
+        elapsed = time.perf_counter() - started
+
+    return {"concurrency": concurrency, **summarize(latencies, elapsed, len(errors))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--goals", type=int, default=5)
+    parser.add_argument("--steps", type=int, default=5)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.concurrency, args.duration, args.goals, args.steps))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
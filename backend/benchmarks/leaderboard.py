@@ -0,0 +1,77 @@
+"""
+Cost of leaderboard operations on the in-process backend as boards grow.
+
+    python -m benchmarks.leaderboard --users 10000 100000 1000000
+
+For each board size, users with random scores are loaded with replace (as a
+rebuild does) and then timed:
+
+    update   set_scores for one user, as the reward processor does
+    rank     "my rank" for a random user
+    top      the top 10
+
+Times are microseconds per operation, the mean of --ops operations. They
+should grow with log(users); the Redis backend (ZADD, ZSCORE + ZCOUNT,
+ZREVRANGE) has the same shape plus a round trip.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from app.services.leaderboard import LocalLeaderboardBackend
+
+
+async def measure(users: int, ops: int) -> dict:
+    backend = LocalLeaderboardBackend()
+    members = [str(uuid.uuid4()) for _ in range(users)]
+    scores = {member: random.randint(1, 100_000) for member in members}
+
+    started = time.perf_counter()
+    await backend.replace("points", scores)
+    result = {"users": users, "build_ms": (time.perf_counter() - started) * 1000}
+
+    sample = random.choices(members, k=ops)
+    started = time.perf_counter()
+    for member in sample:
+        await backend.set_scores("points", {member: scores[member] + random.randint(1, 50)})
+    result["update"] = (time.perf_counter() - started) / ops * 1e6
+
+    started = time.perf_counter()
+    for member in sample:
+        await backend.rank("points", member)
+    result["rank"] = (time.perf_counter() - started) / ops * 1e6
+
+    started = time.perf_counter()
+    for _ in range(ops):
+        await backend.top("points", 10)
+    result["top"] = (time.perf_counter() - started) / ops * 1e6
+    return result
+
+
+async def _main(options: argparse.Namespace) -> None:
+    results = [await measure(users, options.ops) for users in options.users]
+    if options.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'users':>10} {'build ms':>10} {'update':>8} {'rank':>8} {'top':>8}")
+    for row in results:
+        print(
+            f"{row['users']:>10} {row['build_ms']:>10.1f} "
+            f"{row['update']:>8.2f} {row['rank']:>8.2f} {row['top']:>8.2f}"
+        )
+    print("\n(microseconds per operation)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--ops", type=int, default=10_000, help="operations timed per size")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
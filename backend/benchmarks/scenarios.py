@@ -0,0 +1,272 @@
+"""
+Drive realistic user flows against the API and report latency per route.
+
+    python -m benchmarks.seed --users 1000
+    RATE_LIMIT_ENABLED=false uvicorn main:app --workers 4 --port 8000
+    python -m benchmarks.scenarios --url http://localhost:8000 --users 64 \\
+        --duration 60 --seeded-users 1000 --output results/baseline.json
+
+With --in-process the app is served through httpx's ASGI transport instead
+of a socket, which needs no server but shares one event loop with the
+clients; only compare in-process runs with each other. All virtual users
+come from one address, so the login rate limit is turned off for in-process
+runs and should be for the server under test.
+
+Every virtual user signs in (logging in as a random seeded user, or
+registering a new one with probability --register-ratio; new users create
+a few goals first) and then repeats sessions until the duration elapses:
+
+    dashboard  GET /goals/, GET /auth/me
+    progress   toggle 1-3 steps of one goal, GET /goals/{goal_id}
+    rewards    GET /rewards/, GET /rewards/activity
+
+logging in again every --relogin sessions. Think time between requests is
+exponentially distributed around --think-ms. Requests during the first
+--warmup seconds (connection pools, the password hashing processes and
+caches filling up) are not recorded. The summary (requests, errors,
+RPS and p50/p95/p99 per route and overall) is printed and, with --output,
+written as JSON for benchmarks.compare.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.stats import summarize
+
+API = "/api/v1"
+PASSWORD = "benchmark-password"
+
+
+class Recorder:
+    """Latencies and error counts keyed by route template."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+
+    async def request(
+        self, client: httpx.AsyncClient, method: str, route: str, url: str, **kwargs
+    ) -> Optional[httpx.Response]:
+        """Send a request, recording it under ``route``; None unless it succeeded."""
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, API + url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.latencies[route].append(time.perf_counter() - started)
+        if response is None or response.status_code >= 400:
+            self.errors[route] += 1
+            return None
+        return response
+
+    def reset(self) -> None:
+        self.latencies.clear()
+        self.errors.clear()
+
+    def report(self, elapsed: float) -> dict:
+        every = [latency for latencies in self.latencies.values() for latency in latencies]
+        return {
+            "total": summarize(every, elapsed, sum(self.errors.values())),
+            "routes": {
+                route: summarize(latencies, elapsed, self.errors[route])
+                for route, latencies in sorted(self.latencies.items())
+            },
+        }
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder,
+                 rng: random.Random, options: argparse.Namespace):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.options = options
+        self.email: Optional[str] = None
+        self.headers: Dict[str, str] = {}
+
+    async def _think(self) -> None:
+        if self.options.think_ms > 0:
+            await asyncio.sleep(self.rng.expovariate(1000 / self.options.think_ms))
+
+    async def _request(self, method: str, route: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        await self._think()
+        return await self.recorder.request(
+            self.client, method, route, url, headers=self.headers, **kwargs
+        )
+
+    async def register(self) -> bool:
+        name = f"bench-{uuid.uuid4().hex[:12]}"
+        self.email = f"{name}@example.com"
+        response = await self._request("POST", "POST /auth/register", "/auth/register", json={
+            "email": self.email, "username": name, "password": PASSWORD,
+        })
+        if response is None:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        for g in range(self.rng.randint(1, 4)):
+            goal = await self._request("POST", "POST /goals/", "/goals/", json={
+                "title": f"Goal {g}", "total_steps": 5,
+            })
+            if goal is None:
+                continue
+            for s in range(5):
+                await self._request(
+                    "POST", "POST /goals/{goal_id}/steps", f"/goals/{goal.json()['id']}/steps",
+                    json={"title": f"Step {s}"},
+                )
+        return True
+
+    async def login(self) -> bool:
+        response = await self._request("POST", "POST /auth/login", "/auth/login", json={
+            "email": self.email, "password": PASSWORD,
+        })
+        if response is None:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+
+    async def sign_in(self) -> bool:
+        seeded = self.options.seeded_users
+        if seeded and self.rng.random() >= self.options.register_ratio:
+            self.email = f"{self.options.prefix}-{self.rng.randrange(seeded)}@example.com"
+            return await self.login()
+        return await self.register()
+
+    async def session(self) -> None:
+        goals = await self._request("GET", "GET /goals/", "/goals/")
+        await self._request("GET", "GET /auth/me", "/auth/me")
+
+        candidates = [goal for goal in (goals.json() if goals else []) if goal["steps"]]
+        if candidates:
+            goal = self.rng.choice(candidates)
+            steps = goal["steps"]
+            for step in self.rng.sample(steps, min(len(steps), self.rng.randint(1, 3))):
+                await self._request(
+                    "PATCH", "PATCH /goals/{goal_id}/steps/{step_id}/toggle",
+                    f"/goals/{goal['id']}/steps/{step['id']}/toggle",
+                )
+            await self._request("GET", "GET /goals/{goal_id}", f"/goals/{goal['id']}")
+
+        await self._request("GET", "GET /rewards/", "/rewards/")
+        await self._request("GET", "GET /rewards/activity", "/rewards/activity")
+
+    async def run(self, deadline: float) -> None:
+        if not await self.sign_in():
+            return
+        sessions = 0
+        while time.perf_counter() < deadline:
+            if sessions and sessions % self.options.relogin == 0:
+                await self.login()
+            await self.session()
+            sessions += 1
+
+
+@asynccontextmanager
+async def _client(options: argparse.Namespace):
+    limits = httpx.Limits(max_connections=options.users, max_keepalive_connections=options.users)
+    if not options.in_process:
+        async with httpx.AsyncClient(base_url=options.url, limits=limits, timeout=30) as client:
+            yield client
+        return
+
+    from main import app
+    from app.core.config import settings
+    settings.RATE_LIMIT_ENABLED = False
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=30) as client:
+            yield client
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(options: argparse.Namespace) -> dict:
+    recorder = Recorder()
+    rng = random.Random(options.seed)
+    started_at = datetime.utcnow()
+    async with _client(options) as client:
+        users = [
+            VirtualUser(client, recorder, random.Random(rng.getrandbits(64)), options)
+            for _ in range(options.users)
+        ]
+        deadline = time.perf_counter() + options.warmup + options.duration
+        flows = asyncio.gather(*(user.run(deadline) for user in users))
+        await asyncio.sleep(options.warmup)
+        recorder.reset()
+        started = time.perf_counter()
+        await flows
+        elapsed = time.perf_counter() - started
+
+    return {
+        "meta": {
+            "target": "in-process" if options.in_process else options.url,
+            "users": options.users,
+            "duration_s": options.duration,
+            "warmup_s": options.warmup,
+            "elapsed_s": round(elapsed, 2),
+            "think_ms": options.think_ms,
+            "seeded_users": options.seeded_users,
+            "register_ratio": options.register_ratio,
+            "started_at": started_at.isoformat(),
+            "git_commit": _git_commit(),
+        },
+        **recorder.report(elapsed),
+    }
+
+
+def print_report(result: dict) -> None:
+    print(f"{'route':50} {'requests':>9} {'errors':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    rows = list(result["routes"].items()) + [("total", result["total"])]
+    for route, stats in rows:
+        print(
+            f"{route:50} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>8} "
+            f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="serve main:app over ASGI instead of --url")
+    parser.add_argument("--users", type=int, default=32, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unrecorded seconds before measuring")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between requests")
+    parser.add_argument("--seeded-users", type=int, default=0, help="users created by benchmarks.seed")
+    parser.add_argument("--prefix", default="seed", help="prefix passed to benchmarks.seed")
+    parser.add_argument("--register-ratio", type=float, default=0.1,
+                        help="share of virtual users that register instead of logging in")
+    parser.add_argument("--relogin", type=int, default=20, help="sessions between logins")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    options = parser.parse_args()
+
+    result = asyncio.run(run(options))
+    print_report(result)
+    if options.output:
+        os.makedirs(os.path.dirname(options.output) or ".", exist_ok=True)
+        with open(options.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nWrote {options.output}")
+
+
+if __name__ == "__main__":
+    main()
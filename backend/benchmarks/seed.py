@@ -0,0 +1,199 @@
+"""
+Generate a synthetic dataset for load tests.
+
+    alembic upgrade head
+    python -m benchmarks.seed --users 10000 --goals 8 --steps 12 --seed 1
+
+Creates users seed-0@example.com ... seed-{N-1}@example.com, all with the
+password "benchmark-password", so benchmarks.scenarios can log in as them.
+--goals and --steps are means: goals per user and steps per goal follow a
+long-tailed (log-normal) distribution, goals were created over the last
+--days days, and step completion ranges from untouched to finished goals.
+Reward counters, streaks, the completion log and the daily activity rollup
+are derived from the generated steps so every read endpoint has realistic
+data to return. Use --prefix to add another batch to an existing dataset.
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import insert
+
+from app.core.database import SessionLocal, engine
+from app.core.security import get_password_hash
+from app.models import (
+    User, Goal, Step, UserReward, StepCompletion, UserActivityDay, UserDataVersion,
+)
+from app.services.activity import streak_runs
+from app.services.rewards import GOAL_POINTS, STEP_POINTS
+
+PASSWORD = "benchmark-password"
+EMOJIS = ["🎯", "📚", "🏃", "💪", "🎨", "🧘", "💼", "🌱", None]
+
+
+def _long_tail(rng: random.Random, mean: float, sigma: float = 0.6, cap: int = 100) -> int:
+    """Log-normal count with the given mean: most near it, a few far above."""
+    mu = math.log(max(mean, 1)) - sigma ** 2 / 2
+    return max(1, min(cap, round(rng.lognormvariate(mu, sigma))))
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _completion_ratio(rng: random.Random) -> float:
+    # A fifth of goals are finished and a fifth not started; the rest in between
+    roll = rng.random()
+    if roll < 0.2:
+        return 1.0
+    if roll < 0.4:
+        return 0.0
+    return rng.betavariate(2, 2)
+
+
+def generate_user(rng: random.Random, index: int, prefix: str, hashed_password: str,
+                  goals: float, steps: float, days: int, now: datetime) -> Dict[str, List[dict]]:
+    """All rows of one user, keyed by table."""
+    user_id = _uuid(rng)
+    joined = now - timedelta(days=days, seconds=rng.randrange(86400))
+    rows: Dict[str, List[dict]] = {
+        "users": [{
+            "id": user_id,
+            "email": f"{prefix}-{index}@example.com",
+            "username": f"{prefix}-{index}",
+            "hashed_password": hashed_password,
+            "is_premium": rng.random() < 0.1,
+            "created_at": joined,
+            "updated_at": joined,
+        }],
+        "goals": [], "steps": [], "completions": [],
+    }
+
+    steps_completed = goals_completed = 0
+    for g in range(_long_tail(rng, goals)):
+        goal_id = _uuid(rng)
+        created = joined + timedelta(seconds=rng.randrange(max(1, int((now - joined).total_seconds()))))
+        total = _long_tail(rng, steps, cap=50)
+        done = round(total * _completion_ratio(rng))
+        rows["goals"].append({
+            "id": goal_id,
+            "user_id": user_id,
+            "title": f"Goal {g}",
+            "description": "Synthetic goal" if rng.random() < 0.5 else None,
+            "total_steps": total,
+            "completed_steps": done,
+            "emoji": rng.choice(EMOJIS),
+            "created_at": created,
+            "updated_at": created,
+        })
+        span = max(1, int((now - created).total_seconds()))
+        for s in range(total):
+            completed_at = created + timedelta(seconds=rng.randrange(span)) if s < done else None
+            step_id = _uuid(rng)
+            rows["steps"].append({
+                "id": step_id,
+                "goal_id": goal_id,
+                "title": f"Step {s}",
+                "is_completed": completed_at is not None,
+                "completed_at": completed_at,
+                "created_at": created,
+                "updated_at": completed_at or created,
+            })
+            if completed_at is not None:
+                rows["completions"].append({
+                    "user_id": user_id, "goal_id": goal_id, "step_id": step_id,
+                    "completed": True, "completed_at": completed_at,
+                })
+        steps_completed += done
+        goals_completed += done == total
+
+    per_day = Counter(row["completed_at"].date() for row in rows["completions"])
+    last_day, current, longest = streak_runs(sorted(per_day))
+    rows["activity"] = [
+        {"user_id": user_id, "day": day, "completions": count} for day, count in per_day.items()
+    ]
+    rows["rewards"] = [{
+        "user_id": user_id,
+        "total_points": steps_completed * STEP_POINTS + goals_completed * GOAL_POINTS,
+        "current_streak": current,
+        "longest_streak": longest,
+        "last_activity_date": last_day,
+        "steps_completed": steps_completed,
+        "goals_completed": goals_completed,
+        "created_at": joined,
+        "updated_at": now,
+    }]
+    rows["versions"] = [{"user_id": user_id, "version": 1}]
+    return rows
+
+
+# Parents before children
+_TABLES = [
+    ("users", User), ("goals", Goal), ("steps", Step), ("rewards", UserReward),
+    ("completions", StepCompletion), ("activity", UserActivityDay), ("versions", UserDataVersion),
+]
+
+
+async def seed(users: int, goals: float, steps: float, days: int, prefix: str,
+               batch_size: int, seed_value: int) -> Counter:
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    # bcrypt is deliberately slow; every seeded user shares one hash
+    hashed_password = get_password_hash(PASSWORD)
+    totals: Counter = Counter()
+
+    for start in range(0, users, batch_size):
+        batch: Dict[str, List[dict]] = {name: [] for name, _ in _TABLES}
+        for index in range(start, min(users, start + batch_size)):
+            for name, rows in generate_user(
+                rng, index, prefix, hashed_password, goals, steps, days, now
+            ).items():
+                batch[name].extend(rows)
+
+        async with SessionLocal() as db:
+            for name, model in _TABLES:
+                if batch[name]:
+                    await db.execute(insert(model), batch[name])
+                totals[name] += len(batch[name])
+            await db.commit()
+        print(f"  {min(users, start + batch_size)}/{users} users", flush=True)
+    return totals
+
+
+async def _main(args) -> Counter:
+    try:
+        return await seed(
+            args.users, args.goals, args.steps, args.days, args.prefix,
+            args.batch_size, args.seed,
+        )
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--goals", type=float, default=8, help="mean goals per user")
+    parser.add_argument("--steps", type=float, default=10, help="mean steps per goal")
+    parser.add_argument("--days", type=int, default=180, help="how far back goals were created")
+    parser.add_argument("--prefix", default="seed", help="email/username prefix")
+    parser.add_argument("--batch-size", type=int, default=200, help="users per transaction")
+    parser.add_argument("--seed", type=int, default=0, help="random seed, for reproducible data")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    totals = asyncio.run(_main(args))
+    print(
+        f"Seeded {', '.join(f'{count} {name}' for name, count in totals.items())} "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Cost of serializing the goal list, per goal, for each response path.
+
+    python -m benchmarks.serialization --goals 50 --steps 0 10 50
+
+Goals with steps are built in memory (no database) and rendered by:
+
+    response_model+json    FastAPI's response_model handling (validate, dump
+                           to Python, jsonable output) and the stdlib JSONResponse
+    response_model+orjson  the same with ORJSONResponse
+    pydantic               one TypeAdapter validate (from attributes) and
+                           dump_json, the previous cached-endpoint path
+    dump_json              app.core.serialization.dump_json, which the
+                           endpoints now return directly
+
+followed by the cost of compressing the dump_json output with gzip and brotli
+the way CompressionMiddleware does. Times are microseconds per goal, the best
+of --repeat runs.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import TypeAdapter
+
+from app.core.compression import _BROTLI_QUALITY, _GZIP_LEVEL, brotli
+from app.core.serialization import dump_json
+from app.models import Goal, Step
+from app.schemas.goal import GoalResponse
+
+
+def build_goals(goals: int, steps: int) -> List[Goal]:
+    now = datetime.utcnow()
+    user_id = uuid.uuid4()
+    result = []
+    for g in range(goals):
+        goal_id = uuid.uuid4()
+        result.append(Goal(
+            id=goal_id, user_id=user_id, title=f"Goal {g}", description="A synthetic goal",
+            total_steps=steps, completed_steps=steps // 2, emoji="🎯", image_url=None,
+            created_at=now, updated_at=now,
+            steps=[
+                Step(
+                    id=uuid.uuid4(), goal_id=goal_id, title=f"Step {s}", description=None,
+                    is_completed=s < steps // 2, completed_at=now if s < steps // 2 else None,
+                    created_at=now, updated_at=now,
+                )
+                for s in range(steps)
+            ],
+        ))
+    return result
+
+
+def _best(run: Callable[[], object], repeat: int, number: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            run()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def measure(goals: int, steps: int, repeat: int, number: int) -> dict:
+    objects = build_goals(goals, steps)
+    field = create_response_field(
+        name="Response_get_goals", type_=List[GoalResponse], mode="serialization"
+    )
+    loop = asyncio.new_event_loop()
+
+    def response_model(response_class):
+        def run():
+            content = loop.run_until_complete(serialize_response(field=field, response_content=objects))
+            return response_class(content).body
+        return run
+
+    adapter = TypeAdapter(List[GoalResponse])
+    payload = dump_json(List[GoalResponse], objects)
+    paths = {
+        "response_model+json": response_model(JSONResponse),
+        "response_model+orjson": response_model(ORJSONResponse),
+        "pydantic": lambda: adapter.dump_json(adapter.validate_python(objects, from_attributes=True)),
+        "dump_json": lambda: dump_json(List[GoalResponse], objects),
+        "gzip": lambda: gzip.compress(payload, compresslevel=_GZIP_LEVEL),
+    }
+    if brotli is not None:
+        paths["brotli"] = lambda: brotli.compress(payload, quality=_BROTLI_QUALITY)
+
+    try:
+        timings = {
+            name: round(_best(run, repeat, number) / goals * 1e6, 2) for name, run in paths.items()
+        }
+    finally:
+        loop.close()
+    return {"goals": goals, "steps_per_goal": steps, "bytes": len(payload), "us_per_goal": timings}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--goals", type=int, default=50)
+    parser.add_argument("--steps", type=int, nargs="+", default=[0, 10, 50], help="steps per goal")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20, help="renders per timing run")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+
+    results = [measure(args.goals, steps, args.repeat, args.number) for steps in args.steps]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    names = list(results[0]["us_per_goal"])
+    print(f"{'steps/goal':>10} {'bytes':>9} " + " ".join(f"{name:>22}" for name in names))
+    for result in results:
+        print(
+            f"{result['steps_per_goal']:>10} {result['bytes']:>9} "
+            + " ".join(f"{result['us_per_goal'][name]:>22}" for name in names)
+        )
+    print("\n(microseconds per goal)")
+
+
+if __name__ == "__main__":
+    main()
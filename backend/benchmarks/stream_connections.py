@@ -0,0 +1,113 @@
+"""
+Cost of open change streams (GET /stream) in one worker.
+
+    python -m benchmarks.stream_connections --connections 1000 10000
+
+For each count, that many idle streams are opened in-process (the endpoint's
+event generator, consumed the way StreamingResponse does) for distinct
+users, and then measured:
+
+    open s       time to open them all and deliver their ready event
+    KiB/conn     Python memory held per idle stream (tracemalloc)
+    p50/p99 ms   publish-to-receive latency of --events events to random users
+    fanout ms    time to publish one event to every user and have all arrive
+
+This leaves out the socket and the server's per-connection state (uvicorn
+adds a few KiB per connection), and events are delivered in-process as
+without REDIS_URL; with Redis add one round trip to the latencies.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+
+import orjson
+
+from app.api.deps import Principal
+from app.api.v1.endpoints.stream import _events
+from app.core.pubsub import pubsub
+
+
+async def _consume(principal: Principal, ready: asyncio.Event, received: list, opened: list) -> None:
+    async for chunk in _events(principal):
+        if not chunk.startswith(b"data: "):
+            continue
+        event = orjson.loads(chunk[6:])
+        if event["type"] == "ready":
+            opened.append(1)
+            if len(opened) == received[0]:
+                ready.set()
+        else:
+            received[1].append(time.perf_counter() - event["sent"])
+
+
+async def _wait_for(received: list, count: int) -> None:
+    while len(received[1]) < count:
+        await asyncio.sleep(0.001)
+
+
+async def measure(connections: int, events: int) -> dict:
+    principals = [Principal(id=uuid.uuid4(), username="bench", is_premium=False) for _ in range(connections)]
+    ready = asyncio.Event()
+    # [connections expected, latencies]
+    received: list = [connections, []]
+    opened: list = []
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(_consume(p, ready, received, opened)) for p in principals]
+    await ready.wait()
+    result = {"connections": connections, "open_s": time.perf_counter() - started}
+    result["kib_per_conn"] = (tracemalloc.get_traced_memory()[0] - baseline) / connections / 1024
+    tracemalloc.stop()
+
+    for principal in random.choices(principals, k=events):
+        await pubsub.publish(principal.id, {"type": "data", "sent": time.perf_counter()})
+        # One at a time, so each latency is that of a lone event
+        await _wait_for(received, len(received[1]) + 1)
+    latencies = sorted(received[1])
+    result["p50_ms"] = statistics.median(latencies) * 1000
+    result["p99_ms"] = latencies[int(len(latencies) * 0.99) - 1] * 1000
+
+    received[1] = []
+    started = time.perf_counter()
+    for principal in principals:
+        await pubsub.publish(principal.id, {"type": "data", "sent": time.perf_counter()})
+    await _wait_for(received, connections)
+    result["fanout_ms"] = (time.perf_counter() - started) * 1000
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert pubsub.connections() == 0
+    return result
+
+
+async def _main(options: argparse.Namespace) -> None:
+    results = [await measure(count, options.events) for count in options.connections]
+    if options.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'connections':>11} {'open s':>8} {'KiB/conn':>9} {'p50 ms':>8} {'p99 ms':>8} {'fanout ms':>10}")
+    for row in results:
+        print(
+            f"{row['connections']:>11} {row['open_s']:>8.2f} {row['kib_per_conn']:>9.2f} "
+            f"{row['p50_ms']:>8.3f} {row['p99_ms']:>8.3f} {row['fanout_ms']:>10.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--events", type=int, default=1_000, help="single events timed per count")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Replay signed Paddle webhooks against a local API.
+
+    python -m benchmarks.webhook_replay events/*.json --repeat 3
+    python -m benchmarks.webhook_replay --sample created --user-id <uuid> \\
+        --subscription-id sub_123 --in-process --drain
+
+Events come from JSON files (an object or a list of objects, as Paddle sends
+them) or from --sample, which builds a subscription_created or
+subscription_cancelled event. Each event is signed with --secret (default
+PADDLE_WEBHOOK_SECRET) the way Paddle signs it and delivered --repeat times,
+concurrently, like Paddle retrying a delivery it thinks failed. Only the
+first delivery should be stored; the rest are acknowledged as duplicates.
+
+--stale signs with a timestamp outside PADDLE_WEBHOOK_TOLERANCE_SECONDS and
+--bad-signature with the wrong secret; both should be rejected with 401.
+With --in-process the app is served through httpx's ASGI transport, and
+--drain then applies the inbox before printing its state.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import List
+
+import httpx
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.webhook import WebhookEvent
+from app.services.webhooks import SIGNATURE_HEADER, sign_payload, webhook_processor
+
+WEBHOOK_PATH = "/api/v1/payments/webhook"
+
+
+def sample_event(kind: str, user_id: str, subscription_id: str) -> dict:
+    alert_name = {"created": "subscription_created", "cancelled": "subscription_cancelled"}[kind]
+    return {
+        "alert_id": str(uuid.uuid4().int)[:10],
+        "alert_name": alert_name,
+        "passthrough": user_id,
+        "subscription_id": subscription_id,
+    }
+
+
+def load_events(paths: List[str]) -> List[dict]:
+    events = []
+    for path in paths:
+        data = json.loads(Path(path).read_text())
+        events.extend(data if isinstance(data, list) else [data])
+    return events
+
+
+async def deliver(client: httpx.AsyncClient, event: dict, options: argparse.Namespace) -> List[int]:
+    body = json.dumps(event).encode()
+    timestamp = int(time.time())
+    if options.stale:
+        timestamp -= settings.PADDLE_WEBHOOK_TOLERANCE_SECONDS + 60
+    secret = options.secret + "-wrong" if options.bad_signature else options.secret
+    headers = {
+        "Content-Type": "application/json",
+        SIGNATURE_HEADER: sign_payload(body, secret, timestamp),
+    }
+    responses = await asyncio.gather(*(
+        client.post(WEBHOOK_PATH, content=body, headers=headers) for _ in range(options.repeat)
+    ))
+    return [response.status_code for response in responses]
+
+
+async def replay(client: httpx.AsyncClient, events: List[dict], options: argparse.Namespace) -> Counter:
+    statuses: Counter = Counter()
+    for event in events:
+        codes = await deliver(client, event, options)
+        statuses.update(codes)
+        print(f"{event.get('event_id') or event.get('alert_id')}: {codes}")
+    return statuses
+
+
+async def inbox_state() -> dict:
+    async with SessionLocal() as db:
+        rows = await db.execute(
+            select(WebhookEvent.status, func.count()).group_by(WebhookEvent.status)
+        )
+        return dict(rows.all())
+
+
+async def _main(options: argparse.Namespace) -> None:
+    events = load_events(options.files)
+    if options.sample:
+        events.append(sample_event(options.sample, options.user_id, options.subscription_id))
+    if not events:
+        raise SystemExit("Nothing to replay: pass JSON files or --sample")
+
+    if not options.in_process:
+        async with httpx.AsyncClient(base_url=options.url, timeout=30) as client:
+            statuses = await replay(client, events, options)
+        print(f"status codes: {dict(statuses)}")
+        return
+
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=30) as client:
+            statuses = await replay(client, events, options)
+        if options.drain:
+            await webhook_processor.drain()
+        print(f"status codes: {dict(statuses)}")
+        print(f"inbox: {await inbox_state()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="JSON files with one event or a list of events")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--secret", default=settings.PADDLE_WEBHOOK_SECRET)
+    parser.add_argument("--repeat", type=int, default=1, help="deliveries per event")
+    parser.add_argument("--sample", choices=["created", "cancelled"])
+    parser.add_argument("--user-id", default="", help="passthrough of a --sample event")
+    parser.add_argument("--subscription-id", default="sub_replay")
+    parser.add_argument("--stale", action="store_true", help="sign with an expired timestamp")
+    parser.add_argument("--bad-signature", action="store_true", help="sign with the wrong secret")
+    parser.add_argument("--in-process", action="store_true")
+    parser.add_argument("--drain", action="store_true", help="with --in-process, apply the inbox afterwards")
+    options = parser.parse_args()
+    if not options.secret:
+        parser.error("--secret or PADDLE_WEBHOOK_SECRET is required")
+    asyncio.run(_main(options))
+
+
+if __name__ == "__main__":
+    main()
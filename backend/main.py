@@ -1,25 +1,53 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.core.database import engine
-from app.models import Base
+from app.core.database import engine, SessionLocal
+from app.core.instrumentation import InstrumentationMiddleware
+from app.core.metrics import db_pool_timeouts
+from app.core.pubsub import pubsub
+from app.core.redis import close_redis
+from app.core.security import shutdown_hash_pool
+from app.services.badge_rules import ensure_badges
+from app.services.leaderboard import leaderboard_rebuilder
+from app.services.rewards import reward_processor
+from app.services.webhooks import webhook_processor
 from app.api.v1.api import api_router
+from app.api import metrics
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create tables
-    Base.metadata.create_all(bind=engine)
+    # The schema is managed by Alembic (alembic upgrade head)
+    async with SessionLocal() as db:
+        await ensure_badges(db)
+    if settings.REWARD_PROCESSOR_ENABLED:
+        reward_processor.start()
+    if settings.WEBHOOK_PROCESSOR_ENABLED:
+        webhook_processor.start()
+    if settings.LEADERBOARD_REBUILD_ENABLED:
+        leaderboard_rebuilder.start()
+        leaderboard_rebuilder.notify()
     yield
+    await leaderboard_rebuilder.stop()
+    await webhook_processor.stop()
+    await reward_processor.stop()
+    await pubsub.close()
+    shutdown_hash_pool()
+    await close_redis()
+    await engine.dispose()
 
 
 app = FastAPI(
     title="Momentum API",
     description="Goal tracking API with rewards and payments",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS
@@ -29,10 +57,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the browser read the goal list's next-page cursor
+    expose_headers=["X-Next-Cursor"],
 )
 
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+# Outermost, so its timings cover the whole stack
+app.add_middleware(InstrumentationMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
+
+
+@app.exception_handler(PoolTimeoutError)
+async def database_pool_timeout(request: Request, exc: PoolTimeoutError):
+    # No connection was returned to the pool within its timeout
+    db_pool_timeouts.inc()
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The database is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.get("/")
@@ -0,0 +1,103 @@
+"""baseline schema
+
+The schema as Base.metadata.create_all used to build it on startup. A
+database created that way already has these tables, so they are left alone
+and the database is adopted at this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('goals'):
+        return
+    op.create_table('badges',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=False),
+    sa.Column('icon', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('users',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('is_premium', sa.Boolean(), nullable=True),
+    sa.Column('paddle_subscription_id', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    op.create_table('goals',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('total_steps', sa.Integer(), nullable=False),
+    sa.Column('completed_steps', sa.Integer(), nullable=True),
+    sa.Column('emoji', sa.String(), nullable=True),
+    sa.Column('image_url', sa.String(), nullable=True),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table('user_rewards',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('total_points', sa.Integer(), nullable=True),
+    sa.Column('current_streak', sa.Integer(), nullable=True),
+    sa.Column('longest_streak', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('steps',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('is_completed', sa.Boolean(), nullable=True),
+    sa.Column('goal_id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['goal_id'], ['goals.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table('user_badges',
+    sa.Column('user_id', sa.Uuid(), nullable=True),
+    sa.Column('badge_id', sa.Uuid(), nullable=True),
+    sa.ForeignKeyConstraint(['badge_id'], ['badges.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user_rewards.user_id'], )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_badges')
+
+    op.drop_table('steps')
+    op.drop_table('user_rewards')
+
+    op.drop_table('goals')
+    op.drop_index('ix_users_username', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+
+    op.drop_table('users')
+    op.drop_table('badges')
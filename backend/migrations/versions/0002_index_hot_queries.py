@@ -0,0 +1,32 @@
+"""index hot queries
+
+goals are listed per user newest first, steps are loaded per goal, the
+completed_steps recount only reads completed steps and Paddle webhooks look
+users up by subscription id.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_goals_user_id_created_at', 'goals', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_steps_goal_id', 'steps', ['goal_id'], unique=False)
+    op.create_index('ix_steps_goal_id_completed', 'steps', ['goal_id'], unique=False, postgresql_where=sa.text('is_completed'), sqlite_where=sa.text('is_completed'))
+    op.create_index('ix_users_paddle_subscription_id', 'users', ['paddle_subscription_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_paddle_subscription_id', table_name='users')
+    op.drop_index('ix_steps_goal_id_completed', table_name='steps')
+    op.drop_index('ix_steps_goal_id', table_name='steps')
+    op.drop_index('ix_goals_user_id_created_at', table_name='goals')
@@ -0,0 +1,37 @@
+"""index goal list sorts
+
+The goal list is paged by (sort key, id) for each sort it offers:
+created_at, updated_at and progress. Progress is the expression in
+app.models.goal.PROGRESS_SQL, indexed verbatim.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+PROGRESS_SQL = (
+    "(CASE WHEN total_steps = 0 THEN 0 "
+    "ELSE COALESCE(completed_steps, 0) * 100 / total_steps END)"
+)
+
+
+def upgrade() -> None:
+    op.drop_index('ix_goals_user_id_created_at', table_name='goals')
+    op.create_index('ix_goals_user_id_created_at', 'goals', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_goals_user_id_updated_at', 'goals', ['user_id', 'updated_at', 'id'], unique=False)
+    op.create_index('ix_goals_user_id_progress', 'goals', ['user_id', sa.text(PROGRESS_SQL), 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_goals_user_id_progress', table_name='goals')
+    op.drop_index('ix_goals_user_id_updated_at', table_name='goals')
+    op.drop_index('ix_goals_user_id_created_at', table_name='goals')
+    op.create_index('ix_goals_user_id_created_at', 'goals', ['user_id', 'created_at'], unique=False)
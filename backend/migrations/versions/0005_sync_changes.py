@@ -0,0 +1,35 @@
+"""sync changes
+
+One row per goal or step a user has changed, stamped with the user's data
+version; GET /sync reads the rows after a client's cursor.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('sync_changes',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('entity_type', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Uuid(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('deleted', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'entity_type', 'entity_id')
+    )
+    op.create_index('ix_sync_changes_user_id_seq', 'sync_changes', ['user_id', 'seq'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sync_changes_user_id_seq', table_name='sync_changes')
+    op.drop_table('sync_changes')
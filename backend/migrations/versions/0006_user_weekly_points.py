@@ -0,0 +1,33 @@
+"""user weekly points
+
+Points per user and week, maintained by the reward processor alongside
+user_rewards; the weekly leaderboard is rebuilt from one week's rows.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_weekly_points',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('week_start', sa.Date(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'week_start')
+    )
+    op.create_index('ix_user_weekly_points_week_start', 'user_weekly_points', ['week_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_weekly_points_week_start', table_name='user_weekly_points')
+    op.drop_table('user_weekly_points')
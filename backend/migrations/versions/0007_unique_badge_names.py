@@ -0,0 +1,40 @@
+"""unique badge names
+
+Every worker seeds the badge catalog at startup, and without a unique name
+workers starting together could insert the same badge twice. Duplicates are
+merged into the oldest badge of each name before the index is created.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    kept = {}
+    for badge_id, name in conn.execute(sa.text("SELECT id, name FROM badges ORDER BY created_at, id")):
+        if name not in kept:
+            kept[name] = badge_id
+            continue
+        params = {"duplicate": badge_id, "kept": kept[name]}
+        # Holders of only the duplicate keep the badge under the kept id
+        conn.execute(sa.text(
+            "UPDATE user_badges SET badge_id = :kept WHERE badge_id = :duplicate "
+            "AND user_id NOT IN (SELECT user_id FROM user_badges WHERE badge_id = :kept)"
+        ), params)
+        conn.execute(sa.text("DELETE FROM user_badges WHERE badge_id = :duplicate"), params)
+        conn.execute(sa.text("DELETE FROM badges WHERE id = :duplicate"), params)
+    op.create_index('ux_badges_name', 'badges', ['name'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ux_badges_name', table_name='badges')
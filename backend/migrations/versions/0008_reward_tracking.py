@@ -0,0 +1,122 @@
+"""reward tracking
+
+The tables and columns the reward processor, activity log and change feed
+added to the baseline schema: reward_events, step_completions,
+user_activity_days, user_data_versions, steps.completed_at, the
+user_rewards counters and user_badges.earned_at with a (user_id, badge_id)
+primary key.
+
+Completed steps get their last update time as completed_at, and badges their
+user's last reward update as earned_at. The counters start at 0; run
+`python -m app.jobs.backfill_badges` to recompute them from existing goals.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 00:00:00
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('reward_events',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_reward_events_pending', 'reward_events', ['occurred_at'], unique=False, postgresql_where=sa.text('processed_at IS NULL'), sqlite_where=sa.text('processed_at IS NULL'))
+
+    op.create_table('step_completions',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('goal_id', sa.Uuid(), nullable=False),
+    sa.Column('step_id', sa.Uuid(), nullable=False),
+    sa.Column('completed', sa.Boolean(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_step_completions_user_completed_at', 'step_completions', ['user_id', 'completed_at'], unique=False)
+
+    op.create_table('user_activity_days',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('completions', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    op.create_table('user_data_versions',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    op.add_column('steps', sa.Column('completed_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE steps SET completed_at = updated_at WHERE is_completed")
+
+    op.add_column('user_rewards', sa.Column('last_activity_date', sa.Date(), nullable=True))
+    with op.batch_alter_table('user_rewards') as batch_op:
+        batch_op.add_column(sa.Column('steps_completed', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('goals_completed', sa.Integer(), nullable=False, server_default='0'))
+    with op.batch_alter_table('user_rewards') as batch_op:
+        batch_op.alter_column('steps_completed', server_default=None)
+        batch_op.alter_column('goals_completed', server_default=None)
+
+    conn = op.get_bind()
+    # The association table had no key, so a badge could be linked twice
+    conn.execute(sa.text("DELETE FROM user_badges WHERE user_id IS NULL OR badge_id IS NULL"))
+    duplicates = conn.execute(sa.text(
+        "SELECT user_id, badge_id FROM user_badges GROUP BY user_id, badge_id HAVING COUNT(*) > 1"
+    )).all()
+    for user_id, badge_id in duplicates:
+        params = {"user_id": user_id, "badge_id": badge_id}
+        conn.execute(sa.text("DELETE FROM user_badges WHERE user_id = :user_id AND badge_id = :badge_id"), params)
+        conn.execute(sa.text("INSERT INTO user_badges (user_id, badge_id) VALUES (:user_id, :badge_id)"), params)
+
+    op.add_column('user_badges', sa.Column('earned_at', sa.DateTime(), nullable=True))
+    conn.execute(sa.text(
+        "UPDATE user_badges SET earned_at = COALESCE("
+        "(SELECT updated_at FROM user_rewards WHERE user_rewards.user_id = user_badges.user_id), :now)"
+    ), {"now": datetime.utcnow()})
+    with op.batch_alter_table('user_badges') as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.Uuid(), nullable=False)
+        batch_op.alter_column('badge_id', existing_type=sa.Uuid(), nullable=False)
+        batch_op.alter_column('earned_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_primary_key('user_badges_pkey', ['user_id', 'badge_id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user_badges') as batch_op:
+        batch_op.drop_constraint('user_badges_pkey', type_='primary')
+        batch_op.alter_column('user_id', existing_type=sa.Uuid(), nullable=True)
+        batch_op.alter_column('badge_id', existing_type=sa.Uuid(), nullable=True)
+        batch_op.drop_column('earned_at')
+
+    with op.batch_alter_table('user_rewards') as batch_op:
+        batch_op.drop_column('goals_completed')
+        batch_op.drop_column('steps_completed')
+        batch_op.drop_column('last_activity_date')
+    with op.batch_alter_table('steps') as batch_op:
+        batch_op.drop_column('completed_at')
+
+    op.drop_table('user_data_versions')
+    op.drop_table('user_activity_days')
+    op.drop_index('ix_step_completions_user_completed_at', table_name='step_completions')
+    op.drop_table('step_completions')
+    op.drop_index('ix_reward_events_pending', table_name='reward_events')
+    op.drop_table('reward_events')
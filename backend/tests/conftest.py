@@ -0,0 +1,70 @@
+"""
+Tests run against a throwaway SQLite database migrated to head, through the
+ASGI app in process (no lifespan, so no background processors):
+
+    pip install -r requirements-dev.txt
+    pytest
+"""
+import os
+import tempfile
+import uuid
+
+_db_dir = tempfile.mkdtemp(prefix="momentum-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ.pop("READ_DATABASE_URL", None)
+os.environ.pop("REDIS_URL", None)
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import fakeredis.aioredis
+import httpx
+import pytest
+from alembic import command
+from alembic.config import Config
+
+from app.core.database import SessionLocal, engine
+from app.core.security import create_access_token
+from app.models.user import User
+from main import app
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    command.upgrade(Config(os.path.join(os.path.dirname(__file__), "..", "alembic.ini")), "head")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+    # aiosqlite connections belong to the test's event loop
+    await engine.dispose()
+
+
+@pytest.fixture
+async def redis(monkeypatch):
+    """An in-memory Redis that get_redis() returns, as with REDIS_URL set."""
+    client = fakeredis.aioredis.FakeRedis()
+    await client.flushall()
+    monkeypatch.setattr("app.core.redis._client", client)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def user() -> User:
+    name = uuid.uuid4().hex[:12]
+    async with SessionLocal() as db:
+        user = User(email=f"{name}@example.com", username=name, hashed_password="-", is_premium=True)
+        db.add(user)
+        await db.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
@@ -0,0 +1,79 @@
+import uuid
+
+import pytest
+
+from app.api import deps
+from app.api.deps import invalidate_principal
+from app.core.database import SessionLocal
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_register_rejects_taken_email_and_username(client):
+    data = {"email": "taken@example.com", "username": "taken", "password": "pw"}
+    assert (await client.post("/api/v1/auth/register", json=data)).status_code == 200
+
+    response = await client.post("/api/v1/auth/register", json={**data, "username": "other"})
+    assert response.status_code == 400 and response.json()["detail"] == "Email already registered"
+    response = await client.post("/api/v1/auth/register", json={**data, "email": "other@example.com"})
+    assert response.status_code == 400 and response.json()["detail"] == "Username already taken"
+
+
+async def test_register_race_is_a_400(client, monkeypatch):
+    data = {"email": "race@example.com", "username": "race", "password": "pw"}
+
+    async def hash_while_another_request_registers(password: str) -> str:
+        # The other registration commits while this one hashes, after its check
+        async with SessionLocal() as db:
+            db.add(User(email=data["email"], username="racer", hashed_password="-"))
+            await db.commit()
+        return "hashed"
+
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.auth.hash_password_async", hash_while_another_request_registers
+    )
+    response = await client.post("/api/v1/auth/register", json=data)
+    assert response.status_code == 400 and response.json()["detail"] == "Email already registered"
+
+
+async def test_cancel_drops_the_cached_premium_flag(client, user, auth_headers):
+    for i in range(5):
+        goal = await client.post("/api/v1/goals/", json={"title": f"Goal {i}"}, headers=auth_headers)
+        assert goal.status_code == 200
+    # The principal, premium included, is now cached for this token
+    assert (await client.post("/api/v1/payments/cancel", headers=auth_headers)).status_code == 200
+
+    response = await client.post("/api/v1/goals/", json={"title": "Over the limit"}, headers=auth_headers)
+    assert response.status_code == 403
+
+
+async def test_principal_generations_are_bounded(monkeypatch):
+    monkeypatch.setattr(deps._principal_generations, "max_size", 2)
+    users = [uuid.uuid4() for _ in range(3)]
+    for user_id in users:
+        invalidate_principal(user_id)
+
+    assert len(deps._principal_generations) == 2
+    assert [deps.principal_generation(user_id) for user_id in users] == [0, 1, 1]
+
+
+async def test_register_conflict_without_a_match_is_a_409(client, monkeypatch):
+    data = {"email": "vanished@example.com", "username": "vanished", "password": "pw"}
+
+    async def hash_while_another_request_registers(password: str) -> str:
+        async with SessionLocal() as db:
+            db.add(User(email=data["email"], username="vanished racer", hashed_password="-"))
+            await db.commit()
+        return "hashed"
+
+    async def nothing_registered(db, user_data):
+        # As if the other registration was gone by the time of the re-check
+        pass
+
+    monkeypatch.setattr(
+        "app.api.v1.endpoints.auth.hash_password_async", hash_while_another_request_registers
+    )
+    monkeypatch.setattr("app.api.v1.endpoints.auth._check_not_registered", nothing_registered)
+    response = await client.post("/api/v1/auth/register", json=data)
+    assert response.status_code == 409
@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import false, func, select
+
+from app.core.database import SessionLocal
+from app.jobs.backfill_badges import backfill_badges
+from app.models.goal import Goal
+from app.models.reward import Badge, RewardEvent, UserReward, user_badges
+from app.models.step import Step
+from app.services.badge_rules import BADGE_RULES, ensure_badges
+from app.services.events import STEP_COMPLETED
+from app.services.rewards import process_pending_events, reward_processor
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_workers_seeding_together_create_each_badge_once(client):
+    async with SessionLocal() as db:
+        await ensure_badges(db)
+
+    # A second worker that read the catalog before the first one committed
+    async with SessionLocal() as db:
+        scalars = db.scalars
+
+        async def read_before_first_worker_committed(statement, *args, **kwargs):
+            db.scalars = scalars
+            return await scalars(select(Badge.name).where(false()))
+
+        db.scalars = read_before_first_worker_committed
+        await ensure_badges(db)
+
+    async with SessionLocal() as db:
+        counts = (await db.execute(select(Badge.name, func.count()).group_by(Badge.name))).all()
+    assert sorted(counts) == sorted((rule.name, 1) for rule in BADGE_RULES)
+
+
+async def _complete_steps(user_id, count: int, pending_events: bool = False) -> None:
+    """A goal with ``count`` completed steps, optionally still in the outbox."""
+    async with SessionLocal() as db:
+        db.add(Goal(
+            title="Backfilled", total_steps=count + 1, completed_steps=count, user_id=user_id,
+            steps=[Step(title=f"Step {i}", is_completed=i < count) for i in range(count + 1)],
+        ))
+        if pending_events:
+            db.add_all(
+                RewardEvent(user_id=user_id, type=STEP_COMPLETED, quantity=1, points=10)
+                for _ in range(count)
+            )
+        await db.commit()
+
+
+async def _reward(user_id) -> UserReward:
+    async with SessionLocal() as db:
+        return await db.scalar(select(UserReward).where(UserReward.user_id == user_id))
+
+
+async def test_backfill_creates_missing_reward_rows_and_awards(client, user):
+    await _complete_steps(user.id, 2)
+
+    await backfill_badges(batch_size=2)
+
+    reward = await _reward(user.id)
+    assert (reward.steps_completed, reward.goals_completed) == (2, 0)
+    async with SessionLocal() as db:
+        names = (await db.scalars(
+            select(Badge.name).join(user_badges, user_badges.c.badge_id == Badge.id)
+            .where(user_badges.c.user_id == user.id)
+        )).all()
+    assert names == ["First Step"]
+
+
+async def test_backfill_does_not_count_pending_events_twice(client, user, monkeypatch):
+    await _complete_steps(user.id, 3, pending_events=True)
+    # The outbox is drained first, then counted from the steps
+    await backfill_badges()
+    assert (await _reward(user.id)).steps_completed == 3
+    async with SessionLocal() as db:
+        assert await process_pending_events(db) == []
+    assert (await _reward(user.id)).steps_completed == 3
+
+    # Events arriving after the drain: the user is skipped, not recounted
+    await _complete_steps(user.id, 1, pending_events=True)
+
+    async def no_drain():
+        return 0
+
+    monkeypatch.setattr(reward_processor, "drain", no_drain)
+    awarded, skipped = await backfill_badges()
+    assert skipped >= 1
+    assert (await _reward(user.id)).steps_completed == 3
+    async with SessionLocal() as db:
+        await process_pending_events(db)
+    assert (await _reward(user.id)).steps_completed == 4
@@ -0,0 +1,22 @@
+import pytest
+
+from app.core.database import SessionLocal
+from app.models.goal import Goal
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_compressed_cors_response_has_one_vary_header(client, user, auth_headers):
+    async with SessionLocal() as db:
+        db.add_all([
+            Goal(title=f"Goal {i} " + "x" * 100, total_steps=0, user_id=user.id, steps=[])
+            for i in range(20)
+        ])
+        await db.commit()
+
+    response = await client.get("/api/v1/goals/", headers={
+        **auth_headers, "Origin": "http://localhost:3000", "Accept-Encoding": "gzip",
+    })
+    assert response.status_code == 200 and len(response.json()) == 20
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers.get_list("vary") == ["Origin, Accept-Encoding"]
@@ -0,0 +1,32 @@
+import pytest
+
+from app.core.database import SessionLocal
+from app.models.goal import Goal
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_progress_pages_skip_and_repeat_no_goal(client, user, auth_headers):
+    # 29/100 is 28.999... as a float, so the cursor must use the SQL arithmetic
+    async with SessionLocal() as db:
+        for title, completed in [("a", 29), ("b", 29), ("c", 10)]:
+            db.add(Goal(title=title, total_steps=100, completed_steps=completed, user_id=user.id))
+        await db.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"sort": "progress", "order": "desc", "limit": 1, "include": "none"}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/v1/goals/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        seen += [(goal["title"], goal["progress"]) for goal in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+
+    assert sorted(seen) == [("a", 29), ("b", 29), ("c", 10)]
+    assert [progress for _, progress in seen] == [29, 29, 10]
+
+    summary = (await client.get("/api/v1/goals/summary", headers=auth_headers)).json()
+    assert summary["average_progress"] == round((29 + 29 + 10) / 3)
@@ -0,0 +1,32 @@
+import os
+import sqlite3
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+from app.core.config import settings
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "alembic.ini")
+
+
+def test_upgrade_adopts_a_database_built_by_create_all(tmp_path, monkeypatch):
+    path = tmp_path / "create_all.db"
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{path}")
+    config = Config(ALEMBIC_INI)
+    # The schema create_all built, with data and no alembic_version table
+    command.upgrade(config, "0001")
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP TABLE alembic_version")
+        conn.execute(
+            "INSERT INTO users (id, email, username, hashed_password) "
+            "VALUES ('0123456789abcdef0123456789abcdef', 'old@example.com', 'old', '-')"
+        )
+
+    command.upgrade(config, "head")
+
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT email FROM users").fetchall() == [("old@example.com",)]
+        assert conn.execute("SELECT version_num FROM alembic_version").fetchall() == [
+            (ScriptDirectory.from_config(config).get_current_head(),)
+        ]
@@ -0,0 +1,42 @@
+import re
+
+import pytest
+
+from app.core.database import SessionLocal
+from app.models.goal import Goal
+from app.models.step import Step
+
+pytestmark = pytest.mark.anyio
+
+
+async def _add_goals(user_id, count: int, steps_per_goal: int = 4) -> None:
+    async with SessionLocal() as db:
+        for i in range(count):
+            db.add(Goal(
+                title=f"Goal {i}", total_steps=steps_per_goal, user_id=user_id,
+                steps=[Step(title=f"Step {j}") for j in range(steps_per_goal)],
+            ))
+        await db.commit()
+
+
+def _queries(response) -> int:
+    match = re.search(r'desc="(\d+) queries"', response.headers["server-timing"])
+    return int(match.group(1))
+
+
+@pytest.mark.parametrize("include", ["steps", "none"])
+async def test_goal_list_query_count_does_not_grow_with_goals(client, user, auth_headers, include):
+    # Authenticate once so both measured requests find the principal cached
+    assert (await client.get("/api/v1/auth/me", headers=auth_headers)).status_code == 200
+    await _add_goals(user.id, 3)
+    small = await client.get("/api/v1/goals/", params={"include": include}, headers=auth_headers)
+    assert small.status_code == 200 and len(small.json()) == 3
+
+    await _add_goals(user.id, 27)
+    # A new version, so neither the response cache nor If-None-Match answers it
+    large = await client.get(
+        "/api/v1/goals/", params={"include": include, "limit": 100}, headers=auth_headers
+    )
+    assert large.status_code == 200 and len(large.json()) == 30
+
+    assert _queries(large) == _queries(small)
@@ -0,0 +1,277 @@
+"""
+EXPLAIN every query the API issues per request and fail on sequential scans.
+
+Users, goals and steps are seeded inside a transaction on a database built by
+the migrations, since those are the indexes being checked. The test then
+drives the service code behind the auth, goal, step, reward and payment
+endpoints, records the SQL each one sends and runs EXPLAIN on every
+statement. Everything is rolled back at the end.
+
+On SQLite a SCAN of a table that uses no index is a failure. Set
+TEST_POSTGRES_URL to an empty PostgreSQL database to check its plans too:
+there sequential scans are disabled for the transaction, so a Seq Scan that
+still shows up means no index can serve the query.
+"""
+import json
+import os
+import re
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Set, Tuple
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event, insert, select, func
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.core.database import create_engine_for, engine
+from app.models import (
+    Base, User, Goal, Step, UserReward, RewardEvent, UserActivityDay, UserDataVersion,
+)
+from app.models.reward import user_badges
+from app.schemas.step import StepBatchOperation
+from app.schemas.sync import SyncMutation
+from app.services.activity import load_activity_days
+from app.services.badge_rules import ensure_badges
+from app.services.badges import badge_catalog, load_user_badges
+from app.services.changes import get_data_version, record_user_change
+from app.services.events import STEP_COMPLETED
+from app.services.goals import load_goal, load_goal_page, load_goal_summary, load_goals
+from app.services.rewards import process_pending_events
+from app.services.sync import apply_mutations, load_changes
+from app.services.webhooks import process_pending_webhooks, store_webhook
+from app.services.steps import (
+    apply_step_batch, delete_step, get_owned_step, goal_is_owned, toggle_step,
+)
+
+pytestmark = pytest.mark.anyio
+
+TEST_POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+# The badge catalog is a handful of rows, loaded whole on purpose
+FULL_SCAN_ALLOWED = {"badges"}
+
+
+async def seed(db: AsyncSession, users: int, goals: int, steps: int) -> List[dict]:
+    now = datetime.utcnow()
+    await ensure_badges(db)
+    badge_ids = [badge.id for badge in badge_catalog.badges.values()][:2]
+
+    user_rows, goal_rows, step_rows = [], [], []
+    for u in range(users):
+        user_id = uuid.uuid4()
+        user_rows.append({
+            "id": user_id,
+            "email": f"explain-{user_id.hex}@example.com",
+            "username": f"explain-{user_id.hex}",
+            "hashed_password": "x",
+            "paddle_subscription_id": f"sub_{user_id.hex}",
+            "created_at": now,
+        })
+        for g in range(goals):
+            goal_id = uuid.uuid4()
+            goal_rows.append({
+                "id": goal_id, "user_id": user_id, "title": f"Goal {g}",
+                "total_steps": steps, "completed_steps": steps // 3,
+                "created_at": now - timedelta(minutes=g),
+            })
+            step_rows.extend({
+                "id": uuid.uuid4(), "goal_id": goal_id, "title": f"Step {s}",
+                "is_completed": s < steps // 3, "created_at": now,
+            } for s in range(steps))
+
+    await db.execute(insert(User), user_rows)
+    await db.execute(insert(Goal), goal_rows)
+    await db.execute(insert(Step), step_rows)
+    await db.execute(insert(UserReward), [
+        {"user_id": row["id"], "total_points": 0, "steps_completed": 0, "goals_completed": 0}
+        for row in user_rows
+    ])
+    await db.execute(insert(UserDataVersion), [
+        {"user_id": row["id"], "version": 1} for row in user_rows
+    ])
+    await db.execute(insert(UserActivityDay), [
+        {"user_id": row["id"], "day": (now - timedelta(days=d)).date(), "completions": 1}
+        for row in user_rows for d in range(7)
+    ])
+    if badge_ids:
+        await db.execute(insert(user_badges), [
+            {"user_id": row["id"], "badge_id": badge_id, "earned_at": now}
+            for row in user_rows for badge_id in badge_ids
+        ])
+    await db.execute(insert(RewardEvent), [
+        {
+            "id": uuid.uuid4(), "user_id": row["id"], "type": STEP_COMPLETED,
+            "quantity": 1, "points": 10, "occurred_at": now,
+        }
+        for row in user_rows[:10]
+    ])
+    await db.flush()
+    return user_rows
+
+
+async def _second_page(db: AsyncSession, user_id: uuid.UUID, **params) -> None:
+    first = await load_goal_page(db, user_id, limit=2, include_steps=False, **params)
+    await load_goal_page(db, user_id, limit=2, cursor=first.next_cursor, include_steps=False, **params)
+
+
+def _scenarios(db: AsyncSession, user: dict, goal_id: uuid.UUID, step_ids: List[uuid.UUID]):
+    user_id = user["id"]
+    return [
+        ("auth: email lookup", lambda: db.scalar(select(User).where(User.email == user["email"]))),
+        ("auth: username lookup", lambda: db.scalar(select(User).where(User.username == user["username"]))),
+        ("auth: current user", lambda: db.get(User, user_id)),
+        ("goals: list", lambda: load_goals(db, user_id)),
+        ("goals: list without steps", lambda: load_goals(db, user_id, include_steps=False)),
+        ("goals: page by created_at", lambda: _second_page(db, user_id)),
+        ("goals: page by created_at asc", lambda: _second_page(db, user_id, order="asc")),
+        ("goals: page by updated_at", lambda: _second_page(db, user_id, sort="updated_at")),
+        ("goals: page by progress", lambda: _second_page(db, user_id, sort="progress")),
+        ("goals: page of completed goals", lambda: _second_page(db, user_id, status="completed")),
+        ("goals: page by title prefix", lambda: _second_page(db, user_id, title_prefix="goal")),
+        ("goals: summary", lambda: load_goal_summary(db, user_id)),
+        ("goals: get", lambda: load_goal(db, goal_id, user_id)),
+        ("goals: count", lambda: db.scalar(
+            select(func.count()).select_from(Goal).where(Goal.user_id == user_id)
+        )),
+        ("goals: data version", lambda: get_data_version(db, user_id)),
+        ("steps: goal ownership", lambda: goal_is_owned(db, goal_id, user_id)),
+        ("steps: get", lambda: get_owned_step(db, goal_id, step_ids[0], user_id)),
+        ("steps: toggle", lambda: toggle_step(db, goal_id, step_ids[0], user_id)),
+        ("steps: batch", lambda: apply_step_batch(db, user_id, goal_id, [
+            StepBatchOperation(op="toggle", step_id=step_ids[1]),
+            StepBatchOperation(op="update", step_id=step_ids[2], title="Renamed"),
+            StepBatchOperation(op="delete", step_id=step_ids[3]),
+        ])),
+        ("steps: delete", lambda: delete_step(db, goal_id, step_ids[4], user_id)),
+        ("changes: record", lambda: record_user_change(db, user_id)),
+        ("sync: changes since cursor", lambda: load_changes(db, user_id, 1)),
+        ("sync: push", lambda: apply_mutations(db, user_id, True, [
+            SyncMutation(entity="goal", op="update", id=goal_id, base_cursor=1000, data={"title": "Synced"}),
+            SyncMutation(entity="step", op="update", id=step_ids[5], goal_id=goal_id, base_cursor=1000,
+                         data={"is_completed": True}),
+        ])),
+        ("rewards: totals", lambda: db.scalar(select(UserReward).where(UserReward.user_id == user_id))),
+        ("rewards: badges", lambda: load_user_badges(db, user_id)),
+        ("rewards: activity", lambda: load_activity_days(db, user_id)),
+        ("rewards: process outbox", lambda: process_pending_events(db, 100)),
+        ("leaderboard: usernames", lambda: db.execute(
+            select(User.id, User.username).where(User.id.in_([user_id]))
+        )),
+        ("payments: subscription lookup", lambda: db.scalar(
+            select(User).where(User.paddle_subscription_id == user["paddle_subscription_id"])
+        )),
+        ("payments: store webhook", lambda: store_webhook(db, {
+            "alert_id": "explain-check", "alert_name": "subscription_created",
+            "passthrough": str(user_id), "subscription_id": user["paddle_subscription_id"],
+        })),
+        ("payments: process webhook inbox", lambda: process_pending_webhooks(db, 100)),
+    ]
+
+
+def _postgres_scans(plan) -> Set[str]:
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    scans, nodes = set(), [entry["Plan"] for entry in plan]
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan":
+            scans.add(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return scans
+
+
+# "SCAN goals", but not an ordered walk like "SCAN goals USING INDEX ..."
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?!.* USING (?:COVERING )?INDEX )")
+
+
+async def explain(conn, statement: str, parameters) -> Set[str]:
+    """Tables the statement reads in full."""
+    if conn.dialect.name == "postgresql":
+        plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)).scalar()
+        scans = _postgres_scans(plan)
+    else:
+        rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+        scans = {
+            match.group(1) for *_, detail in rows
+            if (match := _SQLITE_SCAN.match(detail)) and match.group(1) in Base.metadata.tables
+        }
+    return scans - FULL_SCAN_ALLOWED
+
+
+async def find_scans(engine: AsyncEngine, users: int, goals: int, steps: int) -> Dict[str, Set[str]]:
+    """Tables read in full, by scenario, for every query the scenarios send."""
+    captured: List[Tuple[str, str, object]] = []
+    label = None
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # Multi-row inserts/updates address rows by primary key
+        if label is not None and not executemany and not statement.lstrip().upper().startswith(
+            ("SAVEPOINT", "RELEASE", "ROLLBACK")
+        ):
+            captured.append((label, statement, parameters))
+
+    failures: Dict[str, Set[str]] = {}
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        if conn.dialect.name == "postgresql":
+            await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        db = AsyncSession(
+            bind=conn, join_transaction_mode="create_savepoint",
+            autoflush=False, expire_on_commit=False,
+        )
+        try:
+            seeded = await seed(db, users, goals, steps)
+            user = seeded[0]
+            goal_id = await db.scalar(select(Goal.id).where(Goal.user_id == user["id"]).limit(1))
+            step_ids = list((await db.scalars(
+                select(Step.id).where(Step.goal_id == goal_id).order_by(Step.title)
+            )).all())
+
+            event.listen(conn.sync_connection, "before_cursor_execute", capture)
+            for label, run in _scenarios(db, user, goal_id, step_ids):
+                db.expunge_all()
+                await run()
+                await db.flush()
+            label = None
+            event.remove(conn.sync_connection, "before_cursor_execute", capture)
+
+            assert captured
+            for query_label, statement, parameters in captured:
+                scans = await explain(conn, statement, parameters)
+                if scans:
+                    failures.setdefault(
+                        f"{query_label}: {' '.join(statement.split())[:100]}", set()
+                    ).update(scans)
+        finally:
+            await db.close()
+            await transaction.rollback()
+    return failures
+
+
+async def test_no_query_scans_a_table():
+    try:
+        assert await find_scans(engine, users=30, goals=10, steps=6) == {}
+    finally:
+        # aiosqlite connections belong to the test's event loop
+        await engine.dispose()
+
+
+@pytest.fixture
+def postgres_url(monkeypatch) -> str:
+    """TEST_POSTGRES_URL migrated to head; the test is skipped without it."""
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    monkeypatch.setattr(settings, "DATABASE_URL", TEST_POSTGRES_URL)
+    command.upgrade(Config(os.path.join(os.path.dirname(__file__), "..", "alembic.ini")), "head")
+    return TEST_POSTGRES_URL
+
+
+async def test_no_query_seq_scans_on_postgres(postgres_url):
+    postgres = create_engine_for(postgres_url)
+    try:
+        assert await find_scans(postgres, users=200, goals=20, steps=10) == {}
+    finally:
+        await postgres.dispose()
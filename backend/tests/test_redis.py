@@ -0,0 +1,95 @@
+"""The Redis-backed paths, against an in-memory Redis (the redis fixture)."""
+import asyncio
+import uuid
+
+import orjson
+import pytest
+
+from app.core import rate_limit
+from app.core.database import RecentWriters
+from app.core.pubsub import PubSub
+from app.core.rate_limit import RateLimitExceeded, TokenBucket
+from app.services.leaderboard import LocalLeaderboardBackend, RedisLeaderboardBackend
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_rate_limit_bucket_empties_and_refills(redis, monkeypatch):
+    now = 1_000_000.0
+    monkeypatch.setattr(rate_limit.time, "time", lambda: now)
+    bucket = TokenBucket("test", burst=2, per_minute=60)
+
+    await bucket.hit("client")
+    await bucket.hit("client")
+    with pytest.raises(RateLimitExceeded) as exc:
+        await bucket.hit("client")
+    assert exc.value.retry_after == pytest.approx(1.0)
+    # Other keys have buckets of their own
+    await bucket.hit("other")
+
+    now += 0.5
+    with pytest.raises(RateLimitExceeded) as exc:
+        await bucket.hit("client")
+    assert exc.value.retry_after == pytest.approx(0.5)
+    now += 0.5
+    await bucket.hit("client")
+    # Decided by the script, not the in-process fallback
+    assert await redis.exists("ratelimit:test:client")
+    assert bucket._local.get("client") is None
+
+
+async def test_recent_writes_are_seen_by_other_workers(redis):
+    user_id = uuid.uuid4()
+    writer, reader = RecentWriters(window=5), RecentWriters(window=5)
+    assert not await reader.contains(user_id)
+    await writer.mark(user_id)
+    assert await reader.contains(user_id)
+    assert 0 < await redis.pttl(f"wrote:{user_id}") <= 5000
+
+
+async def test_redis_leaderboard_matches_local(redis):
+    scores = {f"user{i}": score for i, score in enumerate([50, 10, 50, 30, 0, 70])}
+    local, shared = LocalLeaderboardBackend(), RedisLeaderboardBackend(redis)
+    for backend in (local, shared):
+        await backend.replace("points", scores)
+        await backend.set_scores("points", {"user1": 60, "user5": 0, "new": 5})
+
+    assert await shared.size("points") == await local.size("points") == 5
+    # Ties may come in either order; both backends give them the same rank
+    top = await shared.top("points", 3)
+    assert [score for _, score in top] == [60, 50, 50]
+    assert {member for member, _ in top} == {member for member, _ in await local.top("points", 3)}
+    for member in ("user0", "user2", "user3", "new", "user5"):
+        assert await shared.rank("points", member) == await local.rank("points", member)
+    assert await shared.rank("points", "user2") == (2, 50)
+    assert await shared.rank("points", "user5") is None
+
+
+async def test_pubsub_delivers_through_redis(redis):
+    pubsub = PubSub(queue_size=10)
+    user_id = uuid.uuid4()
+    try:
+        async with pubsub.subscribe(user_id) as first, pubsub.subscribe(user_id) as second:
+            assert await redis.pubsub_numsub(f"stream:{user_id}") == [(f"stream:{user_id}".encode(), 1)]
+            await pubsub.publish(user_id, {"type": "rewards"})
+            for queue in (first, second):
+                event = await asyncio.wait_for(queue.get(), 1)
+                assert orjson.loads(event) == {"type": "rewards"}
+        await asyncio.sleep(0.01)
+        assert await redis.pubsub_numsub(f"stream:{user_id}") == [(f"stream:{user_id}".encode(), 0)]
+    finally:
+        await pubsub.close()
+
+
+async def test_pubsub_replaces_backlog_with_resync(redis):
+    pubsub = PubSub(queue_size=2)
+    user_id = uuid.uuid4()
+    try:
+        async with pubsub.subscribe(user_id) as queue:
+            for version in range(3):
+                await pubsub.publish(user_id, {"type": "data", "version": version})
+            await asyncio.sleep(0.05)
+            assert orjson.loads(queue.get_nowait()) == {"type": "resync"}
+            assert queue.empty()
+    finally:
+        await pubsub.close()
@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import update
+
+from app.core.database import SessionLocal
+from app.models.goal import Goal
+from app.services.changes import record_user_change
+
+from app.core.response_cache import response_cache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(params=["local", "redis"])
+def cache_backend(request):
+    if request.param == "redis":
+        return request.getfixturevalue("redis")
+    return None
+
+
+async def test_write_from_another_worker_is_not_served_stale(client, user, auth_headers, cache_backend):
+    async with SessionLocal() as db:
+        goal = Goal(title="Before", total_steps=1, user_id=user.id, steps=[])
+        db.add(goal)
+        await record_user_change(db, user.id)
+        await db.commit()
+    first = await client.get("/api/v1/goals/", headers=auth_headers)
+    assert first.json()[0]["title"] == "Before"
+    hits = response_cache.hits
+    cached = await client.get("/api/v1/goals/", headers=auth_headers)
+    assert response_cache.hits == hits + 1
+    assert cached.headers["etag"] == first.headers["etag"]
+    if cache_backend is not None:
+        assert await cache_backend.keys("resp:*")
+
+    # As another worker's commit_user_change would: nothing in this process
+    # hears about it
+    async with SessionLocal() as db:
+        await db.execute(update(Goal).where(Goal.id == goal.id).values(title="After"))
+        await record_user_change(db, user.id)
+        await db.commit()
+
+    response = await client.get("/api/v1/goals/", headers=auth_headers)
+    assert response.json()[0]["title"] == "After"
+    assert response.headers["etag"] != first.headers["etag"]
+    revalidated = await client.get(
+        "/api/v1/goals/", headers={**auth_headers, "If-None-Match": first.headers["etag"]}
+    )
+    assert revalidated.status_code == 200
@@ -0,0 +1,98 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.database import SessionLocal
+from app.models.reward import RewardEvent, UserReward
+from app.services.activity import record_step_completions
+from app.services.events import GOAL_UNCOMPLETED, STEP_COMPLETED, STEP_UNCOMPLETED
+from app.services.rewards import STEP_POINTS, apply_event, process_pending_events
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_rewards_of_a_user_without_a_row_are_read_without_writing(client, user, auth_headers):
+    response = await client.get("/api/v1/rewards/", headers=auth_headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["user_id"] == str(user.id)
+    assert (body["total_points"], body["current_streak"], body["longest_streak"], body["badges"]) == (0, 0, 0, [])
+    async with SessionLocal() as db:
+        assert await db.scalar(select(UserReward).where(UserReward.user_id == user.id)) is None
+
+
+def test_apply_event_moves_points_and_counters_but_not_below_zero():
+    reward = UserReward(total_points=0, steps_completed=0, goals_completed=0)
+
+    apply_event(reward, STEP_COMPLETED, 2, 2 * STEP_POINTS)
+    assert (reward.total_points, reward.steps_completed) == (20, 2)
+    apply_event(reward, STEP_UNCOMPLETED, 1, -STEP_POINTS)
+    assert (reward.total_points, reward.steps_completed) == (10, 1)
+    apply_event(reward, GOAL_UNCOMPLETED, 1, -50)
+    assert (reward.total_points, reward.goals_completed) == (0, 0)
+
+
+async def _complete_on(user_id, *days_ago: int) -> None:
+    """A step completion on each given day: its rollup row and reward event."""
+    today = datetime.utcnow()
+    async with SessionLocal() as db:
+        for ago in days_ago:
+            at = today - timedelta(days=ago)
+            await record_step_completions(db, user_id, uuid.uuid4(), [(uuid.uuid4(), True)], at=at)
+            db.add(RewardEvent(
+                user_id=user_id, type=STEP_COMPLETED, quantity=1, points=STEP_POINTS, occurred_at=at,
+            ))
+        await db.commit()
+
+
+async def _process_and_read(user_id) -> tuple:
+    async with SessionLocal() as db:
+        await process_pending_events(db)
+    async with SessionLocal() as db:
+        reward = await db.scalar(select(UserReward).where(UserReward.user_id == user_id))
+    return reward.current_streak, reward.longest_streak, reward.total_points
+
+
+async def test_streaks_follow_the_activity_rollup(client, user):
+    # Same day twice
+    await _complete_on(user.id, 5, 5)
+    assert await _process_and_read(user.id) == (1, 1, 20)
+    # Next day
+    await _complete_on(user.id, 4)
+    assert await _process_and_read(user.id) == (2, 2, 30)
+    # A gap of a day
+    await _complete_on(user.id, 2)
+    assert await _process_and_read(user.id) == (1, 2, 40)
+    # Applied out of order: today first, then the missing day in between
+    await _complete_on(user.id, 0)
+    assert await _process_and_read(user.id) == (1, 2, 50)
+    await _complete_on(user.id, 1)
+    assert await _process_and_read(user.id) == (3, 3, 60)
+
+
+async def test_processing_the_outbox_is_idempotent(client, user):
+    await _complete_on(user.id, 0, 0, 1)
+    async with SessionLocal() as db:
+        assert user.id in await process_pending_events(db)
+    first = await _process_and_read(user.id)
+    async with SessionLocal() as db:
+        assert await process_pending_events(db) == []
+        pending = await db.scalar(
+            select(RewardEvent.id).where(RewardEvent.user_id == user.id, RewardEvent.processed_at.is_(None))
+        )
+    assert pending is None
+    assert await _process_and_read(user.id) == first == (2, 2, 30)
+
+
+async def test_rewards_and_activity_report_the_same_streaks(client, user, auth_headers):
+    await _complete_on(user.id, 3, 1, 0)
+    await _process_and_read(user.id)
+
+    rewards = (await client.get("/api/v1/rewards/", headers=auth_headers)).json()
+    activity = (await client.get("/api/v1/rewards/activity", headers=auth_headers)).json()
+    assert (rewards["current_streak"], rewards["longest_streak"]) == (2, 2)
+    assert (activity["current_streak"], activity["longest_streak"]) == (2, 2)
+    assert len(activity["days"]) == 3
@@ -0,0 +1,180 @@
+import re
+import uuid
+
+import pytest
+from sqlalchemy import event, update
+
+from app.core.database import SessionLocal, engine
+from app.jobs.repair_progress import repair_progress
+from app.models.goal import Goal
+from app.models.step import Step
+
+pytestmark = pytest.mark.anyio
+
+
+async def _goal(user_id, steps: int = 3, completed: int = 0) -> Goal:
+    async with SessionLocal() as db:
+        goal = Goal(
+            title="Counted", total_steps=steps, completed_steps=completed, user_id=user_id,
+            steps=[Step(title=f"Step {i}", is_completed=i < completed) for i in range(steps)],
+        )
+        db.add(goal)
+        await db.commit()
+    return goal
+
+
+async def _completed_steps(goal_id) -> int:
+    async with SessionLocal() as db:
+        return (await db.get(Goal, goal_id)).completed_steps
+
+
+def _queries(response) -> int:
+    match = re.search(r'desc="(\d+) queries"', response.headers["server-timing"])
+    return int(match.group(1))
+
+
+async def test_toggle_moves_the_counter_by_one(client, user, auth_headers):
+    goal = await _goal(user.id)
+    url = f"/api/v1/goals/{goal.id}/steps/{goal.steps[0].id}/toggle"
+    # Authenticate once so the measured requests find the principal cached
+    assert (await client.get("/api/v1/auth/me", headers=auth_headers)).status_code == 200
+
+    response = await client.patch(url, headers=auth_headers)
+    assert response.status_code == 200 and response.json()["is_completed"] is True
+    assert await _completed_steps(goal.id) == 1
+    # The step and goal updates plus their bookkeeping, see toggle_step
+    assert _queries(response) == 7
+
+    assert (await client.patch(url, headers=auth_headers)).json()["is_completed"] is False
+    assert await _completed_steps(goal.id) == 0
+
+
+async def test_update_moves_the_counter_only_when_completion_changes(client, user, auth_headers):
+    goal = await _goal(user.id)
+    url = f"/api/v1/goals/{goal.id}/steps/{goal.steps[1].id}"
+
+    for body, expected in [
+        ({"is_completed": True}, 1),
+        ({"is_completed": True}, 1),
+        ({"title": "Renamed"}, 1),
+        ({"is_completed": False}, 0),
+    ]:
+        assert (await client.put(url, json=body, headers=auth_headers)).status_code == 200
+        assert await _completed_steps(goal.id) == expected
+
+
+async def test_deleting_a_step_decrements_only_if_it_was_completed(client, user, auth_headers):
+    goal = await _goal(user.id, steps=3, completed=2)
+    completed, _, open_step = goal.steps
+
+    url = f"/api/v1/goals/{goal.id}/steps/{{}}"
+    assert (await client.delete(url.format(open_step.id), headers=auth_headers)).status_code == 200
+    assert await _completed_steps(goal.id) == 2
+    assert (await client.delete(url.format(completed.id), headers=auth_headers)).status_code == 200
+    assert await _completed_steps(goal.id) == 1
+
+
+async def test_repair_progress_recounts_drifted_counters(client, user):
+    drifted = await _goal(user.id, steps=4, completed=2)
+    correct = await _goal(user.id, steps=2, completed=1)
+    async with SessionLocal() as db:
+        await db.execute(update(Goal).where(Goal.id == drifted.id).values(completed_steps=7))
+        await db.commit()
+
+    assert await repair_progress(batch_size=1) >= 1
+    assert await _completed_steps(drifted.id) == 2
+    assert await _completed_steps(correct.id) == 1
+    assert await repair_progress() == 0
+
+
+async def _batch(client, auth_headers, goal_id, *operations):
+    return await client.post(
+        f"/api/v1/goals/{goal_id}/steps:batch", json={"operations": list(operations)}, headers=auth_headers
+    )
+
+
+async def test_batch_reports_unknown_steps_per_operation(client, user, auth_headers):
+    goal = await _goal(user.id)
+    other = await _goal(user.id)
+
+    response = await _batch(
+        client, auth_headers, goal.id,
+        {"op": "toggle", "step_id": str(uuid.uuid4())},
+        {"op": "update", "step_id": str(other.steps[0].id), "title": "Not this goal's"},
+        {"op": "toggle", "step_id": str(goal.steps[0].id)},
+        {"op": "delete", "step_id": str(goal.steps[1].id)},
+    )
+
+    assert response.status_code == 200
+    assert [(r["index"], r["status"]) for r in response.json()["results"]] == [(0, 404), (1, 404), (2, 200), (3, 204)]
+    assert await _completed_steps(goal.id) == 1
+    async with SessionLocal() as db:
+        assert (await db.get(Step, other.steps[0].id)).title == "Step 0"
+        assert await db.get(Step, goal.steps[1].id) is None
+
+
+async def test_batch_step_created_toggled_and_deleted_leaves_nothing(client, user, auth_headers):
+    goal = await _goal(user.id)
+    new_id = str(uuid.uuid4())
+
+    response = await _batch(
+        client, auth_headers, goal.id,
+        {"op": "create", "step_id": new_id, "title": "Short-lived"},
+        {"op": "toggle", "step_id": new_id},
+        {"op": "delete", "step_id": new_id},
+        {"op": "create", "step_id": str(goal.steps[0].id), "title": "Taken id"},
+    )
+
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [201, 200, 204, 409]
+    assert results[1]["step"]["is_completed"] is True
+    assert await _completed_steps(goal.id) == 0
+    async with SessionLocal() as db:
+        assert await db.get(Step, uuid.UUID(new_id)) is None
+        assert (await db.get(Step, goal.steps[0].id)).title == "Step 0"
+
+
+async def test_batch_moves_the_counter_in_one_update(client, user, auth_headers):
+    goal = await _goal(user.id, steps=6, completed=3)
+    completed_at = {}
+    async with SessionLocal() as db:
+        for step in goal.steps:
+            completed_at[step.id] = (await db.get(Step, step.id)).completed_at
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = await _batch(
+            client, auth_headers, goal.id,
+            # Toggled twice: completion unchanged, so completed_at is kept
+            {"op": "toggle", "step_id": str(goal.steps[0].id)},
+            {"op": "toggle", "step_id": str(goal.steps[0].id)},
+            {"op": "toggle", "step_id": str(goal.steps[1].id)},
+            {"op": "delete", "step_id": str(goal.steps[2].id)},
+            {"op": "toggle", "step_id": str(goal.steps[3].id)},
+            {"op": "toggle", "step_id": str(goal.steps[4].id)},
+            {"op": "create", "title": "Done already", "is_completed": True},
+        )
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    # 3 completed - 1 uncompleted - 1 deleted + 2 completed + 1 created completed
+    assert await _completed_steps(goal.id) == 4
+    assert sum(statement.lstrip().startswith("UPDATE goals") for statement in statements) == 1
+    async with SessionLocal() as db:
+        assert (await db.get(Step, goal.steps[0].id)).completed_at == completed_at[goal.steps[0].id]
+
+
+async def test_batch_is_capped_at_500_operations(client, user, auth_headers):
+    goal = await _goal(user.id)
+    toggle = {"op": "toggle", "step_id": str(goal.steps[0].id)}
+
+    assert (await _batch(client, auth_headers, goal.id, *[toggle] * 501)).status_code == 422
+    response = await _batch(client, auth_headers, goal.id, *[toggle] * 500)
+    assert response.status_code == 200 and len(response.json()["results"]) == 500
+    assert await _completed_steps(goal.id) == 0
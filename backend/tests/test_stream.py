@@ -0,0 +1,61 @@
+import asyncio
+from datetime import timedelta
+
+import orjson
+import pytest
+
+from app.api.deps import invalidate_principal
+from app.core.pubsub import pubsub
+from app.core.security import create_access_token
+
+pytestmark = pytest.mark.anyio
+
+
+def _events(body: bytes) -> list:
+    return [
+        orjson.loads(chunk[len(b"data: "):])
+        for chunk in body.split(b"\n\n") if chunk.startswith(b"data: ")
+    ]
+
+
+async def _connected(user_id) -> None:
+    for _ in range(200):
+        if pubsub._queues.get(user_id):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("the stream did not subscribe")
+
+
+async def test_stream_requires_a_header_token_or_a_ticket(client, user, auth_headers):
+    assert (await client.get("/api/v1/stream/")).status_code == 401
+    access_token = auth_headers["Authorization"].split()[1]
+    # Access tokens stay out of URLs, and tickets only open streams
+    assert (await client.get("/api/v1/stream/", params={"ticket": access_token})).status_code == 401
+    assert (await client.post("/api/v1/stream/ticket")).status_code == 403
+    ticket = (await client.post("/api/v1/stream/ticket", headers=auth_headers)).json()["ticket"]
+    me = await client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {ticket}"})
+    assert me.status_code == 401
+
+
+async def test_stream_delivers_events_until_the_principal_is_invalidated(client, user, auth_headers):
+    request = asyncio.create_task(client.get("/api/v1/stream/", headers=auth_headers))
+    await _connected(user.id)
+
+    invalidate_principal(user.id)
+    await pubsub.publish(user.id, {"type": "account"})
+    response = await asyncio.wait_for(request, 5)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert _events(response.content) == [{"type": "ready"}, {"type": "account"}, {"type": "expired"}]
+
+
+async def test_ticket_stream_closes_when_the_access_token_expires(client, user):
+    token = create_access_token({"sub": str(user.id)}, timedelta(seconds=2))
+    ticket = await client.post("/api/v1/stream/ticket", headers={"Authorization": f"Bearer {token}"})
+    assert ticket.status_code == 200
+
+    response = await asyncio.wait_for(
+        client.get("/api/v1/stream/", params={"ticket": ticket.json()["ticket"]}), 5
+    )
+    assert response.status_code == 200
+    assert _events(response.content) == [{"type": "ready"}, {"type": "expired"}]
@@ -0,0 +1,113 @@
+import uuid
+
+import pytest
+
+from app.services import sync
+
+pytestmark = pytest.mark.anyio
+
+
+async def _push(client, auth_headers, *mutations) -> list:
+    response = await client.post(
+        "/api/v1/sync/", json={"mutations": list(mutations)}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+async def _pull(client, auth_headers, since=None) -> dict:
+    params = {} if since is None else {"since": since}
+    response = await client.get("/api/v1/sync/", params=params, headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _create_goal(goal_id, title="Synced"):
+    return {"entity": "goal", "op": "create", "id": str(goal_id), "data": {"title": title}}
+
+
+def _create_step(step_id, goal_id, title="Synced step"):
+    return {
+        "entity": "step", "op": "create", "id": str(step_id),
+        "goal_id": str(goal_id), "data": {"title": title},
+    }
+
+
+async def test_stale_update_conflicts_with_the_servers_copy(client, user, auth_headers):
+    goal_id = uuid.uuid4()
+    await _push(client, auth_headers, _create_goal(goal_id))
+    base = (await _pull(client, auth_headers))["cursor"]
+
+    [applied] = await _push(client, auth_headers, {
+        "entity": "goal", "op": "update", "id": str(goal_id),
+        "base_cursor": base, "data": {"title": "From the phone"},
+    })
+    assert applied["status"] == 200
+    # Another device edited from the same cursor
+    [stale] = await _push(client, auth_headers, {
+        "entity": "goal", "op": "update", "id": str(goal_id),
+        "base_cursor": base, "data": {"title": "From the laptop"},
+    })
+    assert stale["status"] == 409
+    assert stale["goal"]["title"] == "From the phone"
+
+
+async def test_pull_returns_changes_and_tombstones_since_the_cursor(client, user, auth_headers):
+    kept, dropped = uuid.uuid4(), uuid.uuid4()
+    step_id = uuid.uuid4()
+    await _push(
+        client, auth_headers,
+        _create_goal(kept), _create_goal(dropped), _create_step(step_id, dropped),
+    )
+    since = (await _pull(client, auth_headers))["cursor"]
+
+    await _push(
+        client, auth_headers,
+        {"entity": "goal", "op": "update", "id": str(kept), "base_cursor": since, "data": {"title": "Kept"}},
+        {"entity": "goal", "op": "delete", "id": str(dropped), "base_cursor": since},
+    )
+    changes = await _pull(client, auth_headers, since)
+    assert changes["full"] is False and changes["cursor"] > since
+    assert [goal["title"] for goal in changes["goals"]] == ["Kept"]
+    assert changes["steps"] == []
+    assert changes["deleted_goals"] == [str(dropped)]
+    assert changes["deleted_steps"] == [str(step_id)]
+
+    # Nothing changed after the new cursor
+    empty = await _pull(client, auth_headers, changes["cursor"])
+    assert (empty["goals"], empty["deleted_goals"]) == ([], [])
+
+
+async def test_cursor_ahead_of_the_server_gets_a_full_snapshot(client, user, auth_headers):
+    goal_id = uuid.uuid4()
+    await _push(client, auth_headers, _create_goal(goal_id))
+    cursor = (await _pull(client, auth_headers))["cursor"]
+
+    # e.g. a cursor from another database
+    snapshot = await _pull(client, auth_headers, cursor + 100)
+    assert snapshot["full"] is True and snapshot["cursor"] == cursor
+    assert [goal["id"] for goal in snapshot["goals"]] == [str(goal_id)]
+
+
+async def test_database_conflict_fails_only_its_mutation(client, user, auth_headers, monkeypatch):
+    goal_id = uuid.uuid4()
+    await _push(client, auth_headers, _create_goal(goal_id, "Original"))
+    since = (await _pull(client, auth_headers))["cursor"]
+
+    # As if another push created the same id after this one checked for it
+    async def nothing_taken(db, model, ids):
+        return set()
+
+    monkeypatch.setattr(sync, "_existing_ids", nothing_taken)
+    step_id = uuid.uuid4()
+    results = await _push(
+        client, auth_headers,
+        _create_goal(goal_id, "Duplicate"),
+        _create_step(step_id, goal_id),
+    )
+    assert [result["status"] for result in results] == [409, 201]
+    assert results[0]["goal"]["title"] == "Original"
+
+    changes = await _pull(client, auth_headers, since)
+    assert [goal["title"] for goal in changes["goals"]] == []
+    assert [step["id"] for step in changes["steps"]] == [str(step_id)]
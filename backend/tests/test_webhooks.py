@@ -0,0 +1,138 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.models.webhook import WebhookEvent, WEBHOOK_DEAD, WEBHOOK_PENDING, WEBHOOK_PROCESSED
+from app.services import webhooks
+from app.services.webhooks import (
+    SIGNATURE_HEADER,
+    process_pending_webhooks,
+    requeue_dead_webhooks,
+    sign_payload,
+)
+
+pytestmark = pytest.mark.anyio
+
+SECRET = "test-webhook-secret"
+
+
+@pytest.fixture(autouse=True)
+async def inbox(monkeypatch):
+    """An empty inbox and a configured webhook secret."""
+    monkeypatch.setattr(settings, "PADDLE_WEBHOOK_SECRET", SECRET)
+    async with SessionLocal() as db:
+        await db.execute(delete(WebhookEvent))
+        await db.commit()
+
+
+async def _deliver(client, payload: dict, secret: str = SECRET, timestamp=None):
+    body = json.dumps(payload).encode()
+    return await client.post(
+        "/api/v1/payments/webhook",
+        content=body,
+        headers={SIGNATURE_HEADER: sign_payload(body, secret, timestamp), "Content-Type": "application/json"},
+    )
+
+
+async def _event(event_id: str) -> WebhookEvent:
+    async with SessionLocal() as db:
+        return await db.get(WebhookEvent, event_id)
+
+
+async def _process() -> int:
+    async with SessionLocal() as db:
+        return await process_pending_webhooks(db)
+
+
+async def _make_due(event_id: str) -> None:
+    async with SessionLocal() as db:
+        await db.execute(
+            update(WebhookEvent)
+            .where(WebhookEvent.event_id == event_id)
+            .values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        await db.commit()
+
+
+async def test_bad_and_stale_signatures_are_rejected(client):
+    payload = {"event_id": "evt_rejected", "event_type": "subscription_created"}
+
+    assert (await _deliver(client, payload, secret="wrong")).status_code == 401
+    stale = int(time.time()) - settings.PADDLE_WEBHOOK_TOLERANCE_SECONDS - 60
+    assert (await _deliver(client, payload, timestamp=stale)).status_code == 401
+    assert await _event("evt_rejected") is None
+
+
+async def test_redeliveries_are_stored_and_applied_once(client, user):
+    payload = {
+        "event_id": "evt_created", "event_type": "subscription_created",
+        "passthrough": str(user.id), "subscription_id": "sub_created",
+    }
+    async with SessionLocal() as db:
+        await db.execute(update(User).where(User.id == user.id).values(is_premium=False))
+        await db.commit()
+
+    for _ in range(3):
+        assert (await _deliver(client, payload)).status_code == 200
+    assert await _process() == 1
+    assert await _process() == 0
+
+    event = await _event("evt_created")
+    assert (event.status, event.attempts, event.last_error) == (WEBHOOK_PROCESSED, 1, None)
+    async with SessionLocal() as db:
+        stored = await db.get(User, user.id)
+    assert (stored.is_premium, stored.paddle_subscription_id) == (True, "sub_created")
+
+
+async def test_failing_handler_is_rolled_back_retried_and_dead_lettered(client, user, monkeypatch):
+    async def write_then_fail(db, payload):
+        stored = await db.get(User, user.id)
+        stored.paddle_subscription_id = "leaked"
+        await db.flush()
+        raise RuntimeError("handler failed")
+
+    monkeypatch.setitem(webhooks._HANDLERS, "test_failing", write_then_fail)
+    monkeypatch.setattr(settings, "WEBHOOK_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "WEBHOOK_RETRY_BASE_SECONDS", 30.0)
+    monkeypatch.setattr(settings, "WEBHOOK_RETRY_MAX_SECONDS", 3600.0)
+    # A good event in the same batch is applied despite its neighbour failing
+    assert (await _deliver(client, {"event_id": "evt_failing", "event_type": "test_failing"})).status_code == 200
+    assert (await _deliver(client, {"event_id": "evt_unhandled", "event_type": "unknown"})).status_code == 200
+
+    before = datetime.utcnow()
+    assert await _process() == 2
+    event = await _event("evt_failing")
+    assert (event.status, event.attempts) == (WEBHOOK_PENDING, 1)
+    assert event.last_error == "RuntimeError: handler failed"
+    # First retry after 30s, jittered into [15s, 30s]
+    assert before + timedelta(seconds=15) <= event.next_attempt_at <= datetime.utcnow() + timedelta(seconds=30)
+    assert (await _event("evt_unhandled")).status == WEBHOOK_PROCESSED
+    async with SessionLocal() as db:
+        assert (await db.get(User, user.id)).paddle_subscription_id is None
+
+    # Not due yet
+    assert await _process() == 0
+    await _make_due("evt_failing")
+    assert await _process() == 1
+    event = await _event("evt_failing")
+    assert (event.status, event.attempts) == (WEBHOOK_DEAD, 2)
+    await _make_due("evt_failing")
+    assert await _process() == 0
+
+    async with SessionLocal() as db:
+        assert await requeue_dead_webhooks(db) == 1
+    event = await _event("evt_failing")
+    assert (event.status, event.attempts) == (WEBHOOK_PENDING, 0)
+    assert event.next_attempt_at <= datetime.utcnow()
+    async with SessionLocal() as db:
+        assert (await db.get(User, user.id)).paddle_subscription_id is None
+
+
+async def test_payload_without_an_event_id_is_a_400(client):
+    assert (await _deliver(client, {"event_type": "subscription_created"})).status_code == 400
@@ -17,11 +17,22 @@ export function Dashboard() {
   const { user } = useAuth()
   const [showCreateGoal, setShowCreateGoal] = useState(false)
 
-  const { data: goals, isLoading, refetch } = useQuery({
+  // Goal cards only show the step counters, so the steps are not fetched
+  const { data: goals, isLoading, refetch: refetchGoals } = useQuery({
     queryKey: ['goals'],
-    queryFn: goalsApi.getAll,
+    queryFn: () => goalsApi.getAll(false),
   })
 
+  const { data: summary, refetch: refetchSummary } = useQuery({
+    queryKey: ['goals', 'summary'],
+    queryFn: goalsApi.getSummary,
+  })
+
+  const refetch = () => {
+    refetchGoals()
+    refetchSummary()
+  }
+
   if (isLoading) {
     return (
       <div className="min-h-screen flex items-center justify-center">
@@ -110,7 +121,7 @@ export function Dashboard() {
         )}
 
         {/* Free User Limitations */}
-        {!user?.is_premium && goals && goals.length >= 5 && (
+        {!user?.is_premium && summary && summary.total_goals >= 5 && (
           <motion.div
             initial={{ opacity: 0, y: 20 }}
             animate={{ opacity: 1, y: 0 }}
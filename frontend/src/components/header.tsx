@@ -2,6 +2,7 @@
 
 import { useState } from 'react'
 import { useAuth } from '@/hooks/use-auth'
+import { useChangeStream } from '@/hooks/use-change-stream'
 import { ThemeToggle } from '@/components/theme-toggle'
 import { Button } from '@/components/ui/button'
 import { Avatar } from '@/components/ui/avatar'
@@ -11,6 +12,7 @@ import Link from 'next/link'
 
 export function Header() {
   const { user, logout } = useAuth()
+  useChangeStream(Boolean(user))
 
   return (
     <header className="border-b bg-background/95 backdrop-blur supports-[backdrop-filter]:bg-background/60">
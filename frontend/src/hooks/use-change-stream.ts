@@ -0,0 +1,93 @@
+import { useEffect } from 'react'
+import { useQueryClient } from '@tanstack/react-query'
+import { isAxiosError } from 'axios'
+import { streamApi } from '@/lib/api'
+import { ChangeEvent } from '@/types'
+
+const RECONNECT_DELAY_MS = 1000
+
+// Refetches cached queries when the server announces a change, from this
+// or another device. EventSource reconnects by itself after network errors;
+// when the stream expires or its ticket is refused, a new ticket is fetched.
+export function useChangeStream(enabled: boolean) {
+  const queryClient = useQueryClient()
+
+  useEffect(() => {
+    if (!enabled) return
+    let source: EventSource | null = null
+    let retry: ReturnType<typeof setTimeout> | undefined
+    let stopped = false
+    let connected = false
+
+    const reconnect = () => {
+      source?.close()
+      source = null
+      if (!stopped) retry = setTimeout(connect, RECONNECT_DELAY_MS)
+    }
+
+    const connect = async () => {
+      try {
+        source = await streamApi.open()
+      } catch (error) {
+        // Signed out: the next login mounts the stream again
+        if (!(isAxiosError(error) && error.response?.status === 401)) reconnect()
+        return
+      }
+      if (!source) return
+      if (stopped) {
+        source.close()
+        return
+      }
+      listen(source)
+    }
+
+    const listen = (stream: EventSource) => {
+      stream.onerror = () => {
+        // Closed instead of retrying, e.g. the ticket was refused
+        if (stream.readyState === EventSource.CLOSED) reconnect()
+      }
+      stream.onmessage = (message) => {
+        const event: ChangeEvent = JSON.parse(message.data)
+        switch (event.type) {
+          case 'data':
+            queryClient.invalidateQueries({ queryKey: ['goals'] })
+            for (const id of [...(event.goals ?? []), ...(event.deleted_goals ?? [])]) {
+              queryClient.invalidateQueries({ queryKey: ['goal', id] })
+            }
+            // Step ids do not say which goal page shows them
+            if (event.steps?.length || event.deleted_steps?.length) {
+              queryClient.invalidateQueries({ queryKey: ['goal'] })
+            }
+            break
+          case 'rewards':
+            queryClient.invalidateQueries({ queryKey: ['rewards'] })
+            break
+          case 'ready':
+            // On a reconnect, covers whatever changed while disconnected
+            if (connected) {
+              queryClient.invalidateQueries({ queryKey: ['goals'] })
+              queryClient.invalidateQueries({ queryKey: ['goal'] })
+              queryClient.invalidateQueries({ queryKey: ['rewards'] })
+            }
+            connected = true
+            break
+          case 'account':
+          case 'resync':
+            queryClient.invalidateQueries()
+            break
+          case 'expired':
+            // The ticket in the URL is spent; get a new one
+            reconnect()
+            break
+        }
+      }
+    }
+
+    connect()
+    return () => {
+      stopped = true
+      clearTimeout(retry)
+      source?.close()
+    }
+  }, [enabled, queryClient])
+}
@@ -3,12 +3,21 @@ import Cookies from 'js-cookie'
 import { 
   User, 
   Goal, 
+  GoalSummary,
+  LeaderboardEntry,
+  LeaderboardName,
+  LeaderboardRank,
   Step, 
   UserReward, 
   AuthResponse, 
   CreateGoalRequest, 
   UpdateGoalRequest, 
-  CreateStepRequest 
+  CreateStepRequest,
+  StepBatchOperation,
+  StepBatchResult,
+  SyncPullResponse,
+  SyncMutation,
+  SyncMutationResult
 } from '@/types'
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
@@ -49,8 +58,26 @@ export const authApi = {
 
 // Goals API
 export const goalsApi = {
-  getAll: async (): Promise<Goal[]> => {
-    const response = await api.get('/goals')
+  getAll: async (includeSteps = true): Promise<Goal[]> => {
+    // The list is paginated; follow the cursor until the last page
+    const goals: Goal[] = []
+    let cursor: string | undefined
+    do {
+      const response = await api.get('/goals', {
+        params: {
+          limit: 100,
+          include: includeSteps ? 'steps' : 'none',
+          ...(cursor ? { cursor } : {}),
+        },
+      })
+      goals.push(...response.data)
+      cursor = response.headers['x-next-cursor']
+    } while (cursor)
+    return goals
+  },
+
+  getSummary: async (): Promise<GoalSummary> => {
+    const response = await api.get('/goals/summary')
     return response.data
   },
 
@@ -94,6 +121,24 @@ export const stepsApi = {
     const response = await api.patch(`/goals/${goalId}/steps/${stepId}/toggle`)
     return response.data
   },
+
+  batch: async (goalId: string, operations: StepBatchOperation[]): Promise<StepBatchResult[]> => {
+    const response = await api.post(`/goals/${goalId}/steps:batch`, { operations })
+    return response.data.results
+  },
+}
+
+// Sync API (offline support)
+export const syncApi = {
+  pull: async (since?: number): Promise<SyncPullResponse> => {
+    const response = await api.get('/sync/', { params: since ? { since } : {} })
+    return response.data
+  },
+
+  push: async (mutations: SyncMutation[]): Promise<SyncMutationResult[]> => {
+    const response = await api.post('/sync/', { mutations })
+    return response.data.results
+  },
 }
 
 // Rewards API
@@ -104,6 +149,30 @@ export const rewardsApi = {
   },
 }
 
+// Leaderboard API
+export const leaderboardApi = {
+  getTop: async (board: LeaderboardName, limit = 10): Promise<LeaderboardEntry[]> => {
+    const response = await api.get(`/leaderboard/${board}`, { params: { limit } })
+    return response.data.entries
+  },
+
+  getMyRank: async (board: LeaderboardName): Promise<LeaderboardRank> => {
+    const response = await api.get(`/leaderboard/${board}/me`)
+    return response.data
+  },
+}
+
+// Change stream API
+export const streamApi = {
+  // EventSource cannot send headers, so the stream is opened with a
+  // short-lived ticket in the query string instead of the access token
+  open: async (): Promise<EventSource | null> => {
+    if (!Cookies.get('token')) return null
+    const response = await api.post('/stream/ticket')
+    return new EventSource(`${API_URL}/stream/?ticket=${encodeURIComponent(response.data.ticket)}`)
+  },
+}
+
 // Payments API
 export const paymentsApi = {
   createSubscription: async (): Promise<{ checkout_url: string }> => {
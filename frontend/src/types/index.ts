@@ -22,11 +22,22 @@ export interface Goal {
   steps: Step[]
 }
 
+export interface GoalSummary {
+  total_goals: number
+  completed_goals: number
+  active_goals: number
+  total_steps: number
+  completed_steps: number
+  average_progress: number
+  progress_buckets: Record<'none' | 'bronze' | 'silver' | 'gold', number>
+}
+
 export interface Step {
   id: string
   title: string
   description?: string
   is_completed: boolean
+  completed_at?: string
   goal_id: string
   created_at: string
   updated_at: string
@@ -75,4 +86,72 @@ export interface UpdateGoalRequest {
 export interface CreateStepRequest {
   title: string
   description?: string
-}
\ No newline at end of file
+}
+
+export interface StepBatchOperation {
+  op: 'create' | 'update' | 'toggle' | 'delete'
+  step_id?: string
+  title?: string
+  description?: string
+  is_completed?: boolean
+}
+
+export interface StepBatchResult {
+  index: number
+  op: StepBatchOperation['op']
+  status: number
+  step?: Step
+  detail?: string
+}
+export interface SyncPullResponse {
+  cursor: number
+  full: boolean
+  goals: Omit<Goal, 'steps'>[]
+  steps: Step[]
+  deleted_goals: string[]
+  deleted_steps: string[]
+}
+
+export interface SyncMutation {
+  entity: 'goal' | 'step'
+  op: 'create' | 'update' | 'delete'
+  id: string
+  goal_id?: string
+  base_cursor?: number
+  data?: Record<string, unknown>
+}
+
+export interface SyncMutationResult {
+  index: number
+  status: number
+  goal?: Omit<Goal, 'steps'>
+  step?: Step
+  detail?: string
+}
+
+// Events of the change stream (GET /stream); id lists are only sent when non-empty
+export type ChangeEvent =
+  | { type: 'ready' | 'rewards' | 'account' | 'resync' | 'expired' }
+  | {
+      type: 'data'
+      version: number
+      goals?: string[]
+      steps?: string[]
+      deleted_goals?: string[]
+      deleted_steps?: string[]
+    }
+
+export type LeaderboardName = 'points' | 'weekly_points' | 'streak'
+
+export interface LeaderboardEntry {
+  rank: number
+  username: string
+  score: number
+}
+
+export interface LeaderboardRank {
+  board: LeaderboardName
+  rank: number | null
+  score: number
+  total: number
+}